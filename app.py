@@ -2,9 +2,22 @@ import os
 os.environ['USE_MOCK_OLLAMA'] = 'true'  # Enable mock mode by default
 
 from flask import Flask, request, jsonify, send_from_directory, render_template
-import hypercorn
-from hypercorn.config import Config
-from ollama_wrapper import OllamaClient, AsyncOllamaClient
+from flask.json.provider import DefaultJSONProvider
+from pydantic import BaseModel
+from werkzeug.exceptions import HTTPException
+from ollama_wrapper import AsyncOllamaClient
+from ollama_wrapper.background_loop import BackgroundLoop
+from ollama_wrapper.batch import BatchRunner
+from ollama_wrapper.broadcast import BroadcastHub
+from ollama_wrapper.catalog import ModelCatalog
+from ollama_wrapper.config import Config as OllamaConfig
+from ollama_wrapper.conversations import ConversationStore
+from ollama_wrapper.embed_batcher import EmbeddingBatcher
+from ollama_wrapper.logger import setup_logger
+from ollama_wrapper.pull import PullOrchestrator
+from ollama_wrapper.semantic_cache import SemanticCache
+from ollama_wrapper.structured import avalidate_stream, generate_structured, schema_from_format
+from ollama_wrapper.usage import UsageLedger
 from ollama_wrapper.models import (
     GenerateRequest, ChatRequest, CreateModelRequest,
     EmbeddingRequest, ModelOptions, Message,
@@ -13,26 +26,115 @@ from ollama_wrapper.models import (
 from ollama_wrapper.exceptions import (
     OllamaError, OllamaRequestError, 
     OllamaResponseError, OllamaValidationError,
-    OllamaTimeoutError
+    OllamaTimeoutError, OllamaStructuredOutputError
 )
-from ollama_wrapper.utils import validate_model_name
-import logging
+from ollama_wrapper.utils import validate_blob_digest, validate_model_name
+from asgi import DISCONNECT_EVENT_KEY, WSGIDisconnectAdapter
 import hashlib
+import hmac
+import gzip
 import asyncio
-from typing import Any, Dict, Generator, AsyncGenerator
-from functools import partial
-from ollama import AsyncClient
+import select
+import socket
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, AsyncGenerator, Optional
+from functools import partial, wraps
+
+if TYPE_CHECKING:
+    from ollama_wrapper.images import ImagePipeline
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is used when brotli is not installed
+    brotli = None
 
-ollama_client = AsyncClient()
 # Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = setup_logger(__name__)
+
+class OllamaJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes pydantic response models"""
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, BaseModel):
+            return o.model_dump(exclude_none=True)
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = OllamaJSONProvider(app)
 app.config['TEMPLATES_AUTO_RELOAD'] = True # Enable template reloading
 app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1GB max-limit for file uploads
-client = OllamaClient()
-async_client = AsyncOllamaClient()
+# Event loop that owns the async client's session for the process lifetime
+loop_runner = BackgroundLoop()
+
+def lazy_service(factory: Callable[[], Any]) -> Callable[[], Any]:
+    """Build a service on the first call of its getter and reuse it afterwards
+
+    Keeps importing the app cheap: clients, ledgers and stores are only
+    built (and usage logs replayed) once a request needs them.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @wraps(factory)
+    def get() -> Any:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
+
+@lazy_service
+def get_async_client() -> AsyncOllamaClient:
+    """Client for the primary backend, with the opt-in semantic cache answering
+    paraphrased prompts from earlier responses"""
+    semantic_cache = SemanticCache() if OllamaConfig.SEMANTIC_CACHE_ENABLED else None
+    return AsyncOllamaClient(semantic_cache=semantic_cache)
+
+@lazy_service
+def get_pull_orchestrator() -> PullOrchestrator:
+    """Pulls across the primary backend plus any extra OLLAMA_BACKENDS"""
+    async_client = get_async_client()
+    return PullOrchestrator([async_client] + [
+        AsyncOllamaClient(base_url=url)
+        for url in OllamaConfig.OLLAMA_BACKENDS if url != async_client.base_url
+    ])
+
+@lazy_service
+def get_model_catalog() -> ModelCatalog:
+    """Cached /api/tags and /api/show results, refreshed on the background loop"""
+    return ModelCatalog(get_async_client())
+
+@lazy_service
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """Opt-in: coalesces concurrent /api/embeddings calls into batched /api/embed requests"""
+    return EmbeddingBatcher(get_async_client()) if OllamaConfig.EMBED_BATCHING else None
+
+@lazy_service
+def get_image_pipeline() -> "ImagePipeline":
+    """Downsized, content-addressed images referenced by handle from requests"""
+    # Imported here; loading the imaging stack is a noticeable part of cold start
+    from ollama_wrapper.images import ImagePipeline
+    return ImagePipeline()
+
+@lazy_service
+def get_usage_ledger() -> UsageLedger:
+    """Token and GPU time usage per tenant, model and hour"""
+    return UsageLedger()
+
+@lazy_service
+def get_conversation_store() -> ConversationStore:
+    """Chat histories for clients that send only each turn's new messages"""
+    return ConversationStore()
+
+# Generate/chat streams other clients can attach to by stream ID
+stream_hub = BroadcastHub()
+# Batch jobs by id; each runs on the background loop
+batch_jobs: Dict[str, BatchRunner] = {}
+# Buffered response types worth compressing
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain'}
 
 def handle_ollama_error(error: Exception) -> tuple[dict, int]:
     if isinstance(error, ConnectionError):
@@ -45,30 +147,316 @@ def handle_ollama_error(error: Exception) -> tuple[dict, int]:
         return {"error": "Please retry your request"}, 503
     logger.error(f"Ollama error: {str(error)}")
     return {"error": str(error)}, 500
-def handle_streaming_response(response: Generator) -> Flask.response_class:
-    """Handle streaming responses from Ollama API"""
+def client_disconnect_probe() -> Callable[[], bool]:
+    """Return a callable reporting whether the current HTTP client has gone away
+
+    Under the ASGI adapter the disconnect event is set from ``http.disconnect``.
+    The Werkzeug development server exposes the raw socket instead, which is
+    peeked for EOF. Other WSGI servers close the response iterable on write
+    failure, which the streaming helpers handle in their ``finally`` blocks.
+    """
+    event = request.environ.get(DISCONNECT_EVENT_KEY)
+    if event is not None:
+        return event.is_set
+
+    sock = request.environ.get('werkzeug.socket')
+    if sock is None:
+        return lambda: False
+
+    def peer_closed() -> bool:
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+        except (OSError, ValueError):
+            return True
+    return peer_closed
+
+def handle_streaming_response(batches: Generator) -> Flask.response_class:
+    """Handle streaming responses from Ollama API
+
+    ``batches`` yields lists of chunks; each list is sent as one HTTP chunk
+    of NDJSON lines (see coalesce_stream). Stops reading and closes the
+    upstream stream as soon as the client disconnects, so Ollama stops
+    generating tokens nobody will read.
+    """
+    disconnected = client_disconnect_probe()
+
     def generate_stream():
         try:
-            for chunk in response:
-                yield jsonify(chunk).get_data(as_text=True) + '\n'
-        except Exception as e:
-            logger.error(f"Streaming error: {str(e)}")
-            yield jsonify({"error": str(e), "type": "StreamingError"}).get_data(as_text=True)
+            try:
+                for batch in batches:
+                    if disconnected():
+                        logger.info("Client disconnected, cancelling upstream stream")
+                        return
+                    yield ''.join(app.json.dumps(chunk) + '\n' for chunk in batch)
+            except Exception as e:
+                logger.error(f"Streaming error: {str(e)}")
+                error_type = e.__class__.__name__ if isinstance(e, OllamaError) else "StreamingError"
+                yield app.json.dumps({"error": str(e), "type": error_type}) + '\n'
+        finally:
+            close = getattr(batches, 'close', None)
+            if close is not None:
+                close()
     return app.response_class(generate_stream(), mimetype='application/x-ndjson')
 
-async def handle_async_streaming_response(response: AsyncGenerator) -> Flask.response_class:
-    """Handle async streaming responses from Ollama API"""
-    async def generate_stream():
+async def coalesce_stream(response: AsyncGenerator, flush_ms: float, flush_lines: int) -> AsyncGenerator:
+    """Group a stream's chunks into lists sent as one HTTP chunk each
+
+    A list is flushed once it holds ``flush_lines`` chunks or its first
+    chunk has waited ``flush_ms``, on a timer, so lines are not held back
+    while upstream stalls. With flush_ms at 0 every chunk is flushed alone.
+    """
+    if flush_ms <= 0 or flush_lines <= 1:
         try:
             async for chunk in response:
-                yield jsonify(chunk).get_data(as_text=True) + '\n'
-        except Exception as e:
-            logger.error(f"Async streaming error: {str(e)}")
-            yield jsonify({"error": str(e), "type": "StreamingError"}).get_data(as_text=True)
-    return app.response_class(generate_stream(), mimetype='application/x-ndjson')
+                yield [chunk]
+        finally:
+            await response.aclose()
+        return
+
+    loop = asyncio.get_running_loop()
+    buffer = []
+    deadline = None
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(response.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if done:
+                next_chunk, pending = pending, None
+                try:
+                    buffer.append(next_chunk.result())
+                except StopAsyncIteration:
+                    break
+                except Exception:
+                    # Deliver what arrived before the error
+                    if buffer:
+                        yield buffer
+                    raise
+                if deadline is None:
+                    deadline = loop.time() + flush_ms / 1000
+            if len(buffer) >= flush_lines or (deadline is not None and loop.time() >= deadline):
+                yield buffer
+                buffer, deadline = [], None
+        if buffer:
+            yield buffer
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        await response.aclose()
+
+async def invalidate_catalog_after(response: AsyncGenerator, model_name: Optional[str] = None) -> AsyncGenerator:
+    """Pass a stream through, invalidating the model catalog once it ends
+
+    Models created or pulled through a stream only exist once the stream
+    finishes, so the catalog is refreshed then rather than when it starts.
+    """
+    try:
+        async for chunk in response:
+            yield chunk
+    finally:
+        await response.aclose()
+        get_model_catalog().invalidate(model_name)
+
+def handle_async_streaming_response(
+    response: AsyncGenerator,
+    flush_ms: Optional[float] = None,
+    flush_lines: Optional[int] = None
+) -> Flask.response_class:
+    """Handle async streaming responses from Ollama API
+
+    The async generator is driven on the background loop; closing the response
+    closes it there, which releases the upstream aiohttp connection.
+
+    Lines are coalesced as in coalesce_stream. ``flush_ms`` and
+    ``flush_lines`` default to the query arguments of the same name, then
+    to Config.
+    """
+    if flush_ms is None:
+        flush_ms = request.args.get('flush_ms', OllamaConfig.STREAM_FLUSH_MS, type=float)
+    if flush_lines is None:
+        flush_lines = request.args.get('flush_lines', OllamaConfig.STREAM_FLUSH_LINES, type=int)
+    return handle_streaming_response(loop_runner.iterate(coalesce_stream(response, flush_ms, flush_lines)))
+
+def prepare_images(request_data):
+    """Replace image handles and inline images with downsized base64 data"""
+    if isinstance(request_data, ChatRequest):
+        for message in request_data.messages:
+            message.images = loop_runner.run(get_image_pipeline().expand(message.images))
+    else:
+        request_data.images = loop_runner.run(get_image_pipeline().expand(request_data.images))
+    return request_data
+
+def bearer_token() -> str:
+    """Token from the request's ``Authorization: Bearer`` header, or an empty string"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+def authenticated_tenant() -> Optional[str]:
+    """Tenant whose TENANT_TOKENS token the request presents, if any"""
+    token = bearer_token().encode()
+    if not token:
+        return None
+    tenant = None
+    # Compare against every token so the match position does not show in timing
+    for candidate, name in OllamaConfig.TENANT_TOKENS.items():
+        if hmac.compare_digest(token, candidate.encode()):
+            tenant = name
+    return tenant
+
+def current_tenant() -> str:
+    """Tenant the request is accounted to
+
+    With TENANT_TOKENS configured the tenant comes from the bearer token and
+    the tenant header is ignored. Otherwise the header is trusted as-is; it
+    must then be set by a proxy in front of the app, since clients can send
+    any value.
+    """
+    if OllamaConfig.TENANT_TOKENS:
+        return authenticated_tenant() or OllamaConfig.DEFAULT_TENANT
+    tenant = request.headers.get(OllamaConfig.TENANT_HEADER, '').strip()
+    return tenant[:64] or OllamaConfig.DEFAULT_TENANT
+
+def usage_admin() -> bool:
+    """Whether the request carries the usage admin bearer token"""
+    token = OllamaConfig.USAGE_ADMIN_TOKEN
+    if not token:
+        return False
+    return hmac.compare_digest(bearer_token().encode(), token.encode())
+
+def run_completion(request_data, conversation_id=None, new_messages=None, history_length=0):
+    """Run a generate or chat request and build the route response
+
+    Requests with a structured output ``format`` are validated as tokens
+    arrive. Streams are cut off at the first token that breaks the schema.
+    Buffered requests are retried with a fresh generation (see
+    generate_structured). Completed responses are counted in the usage ledger.
+
+    For a stored conversation, ``new_messages`` and the reply are committed
+    to it once the response completes, unless it no longer holds
+    ``history_length`` messages because a concurrent turn committed first. With STREAM_BROADCAST, streams are
+    broadcast under the X-Stream-ID they are returned with, so clients of
+    the same tenant can follow them through /api/streams/<id> while the
+    generation runs once.
+    """
+    async_client = get_async_client()
+    call = async_client.chat if isinstance(request_data, ChatRequest) else async_client.generate
+    tenant = current_tenant()
+    schema = schema_from_format(request_data.format)
+    if schema is not None and not request_data.stream:
+        response = loop_runner.run(generate_structured(get_async_client(), request_data))
+    else:
+        response = loop_runner.run(call(request_data))
+
+    # Handle streaming and non-streaming responses
+    if request_data.stream:
+        if schema is not None:
+            response = avalidate_stream(response, schema)
+        if conversation_id is not None:
+            response = get_conversation_store().wrap_async_stream(
+                conversation_id, request_data.model, new_messages, response, history_length
+            )
+        response = get_usage_ledger().wrap_async_stream(tenant, response)
+        if OllamaConfig.STREAM_BROADCAST:
+            broadcast = loop_runner.run(stream_hub.publish(response, tenant))
+            result = handle_async_streaming_response(broadcast.subscribe(owner=True))
+            result.headers['X-Stream-ID'] = broadcast.stream_id
+        else:
+            result = handle_async_streaming_response(response)
+    else:
+        get_usage_ledger().record(tenant, response)
+        if conversation_id is None:
+            return jsonify(response)
+        get_conversation_store().commit(conversation_id, request_data.model, new_messages, response, history_length)
+        result = jsonify({**response.model_dump(exclude_none=True), "conversation_id": conversation_id})
+    if conversation_id is not None:
+        result.headers['X-Conversation-ID'] = conversation_id
+    return result
+
+def run_conversation_turn(data, conversation_id=None):
+    """Run a chat turn of a stored conversation
+
+    ``messages`` holds only the turn's new messages. Only they are validated
+    and have their images prepared; the stored history is reused as is and
+    windowed (see ConversationStore.window). Without an ID, a new
+    conversation is started and its ID returned.
+    """
+    model = data.get('model')
+    history = []
+    if conversation_id is None:
+        conversation_id = get_conversation_store().new_id()
+    else:
+        conversation = get_conversation_store().get(conversation_id)
+        if conversation is None:
+            raise OllamaRequestError(
+                f"Conversation {conversation_id} not found; resend the full history to start a new one",
+                status_code=404
+            )
+        # A snapshot: the length tells whether another turn commits meanwhile
+        history = list(conversation.messages)
+        model = model or conversation.model
+    if not model:
+        raise OllamaValidationError("Model name is required")
+
+    new_messages = [Message(**message) for message in data.get('messages') or []]
+    if not new_messages:
+        raise OllamaValidationError("At least one new message is required")
+    for message in new_messages:
+        message.images = loop_runner.run(get_image_pipeline().expand(message.images))
+
+    # Stored Message instances are not validated again by pydantic
+    request_data = ChatRequest(**{
+        **data, 'model': model, 'messages': get_conversation_store().window(history + new_messages)
+    })
+    return run_completion(request_data, conversation_id, new_messages, len(history))
+
+@app.after_request
+def optimize_response(response):
+    """Add ETag validators and compress large buffered responses
+
+    GET responses get a weak content ETag, so a client revalidating with
+    If-None-Match receives 304 Not Modified instead of the body. Bodies of
+    at least COMPRESSION_MIN_SIZE bytes are brotli- or gzip-encoded when the
+    client accepts it. Streamed NDJSON and static files are passed through
+    untouched so streams stay incremental.
+    """
+    if response.is_streamed or response.direct_passthrough or response.status_code != 200:
+        return response
+
+    if request.method in ('GET', 'HEAD'):
+        # Weak, so the same validator covers every content-encoding of the body
+        response.add_etag(weak=True)
+        response.headers.setdefault('Cache-Control', 'no-cache')
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if (
+        'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or response.content_length is None
+        or response.content_length < OllamaConfig.COMPRESSION_MIN_SIZE
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=OllamaConfig.COMPRESSION_LEVEL))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=OllamaConfig.COMPRESSION_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/api/async/generate', methods=['POST'])
-async def async_generate():
+def async_generate():
     """Async generate completion endpoint"""
     try:
         data = request.get_json()
@@ -80,15 +468,8 @@ async def async_generate():
             data['model'] = validate_model_name(data['model'])
 
         # Create generate request
-        request_data = GenerateRequest(**data)
-
-        async with async_client as client:
-            response = await client.generate(request_data)
-
-            # Handle streaming and non-streaming responses
-            if request_data.stream:
-                return await handle_async_streaming_response(response)
-            return jsonify(response)
+        request_data = prepare_images(GenerateRequest(**data))
+        return run_completion(request_data)
 
     except Exception as e:
         logger.error(f"Async generate endpoint error: {str(e)}")
@@ -110,12 +491,20 @@ def handle_ollama_error(error):
     elif isinstance(error, OllamaValidationError):
         status_code = 400
         message = str(error)
+    elif isinstance(error, OllamaStructuredOutputError):
+        # The model's output, not the request, failed validation
+        status_code = 502
+        message = str(error)
     elif isinstance(error, OllamaTimeoutError):
         status_code = 504
         message = (
             "Request to Ollama server timed out. "
             "Please check if the server is running and responsive."
         )
+    elif isinstance(error, HTTPException):
+        # e.g. 413 from request.max_content_length while reading an upload
+        status_code = error.code
+        message = error.description
     else:
         status_code = 500
         message = str(error)
@@ -151,38 +540,107 @@ def generate():
                 data['prompt'] += " Respond using JSON"
 
         # Create generate request
-        request_data = GenerateRequest(**data)
-        response = client.generate(request_data)
-
-        # Handle streaming and non-streaming responses
-        if request_data.stream:
-            return handle_streaming_response(response)
-        return jsonify(response)
+        request_data = prepare_images(GenerateRequest(**data))
+        return run_completion(request_data)
 
     except Exception as e:
         logger.error(f"Generate endpoint error: {str(e)}")
         return handle_ollama_error(e)
 
+@app.route('/api/blobs/<digest>', methods=['HEAD'])
+def check_blob(digest):
+    """Report whether a blob already exists on the Ollama server"""
+    try:
+        digest = validate_blob_digest(digest)
+    except ValueError as e:
+        return handle_ollama_error(OllamaValidationError(str(e)))
+    try:
+        return ('', 200) if loop_runner.run(get_async_client().blob_exists(digest)) else ('', 404)
+    except Exception as e:
+        logger.error(f"Blob check error: {str(e)}")
+        return handle_ollama_error(e)
+
 @app.route('/api/blobs/<digest>', methods=['POST'])
 def upload_blob(digest):
-    """Handle blob uploads for model files"""
+    """Handle blob uploads for model files
+
+    The body is streamed to Ollama in chunks while its SHA-256 is computed
+    incrementally, so multi-GB files are never held in memory. Blobs the
+    server already has are skipped without reading the body.
+    """
     try:
-        if not request.data:
-            raise OllamaValidationError("No file data provided")
+        try:
+            digest = validate_blob_digest(digest)
+        except ValueError as e:
+            raise OllamaValidationError(str(e))
+
+        if loop_runner.run(get_async_client().blob_exists(digest)):
+            logger.info(f"Blob {digest} already exists, skipping upload")
+            return jsonify({"status": "exists", "digest": digest}), 200
+
+        request.max_content_length = OllamaConfig.MAX_BLOB_SIZE
+        hasher = hashlib.sha256()
+        size = 0
+
+        def hashed_chunks():
+            nonlocal size
+            while True:
+                chunk = request.stream.read(OllamaConfig.BLOB_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+                yield chunk
+
+        async def upload_chunks():
+            # Request body reads block, so they run off the event loop thread
+            chunks = hashed_chunks()
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
 
-        # Verify the digest matches the file content
-        file_hash = hashlib.sha256(request.data).hexdigest()
-        expected_hash = digest.replace('sha256:', '')
+        loop_runner.run(get_async_client().upload_blob(digest, upload_chunks()))
 
-        if file_hash != expected_hash:
+        if size == 0:
+            raise OllamaValidationError("No file data provided")
+        # Ollama verifies the digest too; this catches mismatches the mock server would accept
+        if f"sha256:{hasher.hexdigest()}" != digest:
             raise OllamaValidationError("File hash does not match provided digest")
 
-        response = client.upload_blob(digest, request.data)
-        return jsonify(response)
+        return jsonify({"status": "success", "digest": digest, "size": size}), 201
     except Exception as e:
         logger.error(f"Blob upload error: {str(e)}")
         return handle_ollama_error(e)
 
+@app.route('/api/images', methods=['POST'])
+def upload_images():
+    """Upload images for multimodal requests
+
+    Accepts multipart form files (field ``images``) or a raw image body.
+    Returns one handle per image; pass handles in ``images`` instead of
+    base64 data. Identical images share a handle and are prepared once.
+    """
+    try:
+        request.max_content_length = OllamaConfig.MAX_IMAGE_UPLOAD_SIZE
+        if request.files:
+            blobs = [f.read() for f in request.files.getlist('images')]
+        else:
+            blobs = [request.get_data()]
+        blobs = [blob for blob in blobs if blob]
+        if not blobs:
+            raise OllamaValidationError("No image data provided")
+
+        images = []
+        for blob in blobs:
+            handle = loop_runner.run(get_image_pipeline().ingest(blob))
+            images.append({"id": handle, "size": len(blob)})
+        return jsonify({"images": images}), 201
+    except Exception as e:
+        logger.error(f"Image upload error: {str(e)}")
+        return handle_ollama_error(e)
+
 @app.route('/api/show/<model_name>', methods=['GET'])
 def show_model(model_name):
     """Show model information endpoint"""
@@ -194,7 +652,9 @@ def show_model(model_name):
             model=model_name,
             verbose=verbose
         )
-        response = client.show_model(request_data)
+        response = loop_runner.run(
+            get_model_catalog().show_model(request_data.model, verbose=request_data.verbose)
+        )
         return jsonify(response)
     except Exception as e:
         logger.error(f"Show model endpoint error: {str(e)}")
@@ -216,11 +676,14 @@ def create_model():
 
         # Create model request with all parameters
         request_data = CreateModelRequest(**data)
-        response = client.create_model(request_data)
+        response = loop_runner.run(get_async_client().create_model(request_data))
 
         # Handle streaming response
         if request_data.stream:
-            return handle_streaming_response(response)
+            return handle_async_streaming_response(
+                invalidate_catalog_after(response, request_data.model)
+            )
+        get_model_catalog().invalidate(request_data.model)
         return jsonify(response)
 
     except Exception as e:
@@ -232,7 +695,8 @@ def delete_model(model_name):
     """Delete model endpoint"""
     try:
         model_name = validate_model_name(model_name)
-        response = client.delete_model(model_name)
+        response = loop_runner.run(get_async_client().delete_model(model_name))
+        get_model_catalog().invalidate(model_name)
         return jsonify(response)
     except Exception as e:
         logger.error(f"Delete model endpoint error: {str(e)}")
@@ -247,7 +711,10 @@ def copy_model():
             raise OllamaValidationError("No JSON data provided")
 
         request_data = ModelCopyRequest(**data)
-        response = client.copy_model(request_data)
+        response = loop_runner.run(
+            get_async_client().copy_model(request_data.source, request_data.destination)
+        )
+        get_model_catalog().invalidate(request_data.destination)
         return jsonify(response)
     except Exception as e:
         logger.error(f"Copy model endpoint error: {str(e)}")
@@ -262,15 +729,48 @@ def pull_model():
             raise OllamaValidationError("No JSON data provided")
 
         request_data = ModelPullRequest(**data)
-        response = client.pull_model(request_data)
+        response = loop_runner.run(
+            get_async_client().pull_model(request_data.name, stream=request_data.stream, insecure=request_data.insecure)
+        )
 
         if request_data.stream:
-            return handle_streaming_response(response)
+            return handle_async_streaming_response(
+                invalidate_catalog_after(response, request_data.name)
+            )
+        get_model_catalog().invalidate(request_data.name)
         return jsonify(response)
     except Exception as e:
         logger.error(f"Pull model endpoint error: {str(e)}")
         return handle_ollama_error(e)
 
+@app.route('/api/models/pull-many', methods=['POST'])
+def pull_many_models():
+    """Pull several models across backends with one merged progress stream
+
+    Body: ``{"models": [...], "backends": [...]}``; backends default to every
+    configured backend. Concurrent requests for a model already being pulled
+    on a backend attach to that pull instead of starting another.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            raise OllamaValidationError("No JSON data provided")
+
+        models = data.get('models')
+        if not models or not isinstance(models, list):
+            raise OllamaValidationError("'models' must be a non-empty list")
+        backends = data.get('backends')
+        unknown = [b for b in backends or [] if b not in get_pull_orchestrator().backends]
+        if unknown:
+            raise OllamaValidationError(f"Unknown backends: {', '.join(unknown)}")
+
+        return handle_async_streaming_response(
+            invalidate_catalog_after(get_pull_orchestrator().pull(models, backends))
+        )
+    except Exception as e:
+        logger.error(f"Pull many endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
 @app.route('/api/models/push', methods=['POST'])
 def push_model():
     """Push model endpoint"""
@@ -280,10 +780,12 @@ def push_model():
             raise OllamaValidationError("No JSON data provided")
 
         request_data = ModelPushRequest(**data)
-        response = client.push_model(request_data)
+        response = loop_runner.run(
+            get_async_client().push_model(request_data.name, stream=request_data.stream, insecure=request_data.insecure)
+        )
 
         if request_data.stream:
-            return handle_streaming_response(response)
+            return handle_async_streaming_response(response)
         return jsonify(response)
     except Exception as e:
         logger.error(f"Push model endpoint error: {str(e)}")
@@ -301,41 +803,153 @@ def chat():
         if 'model' in data:
             data['model'] = validate_model_name(data['model'])
 
+        # Delta chat: a conversation ID (or "store": true to start one) means
+        # the messages are only this turn's and the history is kept here
+        conversation_id = data.pop('conversation_id', None)
+        if data.pop('store', False) or conversation_id is not None:
+            return run_conversation_turn(data, conversation_id)
+
         # Create chat request
-        request_data = ChatRequest(**data)
-        response = client.chat(request_data)
+        request_data = prepare_images(ChatRequest(**data))
+        return run_completion(request_data)
 
-        # Handle streaming and non-streaming responses
-        if request_data.stream:
-            return handle_streaming_response(response)
+    except Exception as e:
+        logger.error(f"Chat endpoint error: {str(e)}")
+        return handle_ollama_error(e)
 
-        return jsonify(response)
+@app.route('/api/streams', methods=['GET'])
+def list_streams():
+    """List the caller's tenant's broadcast streams that can be attached to"""
+    try:
+        return jsonify({"streams": stream_hub.list(current_tenant())})
+    except Exception as e:
+        logger.error(f"List streams endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
+@app.route('/api/streams/<stream_id>', methods=['GET'])
+def follow_stream(stream_id):
+    """Attach to a running or recently finished generate/chat stream
 
+    The chunks produced so far are replayed, then new ones follow as they
+    are generated. X-Stream-Skipped reports how many early chunks had
+    already left the replay buffer; chunks missed later are reported by a
+    ``{"stream_id", "skipped"}`` line in the stream. Only streams of the
+    caller's tenant are found.
+    """
+    try:
+        broadcast = stream_hub.get(stream_id, current_tenant())
+        if broadcast is None:
+            raise OllamaRequestError(f"Stream {stream_id} not found", status_code=404)
+        skipped = broadcast.first_seq
+        response = handle_async_streaming_response(broadcast.subscribe())
+        response.headers['X-Stream-ID'] = stream_id
+        response.headers['X-Stream-Skipped'] = str(skipped)
+        return response
     except Exception as e:
-        logger.error(f"Chat endpoint error: {str(e)}")
+        logger.error(f"Follow stream endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
+@app.route('/api/conversations/<conversation_id>', methods=['GET'])
+def get_conversation(conversation_id):
+    """Return a stored conversation's model and full message history"""
+    try:
+        conversation = get_conversation_store().get(conversation_id)
+        if conversation is None:
+            raise OllamaRequestError(f"Conversation {conversation_id} not found", status_code=404)
+        return jsonify(conversation.to_dict())
+    except Exception as e:
+        logger.error(f"Get conversation endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
+@app.route('/api/conversations/<conversation_id>', methods=['DELETE'])
+def delete_conversation(conversation_id):
+    """Forget a stored conversation"""
+    try:
+        if not get_conversation_store().delete(conversation_id):
+            raise OllamaRequestError(f"Conversation {conversation_id} not found", status_code=404)
+        return jsonify({"status": "success"})
+    except Exception as e:
+        logger.error(f"Delete conversation endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
+async def compare_results(results: AsyncGenerator, tenant: str) -> AsyncGenerator:
+    """Turn fan_out results into one NDJSON line per model, counting their usage"""
+    try:
+        async for model, result in results:
+            if isinstance(result, Exception):
+                yield {"model": model, "error": str(result), "type": result.__class__.__name__}
+            else:
+                get_usage_ledger().record(tenant, result)
+                yield result
+    finally:
+        await results.aclose()
+
+@app.route('/api/compare', methods=['POST'])
+def compare_models():
+    """Send one prompt to several models at once
+
+    Body: ``{"prompt": ..., "models": [...], "policy": ...}`` plus optional
+    ``system``, ``options`` and ``format``. With the default ``all`` policy
+    every model's response is streamed as soon as it finishes. With
+    ``first_complete`` or ``first_valid`` only the winner is returned and
+    the other generations are cancelled.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            raise OllamaValidationError("No JSON data provided")
+        if not data.get('prompt'):
+            raise OllamaValidationError("Prompt is required")
+        models = data.get('models')
+        if not models or not isinstance(models, list):
+            raise OllamaValidationError("'models' must be a non-empty list")
+        models = [validate_model_name(model) for model in models]
+        options = ModelOptions(**data['options']) if data.get('options') else None
+        policy = data.get('policy', 'all')
+
+        if policy == 'all':
+            return handle_async_streaming_response(compare_results(get_async_client().fan_out(
+                data['prompt'], models, system=data.get('system'), options=options, format=data.get('format')
+            ), current_tenant()))
+
+        requests = [
+            GenerateRequest(
+                model=model, prompt=data['prompt'], system=data.get('system'),
+                options=options, format=data.get('format')
+            )
+            for model in models
+        ]
+        index, response = loop_runner.run(get_async_client().race(
+            requests, policy=policy, on_response=partial(get_usage_ledger().record, current_tenant())
+        ))
+        return jsonify({"winner": models[index], **response.model_dump(exclude_none=True)})
+    except Exception as e:
+        logger.error(f"Compare endpoint error: {str(e)}")
         return handle_ollama_error(e)
 
 @app.route('/api/models', methods=['GET'])
-async def list_models():
+def list_models():
     """List available models endpoint"""
     try:
-        response = await ollama_client.list()
+        response = loop_runner.run(get_model_catalog().list_models())
         models_info = []
-        for model in response.models:
+        for model in response['models']:
             model_info = {
-                'name': model.model,
-                'size': f"{(model.size / 1024 / 1024):.2f} MB",
+                'name': model.get('model') or model.get('name'),
+                'size': f"{(model.get('size', 0) / 1024 / 1024):.2f} MB",
             }
-            if model.details:
+            details = model.get('details')
+            if details:
                 model_info.update({
-                    'format': model.details.format,
-                    'family': model.details.family,
-                    'parameter_size': model.details.parameter_size,
-                    'quantization_level': model.details.quantization_level
+                    'format': details.get('format'),
+                    'family': details.get('family'),
+                    'parameter_size': details.get('parameter_size'),
+                    'quantization_level': details.get('quantization_level')
                 })
             models_info.append(model_info)
         return jsonify(models_info)
     except Exception as e:
+        logger.error(f"List models endpoint error: {str(e)}")
         return handle_ollama_error(e)
     #     if isinstance(response, dict) and 'models' in response:
     #         return jsonify(response['models'])
@@ -370,7 +984,7 @@ async def list_models():
 def list_running_models():
     """List running models endpoint"""
     try:
-        response = client.list_running_models()
+        response = loop_runner.run(get_async_client().list_running_models())
         return jsonify(response)
     except Exception as e:
         logger.error(f"List running models endpoint error: {str(e)}")
@@ -379,7 +993,11 @@ def list_running_models():
 
 @app.route('/api/embeddings', methods=['POST'])
 def create_embedding():
-    """Create embeddings endpoint"""
+    """Create embeddings endpoint
+
+    With EMBED_BATCHING, concurrent requests are batched into /api/embed
+    calls (see EmbeddingBatcher), whose vectors are L2-normalized.
+    """
     try:
         data = request.get_json()
         if not data:
@@ -390,18 +1008,127 @@ def create_embedding():
             data['model'] = validate_model_name(data['model'])
 
         request_data = EmbeddingRequest(**data)
-        response = client.create_embedding(request_data)
+        embedding_batcher = get_embedding_batcher()
+        if embedding_batcher is not None:
+            response = loop_runner.run(embedding_batcher.embed(request_data))
+        else:
+            response = loop_runner.run(get_async_client().create_embedding(request_data))
         return jsonify(response)
 
     except Exception as e:
         logger.error(f"Create embedding endpoint error: {str(e)}")
         return handle_ollama_error(e)
 
+def resolve_batch_input(input_path) -> str:
+    """Path of a batch input file, which must lie inside BATCH_INPUT_DIR"""
+    if not isinstance(input_path, str):
+        raise OllamaValidationError("'input_path' must be a string")
+    input_dir = os.path.realpath(OllamaConfig.BATCH_INPUT_DIR)
+    path = os.path.realpath(os.path.join(input_dir, input_path))
+    if os.path.commonpath([input_dir, path]) != input_dir or path == input_dir:
+        raise OllamaValidationError("'input_path' must be a file inside the batch input directory")
+    if not os.path.isfile(path):
+        raise OllamaRequestError(f"Batch input {input_path} not found", status_code=404)
+    return path
+
+def batch_concurrency(value) -> int:
+    """Requested batch concurrency, capped at BATCH_MAX_CONCURRENCY"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise OllamaValidationError("'concurrency' must be a positive integer")
+    return min(value, OllamaConfig.BATCH_MAX_CONCURRENCY)
+
+@app.route('/api/batch', methods=['POST'])
+def submit_batch():
+    """Submit (or resume) a batch generation job
+
+    Accepts either ``prompts`` (a list of prompts or GenerateRequest dicts) or
+    ``input_path`` (a JSONL file relative to BATCH_INPUT_DIR). Fields in
+    ``defaults`` (and a top-level ``model``) are merged into every record.
+    ``concurrency`` is capped at BATCH_MAX_CONCURRENCY. Passing the
+    ``job_id`` of an interrupted job resumes it from its checkpoint.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            raise OllamaValidationError("No JSON data provided")
+
+        if data.get('prompts'):
+            source = data['prompts']
+            if not isinstance(source, list):
+                raise OllamaValidationError("'prompts' must be a list")
+        elif data.get('input_path'):
+            source = resolve_batch_input(data['input_path'])
+        else:
+            raise OllamaValidationError("Either 'prompts' or 'input_path' is required")
+
+        job_id = data.get('job_id') or uuid.uuid4().hex
+        if not isinstance(job_id, str) or not job_id.isalnum():
+            raise OllamaValidationError("Invalid job id")
+        existing = batch_jobs.get(job_id)
+        if existing and existing.state == "running":
+            raise OllamaValidationError(f"Batch job {job_id} is already running")
+
+        defaults = dict(data.get('defaults') or {})
+        if 'model' in data:
+            defaults['model'] = validate_model_name(data['model'])
+
+        os.makedirs(OllamaConfig.BATCH_OUTPUT_DIR, exist_ok=True)
+        runner = BatchRunner(
+            get_async_client(),
+            output_path=os.path.join(OllamaConfig.BATCH_OUTPUT_DIR, f"{job_id}.jsonl"),
+            concurrency=batch_concurrency(data.get('concurrency', OllamaConfig.BATCH_CONCURRENCY)),
+            defaults=defaults,
+            on_response=partial(get_usage_ledger().record, current_tenant())
+        )
+        batch_jobs[job_id] = runner
+        loop_runner.submit(runner.run(source))
+        return jsonify({"job_id": job_id, **runner.status}), 202
+
+    except Exception as e:
+        logger.error(f"Batch submit endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
+@app.route('/api/batch/<job_id>', methods=['GET'])
+def batch_status(job_id):
+    """Batch job status endpoint"""
+    runner = batch_jobs.get(job_id)
+    if runner is None:
+        return jsonify({"error": f"Batch job {job_id} not found"}), 404
+    return jsonify({"job_id": job_id, **runner.status})
+
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """Token and GPU time usage per tenant, model and hour
+
+    Optional query parameters ``tenant``, ``model``, ``since`` and ``until``
+    (hours such as ``2024-02-11T10``) filter the rows. Callers only see
+    their own tenant's usage, unless they present USAGE_ADMIN_TOKEN. With
+    TENANT_TOKENS configured, callers must present their tenant's token;
+    otherwise the tenant header is trusted (see Config.TENANT_TOKENS).
+    """
+    try:
+        tenant = request.args.get('tenant')
+        if not usage_admin():
+            if OllamaConfig.TENANT_TOKENS and authenticated_tenant() is None:
+                raise OllamaRequestError("A tenant token is required", status_code=401)
+            if tenant is not None and tenant != current_tenant():
+                raise OllamaRequestError("Usage of other tenants requires the admin token", status_code=403)
+            tenant = current_tenant()
+        return jsonify(get_usage_ledger().query(
+            tenant=tenant,
+            model=request.args.get('model'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        ))
+    except Exception as e:
+        logger.error(f"Usage endpoint error: {str(e)}")
+        return handle_ollama_error(e)
+
 @app.route('/api/version', methods=['GET'])
 def get_version():
     """Version endpoint"""
     try:
-        response = client.get_version()
+        response = loop_runner.run(get_async_client().get_version())
         return jsonify(response)
     except Exception as e:
         logger.error(f"Version endpoint error: {str(e)}")
@@ -425,7 +1152,14 @@ def index():
 # def internal_error(error):
 #     return render_template('index.html'), 500
 
+# ASGI entry point that propagates client disconnects into streaming responses
+asgi_app = WSGIDisconnectAdapter(app)
+
 if __name__ == '__main__':
+    # Only needed to serve directly; workers import asgi_app without it
+    import hypercorn.asyncio
+    from hypercorn.config import Config
+
     config = Config()
     config.bind = ["0.0.0.0:5000"]
-    hypercorn.run(app, config)
\ No newline at end of file
+    asyncio.run(hypercorn.asyncio.serve(asgi_app, config))
\ No newline at end of file
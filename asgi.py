@@ -0,0 +1,188 @@
+"""ASGI adapter that exposes client disconnects to the Flask WSGI app"""
+import asyncio
+import io
+import sys
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from ollama_wrapper.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# WSGI environ key holding a threading.Event that is set once the client goes away
+DISCONNECT_EVENT_KEY = "ollama.disconnected"
+
+
+class ASGIInputStream(io.RawIOBase):
+    """Blocking ``wsgi.input`` fed by request body chunks from the ASGI loop
+
+    Chunks are handed over through a bounded queue, so a slow reader applies
+    backpressure to the client instead of the body being buffered in memory.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: "asyncio.Queue[Optional[bytes]]"):
+        self._loop = loop
+        self._queue = queue
+        self._buffer = bytearray()
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._eof:
+            chunk = asyncio.run_coroutine_threadsafe(self._queue.get(), self._loop).result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer.extend(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+
+class WSGIDisconnectAdapter:
+    """Serve a WSGI app over ASGI while tracking client disconnects
+
+    Hypercorn's built-in WSGI bridge keeps iterating a streaming body after the
+    client has gone, because it never forwards ``http.disconnect`` to the app.
+    This adapter watches the ASGI receive channel, sets
+    ``environ[DISCONNECT_EVENT_KEY]`` when the client disconnects and stops
+    iterating the response body, which closes it and any upstream stream.
+
+    Request bodies are streamed to the app through ``wsgi.input`` rather than
+    read up front; size limits are left to the app (Flask's MAX_CONTENT_LENGTH).
+    """
+
+    def __init__(self, app: Callable, body_queue_size: int = 8):
+        self.app = app
+        self.body_queue_size = body_queue_size
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._handle_lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._handle_http(scope, receive, send)
+
+    async def _handle_lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle_http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        loop = asyncio.get_running_loop()
+        disconnected = threading.Event()
+        body_queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=self.body_queue_size)
+
+        async def pump_receive() -> None:
+            body_done = False
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if not body_done:
+                        # Unblock a reader waiting on a body that will never finish
+                        while not body_queue.empty():
+                            body_queue.get_nowait()
+                        body_queue.put_nowait(None)
+                    return
+                if not body_done:
+                    chunk = message.get("body", b"")
+                    if chunk:
+                        await body_queue.put(chunk)
+                    if not message.get("more_body"):
+                        body_done = True
+                        await body_queue.put(None)
+
+        environ = _build_environ(scope, io.BufferedReader(ASGIInputStream(loop, body_queue), 64 * 1024))
+        environ[DISCONNECT_EVENT_KEY] = disconnected
+        pump = loop.create_task(pump_receive())
+
+        def send_from_thread(message: Dict[str, Any]) -> None:
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        try:
+            await loop.run_in_executor(None, self._run_app, environ, send_from_thread)
+        finally:
+            pump.cancel()
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _run_app(self, environ: Dict[str, Any], send: Callable) -> None:
+        disconnected: threading.Event = environ[DISCONNECT_EVENT_KEY]
+        status_code = 500
+        headers = []
+
+        def start_response(status: str, response_headers, exc_info=None) -> None:
+            nonlocal status_code, headers
+            status_code = int(status.split(" ", 1)[0])
+            headers = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in response_headers
+            ]
+
+        response_body = self.app(environ, start_response)
+        try:
+            started = False
+            for output in response_body:
+                if disconnected.is_set():
+                    logger.info("Client disconnected, closing response stream")
+                    break
+                if not started:
+                    send({"type": "http.response.start", "status": status_code, "headers": headers})
+                    started = True
+                if output:
+                    send({"type": "http.response.body", "body": output, "more_body": True})
+            if not started and not disconnected.is_set():
+                send({"type": "http.response.start", "status": status_code, "headers": headers})
+        finally:
+            if hasattr(response_body, "close"):
+                response_body.close()
+
+
+def _build_environ(scope: Dict[str, Any], body: BinaryIO) -> Dict[str, Any]:
+    """Build a WSGI environ from an ASGI HTTP scope"""
+    server = scope.get("server") or ("localhost", 80)
+    script_name = scope.get("root_path", "")
+    path = scope["path"]
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):] or "/"
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name.encode("utf8").decode("latin1"),
+        "PATH_INFO": path.encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if key in environ:
+            value = f"{environ[key]},{value}"
+        environ[key] = value
+    return environ
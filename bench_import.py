@@ -0,0 +1,87 @@
+"""Import-time benchmark for ollama_wrapper and app.py
+
+Each import runs in a fresh interpreter, so module caches from earlier runs
+do not hide the cold-start cost. Usage:
+
+    python bench_import.py                   # default targets, 10 runs each
+    python bench_import.py -n 20 app         # specific targets
+    python bench_import.py --top 15 app      # slowest modules pulled in by a target
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_TARGETS = [
+    "ollama_wrapper",
+    "from ollama_wrapper import OllamaClient",
+    "from ollama_wrapper import AsyncOllamaClient",
+    "app",
+]
+
+
+def _statement(target: str) -> str:
+    return target if target.startswith(("from ", "import ")) else f"import {target}"
+
+
+def _importtime(target: str) -> Dict[str, Tuple[int, int]]:
+    """Run one cold import; returns module -> (self us, cumulative us)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _statement(target)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target!r} failed:\n{result.stderr}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        # Nested imports keep their indentation so top-level ones can be told apart
+        timings[module[1:].rstrip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def _total_ms(timings: Dict[str, Tuple[int, int]]) -> float:
+    # Top-level entries are the modules the statement itself imported; the
+    # interpreter's own startup imports (site, encodings) are excluded
+    startup = {"site", "encodings", "_frozen_importlib_external", "zipimport", "codecs"}
+    return sum(c for m, (_, c) in timings.items() if m not in startup and not m.startswith(" ")) / 1000
+
+
+def benchmark(targets: List[str], runs: int) -> None:
+    print(f"{'target':<48} {'median ms':>10} {'min ms':>8} {'modules':>8}")
+    for target in targets:
+        totals = []
+        modules = 0
+        for _ in range(runs):
+            timings = _importtime(target)
+            totals.append(_total_ms(timings))
+            modules = len(timings)
+        print(f"{target:<48} {statistics.median(totals):>10.1f} {min(totals):>8.1f} {modules:>8}")
+
+
+def slowest(target: str, top: int) -> None:
+    timings = _importtime(target)
+    print(f"Slowest modules imported by {target!r} (self time)")
+    ranked = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for module, (self_us, cumulative_us) in ranked:
+        print(f"{self_us / 1000:>8.1f} ms  {cumulative_us / 1000:>8.1f} ms cumulative  {module.strip()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS,
+                        help="Modules or import statements to time")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Cold imports per target")
+    parser.add_argument("--top", type=int, default=0, help="List the N slowest modules of each target instead")
+    args = parser.parse_args()
+
+    if args.top:
+        for target in args.targets:
+            slowest(target, args.top)
+    else:
+        benchmark(args.targets, args.runs)
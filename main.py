@@ -2,7 +2,7 @@
 import asyncio
 from hypercorn.config import Config
 from hypercorn.asyncio import serve
-from app import app
+from app import asgi_app
 
 async def main():
     """Main entry point for the application"""
@@ -11,12 +11,12 @@ async def main():
     config.use_reloader = True
     
     try:
-        await serve(app, config)
+        await serve(asgi_app, config)
     except OSError as e:
         if "Address already in use" in str(e):
             config.bind = ["0.0.0.0:8080"]
             print("Port 5000 not available, using port 8080 instead")
-            await serve(app, config)
+            await serve(asgi_app, config)
         else:
             raise
 
@@ -1,30 +1,76 @@
-from .client import OllamaClient
-from .async_client import AsyncOllamaClient
-from .exceptions import OllamaError, OllamaRequestError, OllamaResponseError
-from .models import (
-    GenerateRequest,
-    GenerateResponse,
-    ChatRequest,
-    ChatResponse,
-    CreateModelRequest,
-    ModelResponse,
-    EmbeddingRequest,
-    EmbeddingResponse
-)
+"""Python wrapper for the Ollama API
+
+Public names are imported on first access, so ``import ollama_wrapper`` does
+not load requests, aiohttp or pydantic until a client or model is used.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .client import OllamaClient
+    from .async_client import AsyncOllamaClient
+    from .exceptions import OllamaError, OllamaRequestError, OllamaResponseError
+    from .models import (
+        GenerateRequest,
+        GenerateResponse,
+        ChatRequest,
+        ChatResponse,
+        CreateModelRequest,
+        ModelResponse,
+        EmbeddingRequest,
+        EmbeddingResponse
+    )
+    from .tools import Tool, tool
 
 __version__ = "1.0.0"
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    "OllamaClient": ".client",
+    "AsyncOllamaClient": ".async_client",
+    "OllamaError": ".exceptions",
+    "OllamaRequestError": ".exceptions",
+    "OllamaResponseError": ".exceptions",
+    "GenerateRequest": ".models",
+    "GenerateResponse": ".models",
+    "ChatRequest": ".models",
+    "ChatResponse": ".models",
+    "CreateModelRequest": ".models",
+    "ModelResponse": ".models",
+    "EmbeddingRequest": ".models",
+    "EmbeddingResponse": ".models",
+    "Tool": ".tools",
+    "tool": ".tools",
+}
+
 __all__ = [
     "OllamaClient",
     "AsyncOllamaClient",
     "OllamaError",
-    "OllamaRequestError", 
+    "OllamaRequestError",
     "OllamaResponseError",
     "GenerateRequest",
     "GenerateResponse",
-    "ChatRequest", 
+    "ChatRequest",
     "ChatResponse",
     "CreateModelRequest",
     "ModelResponse",
     "EmbeddingRequest",
-    "EmbeddingResponse"
-]
\ No newline at end of file
+    "EmbeddingResponse",
+    "Tool",
+    "tool"
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -2,14 +2,16 @@
 import aiohttp
 import asyncio
 import os
-from typing import AsyncGenerator, Dict, Any, Optional, Union
+import time
+from typing import AsyncGenerator, AsyncIterable, Callable, Dict, Any, List, Optional, Sequence, Tuple, Union
 import json
 from .config import Config
+from .cost import CostModel
 from .models import (
     GenerateRequest, GenerateResponse,
-    ChatRequest, ChatResponse,
+    ChatRequest, ChatResponse, Message,
     CreateModelRequest, ModelResponse,
-    EmbeddingRequest, EmbeddingResponse
+    EmbeddingRequest, EmbeddingResponse, ModelOptions
 )
 from .exceptions import (
     OllamaRequestError,
@@ -17,11 +19,18 @@ from .exceptions import (
     OllamaTimeoutError,
     OllamaValidationError
 )
-from .logger import setup_logger
+from .logger import LazyJSON, setup_logger
 logger = setup_logger(__name__)
-from .utils import validate_model_name
-from .mock_server import MockOllamaServer
+from .utils import parse_base_url, validate_blob_digest, validate_model_name
 from .rate_limiter import RateLimiter
+from .rate_limit_store import RateLimitStore, shared_store
+from .replay import TraceReplayer, shared_recorder
+from .semantic_cache import SemanticCache
+from .structured import response_text, generate_structured, schema_from_format
+from .tools import Tool, ToolExecutor, arun_tool_loop
+
+# Winner selection policies for AsyncOllamaClient.race
+RACE_POLICIES = ("first_complete", "first_valid")
 
 
 class AsyncOllamaClient:
@@ -35,11 +44,18 @@ class AsyncOllamaClient:
         rate_limit_capacity: int = 10,
         pool_connections: int = 100,
         pool_keepalive: int = 30,
-        pool_timeout: float = 10.0
+        pool_timeout: float = 10.0,
+        record_path: Optional[str] = Config.TRACE_RECORD_PATH,
+        replay_path: Optional[str] = Config.TRACE_REPLAY_PATH,
+        replay_speed: float = Config.TRACE_REPLAY_SPEED,
+        semantic_cache: Optional[SemanticCache] = None,
+        rate_limit_store: Optional[RateLimitStore] = None,
+        cost_model: Optional[CostModel] = None
     ):
         """Initialize Async Ollama API client
         Args:
-            base_url (str, optional): Base URL for Ollama API. Defaults to Config.OLLAMA_API_URL.
+            base_url (str, optional): Base URL for Ollama API, or unix:///path/to/socket.
+                Defaults to Config.OLLAMA_API_URL.
             use_mock (bool, optional): Force use of mock server. Defaults to None (uses env var).
             max_retries (int): Maximum number of retry attempts for failed requests
             retry_delay (float): Initial delay between retries in seconds (doubles with each retry)
@@ -48,13 +64,33 @@ class AsyncOllamaClient:
             pool_connections (int): Maximum number of connections to keep in pool
             pool_keepalive (int): Keep alive timeout for pooled connections in seconds
             pool_timeout (float): Timeout for acquiring a connection from pool
+            record_path (str, optional): Append every exchange to this trace file
+            replay_path (str, optional): Serve requests from this trace file instead of Ollama
+            replay_speed (float): Replay speed factor; 0 replays without delays
+            semantic_cache (SemanticCache, optional): Answer similar generate/chat
+                prompts from earlier responses
+            rate_limit_store (RateLimitStore, optional): Share rate limit buckets with other
+                clients and workers. Defaults to the table at Config.RATE_LIMIT_SHARED_PATH, if set.
+            cost_model (CostModel, optional): Charge generate/chat requests by estimated work
+                instead of 1 each. Defaults to CostModel() if Config.RATE_LIMIT_COST_WEIGHTED.
         """
         self.base_url = base_url or Config.OLLAMA_API_URL
+        # unix:// base URLs are served over a Unix domain socket
+        self.api_url, self.socket_path = parse_base_url(self.base_url)
         self.use_mock = use_mock if use_mock is not None else os.getenv('USE_MOCK_OLLAMA', '').lower() == 'true'
         self.session = None
         self.max_retries = max_retries
         self.retry_delay = retry_delay
-        self.rate_limiter = RateLimiter()
+        if rate_limit_store is None and Config.RATE_LIMIT_SHARED_PATH:
+            rate_limit_store = shared_store(Config.RATE_LIMIT_SHARED_PATH)
+        self.rate_limiter = RateLimiter(rate_limit_store, namespace=self.base_url)
+        self.recorder = shared_recorder(record_path) if record_path else None
+        self.replayer = TraceReplayer(replay_path, replay_speed) if replay_path else None
+        self.tool_executor = ToolExecutor()
+        self.semantic_cache = semantic_cache
+        if cost_model is None and Config.RATE_LIMIT_COST_WEIGHTED:
+            cost_model = CostModel()
+        self.cost_model = cost_model
 
         # Connection pool settings
         self.pool_connections = pool_connections
@@ -66,6 +102,8 @@ class AsyncOllamaClient:
 
         if self.use_mock:
             logger.info("Using mock Ollama server for development/testing")
+            # Imported on demand; production clients never load the mock
+            from .mock_server import MockOllamaServer
             self.mock_server = MockOllamaServer()
             self.mock_server.list_models()
         logger.info(f"Initialized Async Ollama client with base URL: {self.base_url}")
@@ -79,14 +117,21 @@ class AsyncOllamaClient:
         self.rate_limiter.get_bucket(Config.VERSION_ENDPOINT, requests_per_second * 2, capacity * 2)
         self.rate_limiter.get_bucket(Config.LIST_MODELS_ENDPOINT, requests_per_second * 2, capacity * 2)
 
-    async def __aenter__(self):
-        """Create session for async context manager with connection pooling"""
-        if not self.use_mock:
-            conn = aiohttp.TCPConnector(
-                limit=self.pool_connections,
-                ttl_dns_cache=300,
-                keepalive_timeout=self.pool_keepalive
-            )
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on the running loop if needed"""
+        if self.session is None or self.session.closed:
+            if self.socket_path:
+                conn = aiohttp.UnixConnector(
+                    path=self.socket_path,
+                    limit=self.pool_connections,
+                    keepalive_timeout=self.pool_keepalive
+                )
+            else:
+                conn = aiohttp.TCPConnector(
+                    limit=self.pool_connections,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=self.pool_keepalive
+                )
             timeout = aiohttp.ClientTimeout(
                 total=self.pool_timeout,
                 connect=self.pool_timeout
@@ -97,23 +142,39 @@ class AsyncOllamaClient:
                 timeout=timeout
             )
             logger.debug(f"Created connection pool with {self.pool_connections} connections")
+        return self.session
+
+    async def __aenter__(self):
+        """Create session for async context manager with connection pooling"""
+        if not self.use_mock:
+            self._get_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Cleanup session and connection pool"""
+        await self.close()
+
+    async def close(self):
+        """Explicitly close the session and its connection pool"""
         if self.session:
             try:
                 await self.session.close()
                 logger.debug("Closed connection pool and cleaned up resources")
             except Exception as e:
                 logger.error(f"Error closing session: {str(e)}")
+            self.session = None
+        self.tool_executor.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     async def _handle_mock_request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        stream: bool = False
+        stream: bool = False,
+        content: Optional[Any] = None
     ) -> Union[Dict[str, Any], AsyncGenerator[Dict[str, Any], None]]:
         """Handle requests in mock mode"""
         if not data:
@@ -142,8 +203,33 @@ class AsyncOllamaClient:
                 data.get('model', ''),
                 data.get('prompt', '')
             )
+        elif endpoint == Config.EMBED_ENDPOINT:
+            inputs = data.get('input', [])
+            return self.mock_server.embed(
+                data.get('model', ''),
+                [inputs] if isinstance(inputs, str) else inputs
+            )
         elif endpoint == Config.VERSION_ENDPOINT:
             return self.mock_server.get_version()
+        elif endpoint == Config.PULL_MODEL_ENDPOINT:
+            mock_response = self.mock_server.pull_model(data.get('name', ''), stream=stream)
+        elif endpoint == Config.PUSH_MODEL_ENDPOINT:
+            mock_response = self.mock_server.push_model(data.get('name', ''), stream=stream)
+        elif endpoint == Config.COPY_MODEL_ENDPOINT:
+            return self.mock_server.copy_model(data.get('source', ''), data.get('destination', ''))
+        elif endpoint == Config.DELETE_MODEL_ENDPOINT:
+            return self.mock_server.delete_model(data.get('name', ''))
+        elif endpoint == Config.RUNNING_MODELS_ENDPOINT:
+            return {"models": []}
+        elif endpoint.startswith(f"{Config.BLOBS_ENDPOINT}/"):
+            digest = endpoint[len(Config.BLOBS_ENDPOINT) + 1:]
+            if method == "HEAD":
+                if not self.mock_server.blob_exists(digest):
+                    raise OllamaRequestError(f"Blob {digest} not found", status_code=404)
+                return {"status": "success"}
+            if hasattr(content, "__aiter__"):
+                content = [chunk async for chunk in content]
+            return self.mock_server.create_blob(digest, content)
         else:
             raise OllamaRequestError(f"Mock server does not support endpoint: {endpoint}")
 
@@ -164,45 +250,115 @@ class AsyncOllamaClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         stream: bool = False,
-        timeout: int = Config.DEFAULT_TIMEOUT
+        timeout: int = Config.DEFAULT_TIMEOUT,
+        content: Optional[Any] = None,
+        rate_limit_key: Optional[str] = None
+    ) -> Union[Dict[str, Any], AsyncGenerator[Dict[str, Any], None]]:
+        """Make a request, recording it or answering it from a trace when configured"""
+        if self.replayer is not None:
+            return await self.replayer.areplay(method, endpoint, data, stream)
+        if self.recorder is None:
+            return await self._send_request(method, endpoint, data, stream, timeout, content, rate_limit_key)
+
+        started = time.monotonic()
+        try:
+            response = await self._send_request(method, endpoint, data, stream, timeout, content, rate_limit_key)
+        except OllamaRequestError as e:
+            self.recorder.record(method, endpoint, data, started, error=e)
+            raise
+        if stream:
+            return self.recorder.wrap_async_stream(method, endpoint, data, started, response)
+        self.recorder.record(method, endpoint, data, started, response=response)
+        return response
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        timeout: int = Config.DEFAULT_TIMEOUT,
+        content: Optional[Any] = None,
+        rate_limit_key: Optional[str] = None
     ) -> Union[Dict[str, Any], AsyncGenerator[Dict[str, Any], None]]:
-        """Make async HTTP request to Ollama API with proper error handling and retries"""
+        """Make async HTTP request to Ollama API with proper error handling and retries
+        Args:
+            content: Raw request body (bytes or async iterable of byte chunks)
+                sent instead of a JSON payload. Streamed bodies are not retried.
+            rate_limit_key (str, optional): Rate limiter key. Defaults to the endpoint
+        """
         if self.use_mock:
-            return await self._handle_mock_request(method, endpoint, data, stream)
+            return await self._handle_mock_request(method, endpoint, data, stream, content)
 
         # Apply rate limiting
-        await self.rate_limiter.acquire(endpoint)
+        rate_limit_key = rate_limit_key or endpoint
+        charged = await self._charge(rate_limit_key, endpoint, data)
 
         retry_count = 0
         last_error = None
+        # A streamed body is consumed by the first attempt and cannot be replayed
+        max_retries = 0 if content is not None and not isinstance(content, bytes) else self.max_retries
+        headers = {"Content-Type": "application/octet-stream"} if content is not None else None
 
-        while retry_count <= self.max_retries:
+        while retry_count <= max_retries:
             try:
-                if not self.session:
-                    self.session = aiohttp.ClientSession(headers=Config.DEFAULT_HEADERS)
-
-                url = f"{self.base_url}{endpoint}"
-                logger.debug(f"Making async {method} request to {url} (attempt {retry_count + 1})")
+                session = self._get_session()
+                url = f"{self.api_url}{endpoint}"
+                logger.debug("Making async %s request to %s (attempt %d)", method, url, retry_count + 1)
 
                 if data:
-                    logger.debug(f"Request data: {json.dumps(data, indent=2)}")
+                    logger.debug("Request data: %s", LazyJSON(data))
+
+                if stream:
+                    # Streaming responses outlive this call, so they are not
+                    # bound to a context manager; _stream_response closes them.
+                    response = await session.request(
+                        method=method,
+                        url=url,
+                        json=data,
+                        timeout=aiohttp.ClientTimeout(total=None, sock_read=timeout)
+                    )
+                    if response.status >= 400:
+                        try:
+                            await self._raise_for_status(response)
+                        finally:
+                            response.release()
+                    return self._settle_stream(rate_limit_key, charged, self._stream_response(response))
 
-                async with self.session.request(
+                # Uploads take as long as their size demands; only stalls time out
+                if content is not None:
+                    request_timeout = aiohttp.ClientTimeout(total=None, sock_read=timeout)
+                else:
+                    request_timeout = aiohttp.ClientTimeout(total=timeout)
+                async with session.request(
                     method=method,
                     url=url,
                     json=data,
-                    timeout=aiohttp.ClientTimeout(total=timeout)
+                    data=content,
+                    headers=headers,
+                    timeout=request_timeout
                 ) as response:
-                    if stream:
-                        return self._stream_response(response)
-
                     if response.status >= 400:
-                        error_data = await response.json()
-                        error_msg = error_data.get("error", f"HTTP {response.status} error occurred")
-                        raise OllamaRequestError(error_msg, status_code=response.status)
+                        await self._raise_for_status(response)
 
-                    return await response.json()
+                    body = await response.read()
+                    if not body:
+                        return {"status": "success"}
+                    try:
+                        result = json.loads(body)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Failed to parse response JSON: {str(e)}")
+                        raise OllamaResponseError(f"Failed to parse response JSON: {str(e)}")
+                    self._settle(rate_limit_key, charged, result)
+                    return result
 
+            except OllamaResponseError:
+                raise
+            except OllamaRequestError as e:
+                # Client errors will not succeed on retry
+                if e.status_code and e.status_code < 500:
+                    raise
+                last_error = e
             except asyncio.TimeoutError as e:
                 last_error = OllamaTimeoutError(
                     f"Request to {url} timed out after {timeout} seconds. "
@@ -219,28 +375,123 @@ class AsyncOllamaClient:
                 last_error = OllamaRequestError(f"Unexpected error: {str(e)}")
 
             retry_count += 1
-            if retry_count <= self.max_retries:
+            if retry_count <= max_retries:
                 wait_time = self.retry_delay * (2 ** (retry_count - 1))  # Exponential backoff
                 logger.warning(f"Request failed, retrying in {wait_time:.2f} seconds...")
                 await asyncio.sleep(wait_time)
             else:
-                logger.error(f"Request failed after {self.max_retries} retries")
+                logger.error(f"Request failed after {max_retries} retries")
                 raise last_error
 
+    async def _charge(self, key: str, endpoint: str, data: Optional[Dict[str, Any]]) -> float:
+        """Wait for the rate limiter, charging the request's estimated cost
+
+        The upfront charge is capped at the bucket capacity so that a large
+        request does not wait on an idle bucket; the rest is settled later.
+        """
+        cost = 1.0
+        if self.cost_model is not None:
+            cost = min(self.cost_model.estimate(endpoint, data), self.rate_limiter.get_bucket(key).capacity)
+        await self.rate_limiter.acquire(key, cost)
+        return cost
+
+    def _settle(self, key: str, charged: float, response: Dict[str, Any]) -> None:
+        """Settle a charge to the cost Ollama reported for the request"""
+        if self.cost_model is None:
+            return
+        actual = self.cost_model.actual(response)
+        if actual is not None:
+            self.rate_limiter.settle(key, actual - charged)
+
+    async def _settle_stream(
+        self,
+        key: str,
+        charged: float,
+        response: AsyncGenerator[Dict[str, Any], None]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Settle the charge of a streamed request from its final chunk"""
+        try:
+            async for chunk in response:
+                if chunk.get("done"):
+                    self._settle(key, charged, chunk)
+                yield chunk
+        finally:
+            await response.aclose()
+
+    @staticmethod
+    async def _raise_for_status(response: aiohttp.ClientResponse) -> None:
+        """Raise OllamaRequestError carrying Ollama's error message"""
+        error_msg = f"HTTP {response.status} error occurred"
+        try:
+            error_data = await response.json(content_type=None)
+            if isinstance(error_data, dict) and "error" in error_data:
+                error_msg = error_data["error"]
+        except (json.JSONDecodeError, aiohttp.ClientError, ValueError):
+            pass
+        raise OllamaRequestError(error_msg, status_code=response.status)
+
     async def _stream_response(self, response: aiohttp.ClientResponse) -> AsyncGenerator[Dict[str, Any], None]:
-        """Stream response from Ollama API with error handling"""
+        """Stream response from Ollama API with error handling
+
+        Closing the generator (aclose() or cancellation) closes the upstream
+        connection, which makes Ollama abandon the generation.
+        """
         try:
             async for line in response.content:
+                line = line.strip()
                 if line:
                     try:
                         json_response = json.loads(line.decode('utf-8'))
-                        yield json_response
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse JSON response: {str(e)}")
                         raise OllamaResponseError(f"Failed to parse JSON response: {str(e)}")
+                    yield json_response
+        except OllamaResponseError:
+            raise
         except Exception as e:
             logger.error(f"Error streaming response: {str(e)}")
             raise OllamaResponseError(f"Error streaming response: {str(e)}")
+        finally:
+            response.close()
+
+    async def _completion_request(
+        self,
+        endpoint: str,
+        data: Dict[str, Any],
+        stream: bool
+    ) -> Union[Dict[str, Any], AsyncGenerator[Dict[str, Any], None]]:
+        """POST a generate/chat request, answering it from the semantic cache if possible"""
+        cache = self.semantic_cache
+        key = cache.key(endpoint, data) if cache is not None else None
+        if key is None:
+            return await self._make_request("POST", endpoint, data=data, stream=stream)
+
+        namespace, text = key
+        try:
+            embedding = (await self.create_embedding(
+                EmbeddingRequest(model=cache.embedding_model, prompt=text)
+            )).embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache bypassed, embedding failed: {str(e)}")
+            return await self._make_request("POST", endpoint, data=data, stream=stream)
+
+        cached = cache.lookup(namespace, embedding)
+        if cached is not None:
+            return cache.as_async_stream(cached) if stream else cached
+        response = await self._make_request("POST", endpoint, data=data, stream=stream)
+        if stream:
+            return cache.wrap_async_stream(namespace, embedding, response)
+        cache.store(namespace, embedding, response)
+        return response
+
+    @staticmethod
+    async def _stream_models(response: AsyncGenerator[Dict[str, Any], None], model_cls) -> AsyncGenerator[Any, None]:
+        """Wrap a raw chunk stream in response models, propagating aclose() upstream"""
+        try:
+            async for chunk in response:
+                yield model_cls(**chunk)
+        finally:
+            await response.aclose()
 
     async def generate(
         self,
@@ -259,21 +510,16 @@ class AsyncOllamaClient:
             # Validate model name format
             request.model = validate_model_name(request.model)
 
-            stream = request.options.stream if request.options else True
-            response = await self._make_request(
-                "POST",
-                Config.GENERATE_ENDPOINT,
-                data=request.dict(exclude_none=True),
-                stream=stream
-            )
+            # Either the request or its legacy options.stream flag can disable streaming
+            stream = request.stream is not False and not (request.options and request.options.stream is False)
+            data = request.dict(exclude_none=True)
+            data['stream'] = stream
+            response = await self._completion_request(Config.GENERATE_ENDPOINT, data, stream)
 
             if not stream:
                 return GenerateResponse(**response)
 
-            async def response_generator():
-                async for chunk in response:
-                    yield GenerateResponse(**chunk)
-            return response_generator()
+            return self._stream_models(response, GenerateResponse)
 
         except Exception as e:
             logger.error(f"Generate request failed: {str(e)}")
@@ -299,25 +545,164 @@ class AsyncOllamaClient:
             request.model = validate_model_name(request.model)
 
             stream = request.stream if request.stream is not None else True
-            response = await self._make_request(
-                "POST",
-                Config.CHAT_ENDPOINT,
-                data=request.dict(exclude_none=True),
-                stream=stream
-            )
+            response = await self._completion_request(Config.CHAT_ENDPOINT, request.dict(exclude_none=True), stream)
 
             if not stream:
                 return ChatResponse(**response)
 
-            async def response_generator():
-                async for chunk in response:
-                    yield ChatResponse(**chunk)
-            return response_generator()
+            return self._stream_models(response, ChatResponse)
 
         except Exception as e:
             logger.error(f"Chat request failed: {str(e)}")
             raise
 
+    async def run_tools(
+        self,
+        request: ChatRequest,
+        tools: List[Union[Tool, Callable[..., Any]]],
+        max_rounds: int = Config.TOOL_MAX_ROUNDS,
+        on_response: Optional[Callable[[ChatResponse], None]] = None
+    ) -> Tuple[ChatResponse, List[Message]]:
+        """Chat with tools, executing each turn's tool calls concurrently
+        Args:
+            request (ChatRequest): Chat request; streaming is disabled for the loop
+            tools (List[Union[Tool, Callable]]): Tools or plain functions the model may call
+            max_rounds (int): Maximum number of model turns
+            on_response (Callable, optional): Called with every model turn's response,
+                e.g. to account its usage
+        Returns:
+            Tuple[ChatResponse, List[Message]]: Final response and the full transcript
+        """
+        return await arun_tool_loop(self, request, tools, self.tool_executor, max_rounds, on_response)
+
+    async def _complete(
+        self,
+        request: Union[GenerateRequest, ChatRequest]
+    ) -> Union[GenerateResponse, ChatResponse]:
+        """Run a generate or chat request to completion without streaming
+
+        Structured requests are streamed and validated so that invalid
+        output fails as soon as it appears, without retries.
+        """
+        if schema_from_format(request.format) is not None:
+            return await generate_structured(self, request, max_attempts=1)
+        request = request.model_copy(update={"stream": False})
+        if isinstance(request, ChatRequest):
+            return await self.chat(request)
+        return await self.generate(request)
+
+    async def as_completed(
+        self,
+        requests: Sequence[Union[GenerateRequest, ChatRequest]],
+        backends: Optional[Sequence["AsyncOllamaClient"]] = None
+    ) -> AsyncGenerator[Tuple[int, Union[GenerateResponse, ChatResponse, Exception]], None]:
+        """Run requests concurrently, yielding results as they finish
+        Args:
+            requests (Sequence[GenerateRequest | ChatRequest]): Requests to run
+            backends (Sequence[AsyncOllamaClient], optional): Client to run each
+                request on, in the same order. Defaults to this client for all.
+        Returns:
+            AsyncGenerator: ``(index, response or exception)`` in completion order.
+            Requests still running when the generator is closed are cancelled,
+            which drops their upstream connections and stops generation.
+        """
+        backends = list(backends) if backends is not None else [self] * len(requests)
+        if len(backends) != len(requests):
+            raise OllamaValidationError("backends must match requests one to one")
+        tasks = {
+            asyncio.ensure_future(backend._complete(req)): index
+            for index, (backend, req) in enumerate(zip(backends, requests))
+        }
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    error = task.exception()
+                    yield tasks[task], error if error is not None else task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fan_out(
+        self,
+        prompt: str,
+        models: Sequence[str],
+        system: Optional[str] = None,
+        options: Optional[ModelOptions] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> AsyncGenerator[Tuple[str, Union[GenerateResponse, Exception]], None]:
+        """Send one prompt to several models at once
+        Args:
+            prompt (str): Prompt for every model
+            models (Sequence[str]): Models to run
+            system (str, optional): System prompt
+            options (ModelOptions, optional): Options for every model
+            format (str | dict, optional): Structured output format
+        Returns:
+            AsyncGenerator: ``(model, response or exception)`` as each model finishes
+        """
+        requests = [
+            GenerateRequest(model=model, prompt=prompt, system=system, options=options, format=format)
+            for model in models
+        ]
+        results = self.as_completed(requests)
+        try:
+            async for index, result in results:
+                yield models[index], result
+        finally:
+            await results.aclose()
+
+    async def race(
+        self,
+        requests: Sequence[Union[GenerateRequest, ChatRequest]],
+        policy: str = "first_complete",
+        validator: Optional[Callable[[Union[GenerateResponse, ChatResponse]], bool]] = None,
+        backends: Optional[Sequence["AsyncOllamaClient"]] = None,
+        on_response: Optional[Callable[[Union[GenerateResponse, ChatResponse]], None]] = None
+    ) -> Tuple[int, Union[GenerateResponse, ChatResponse]]:
+        """Run requests concurrently and keep the first acceptable response
+
+        The remaining requests are cancelled as soon as there is a winner.
+        Args:
+            requests (Sequence[GenerateRequest | ChatRequest]): Competing requests
+            policy (str): ``first_complete`` accepts the first response without
+                an error. ``first_valid`` also requires ``validator`` to accept
+                it; by default a response is valid if its output is not empty.
+                Structured requests must match their ``format`` under either policy.
+            validator (Callable, optional): Predicate for ``first_valid``
+            backends (Sequence[AsyncOllamaClient], optional): See as_completed
+            on_response (Callable, optional): Called with every completed response,
+                including rejected ones, e.g. to account their usage
+        Returns:
+            Tuple[int, GenerateResponse | ChatResponse]: Winning index and response
+        """
+        if policy not in RACE_POLICIES:
+            raise OllamaValidationError(f"Unknown race policy {policy!r}; expected one of {', '.join(RACE_POLICIES)}")
+        if not requests:
+            raise OllamaValidationError("At least one request is required")
+        if policy == "first_valid" and validator is None:
+            validator = lambda response: bool(response_text(response).strip())
+
+        failures = []
+        results = self.as_completed(requests, backends)
+        try:
+            async for index, result in results:
+                if isinstance(result, Exception):
+                    failures.append(f"{requests[index].model}: {str(result)}")
+                    continue
+                if on_response is not None:
+                    on_response(result)
+                if policy == "first_valid" and not validator(result):
+                    failures.append(f"{requests[index].model}: rejected by validator")
+                else:
+                    logger.debug(f"Race won by request {index} ({requests[index].model})")
+                    return index, result
+        finally:
+            await results.aclose()
+        raise OllamaResponseError(f"No request produced an acceptable response ({'; '.join(failures)})")
+
     async def create_model(
         self,
         request: CreateModelRequest
@@ -348,28 +733,59 @@ class AsyncOllamaClient:
             if not stream:
                 return ModelResponse(**response)
 
-            async def response_generator():
-                async for chunk in response:
-                    yield ModelResponse(**chunk)
-            return response_generator()
+            return self._stream_models(response, ModelResponse)
 
         except Exception as e:
             logger.error(f"Create model request failed: {str(e)}")
             raise
 
+    async def pull_model(
+        self,
+        model_name: str,
+        stream: bool = True,
+        insecure: Optional[bool] = None
+    ) -> Union[ModelResponse, AsyncGenerator[ModelResponse, None]]:
+        """Pull a model asynchronously
+        Args:
+            model_name (str): Name of the model to pull
+            stream (bool): Stream per-layer progress updates
+            insecure (bool, optional): Allow insecure connections to the registry
+        Returns:
+            Union[ModelResponse, AsyncGenerator[ModelResponse, None]]: Pull status
+        """
+        try:
+            if not model_name:
+                raise OllamaValidationError("Model name is required")
+
+            # Validate model name format
+            model_name = validate_model_name(model_name)
+
+            data = {"name": model_name, "stream": stream}
+            if insecure is not None:
+                data["insecure"] = insecure
+            response = await self._make_request(
+                "POST",
+                Config.PULL_MODEL_ENDPOINT,
+                data=data,
+                stream=stream,
+                timeout=Config.PULL_READ_TIMEOUT
+            )
+
+            if not stream:
+                return ModelResponse(**response)
+            return self._stream_models(response, ModelResponse)
+
+        except Exception as e:
+            logger.error(f"Pull model request failed: {str(e)}")
+            raise
+
     async def list_models(self) -> Dict[str, Any]:
         """List available models asynchronously"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/models") as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to fetch models: {response.status}")
-                        return {"models": []}
-                    
-                    data = await response.json()
-                    models = data.get("models", [])
-                    logger.info(f"List models: {len(models)}")
-                    return {"models": models}
+            response = await self._make_request("GET", Config.LIST_MODELS_ENDPOINT)
+            models = response.get("models", [])
+            logger.info(f"List models: {len(models)}")
+            return {"models": models}
         except Exception as e:
             logger.error(f"List models request failed: {str(e)}")
             raise
@@ -390,15 +806,12 @@ class AsyncOllamaClient:
             logger.error(f"Version request failed: {str(e)}")
             raise
 
-    async def embeddings(
-        self,
-        request: EmbeddingRequest
-    ) -> Union[EmbeddingResponse, AsyncGenerator[EmbeddingResponse, None]]:
+    async def create_embedding(self, request: EmbeddingRequest) -> EmbeddingResponse:
         """Generate embeddings using Ollama API asynchronously
         Args:
-            request (EmbeddingRequest): Request parameters for embedding generation
+            request (EmbeddingRequest): Embedding generation parameters
         Returns:
-            Union[EmbeddingResponse, AsyncGenerator[EmbeddingResponse, None]]: Embedding response
+            EmbeddingResponse: Generated embeddings
         """
         try:
             if not request.model:
@@ -409,31 +822,206 @@ class AsyncOllamaClient:
             # Validate model name format
             request.model = validate_model_name(request.model)
 
-            stream = request.stream if request.stream is not None else False
             response = await self._make_request(
                 "POST",
                 Config.EMBEDDINGS_ENDPOINT,
-                data=request.dict(exclude_none=True),
-                stream=stream
+                data=request.dict(exclude_none=True)
             )
+            return EmbeddingResponse(**response)
+        except Exception as e:
+            logger.error(f"Create embedding request failed: {str(e)}")
+            raise
 
-            if not stream:
-                return EmbeddingResponse(**response)
+    async def embed(
+        self,
+        model: str,
+        inputs: List[str],
+        options: Optional[Dict[str, Any]] = None,
+        truncate: Optional[bool] = None
+    ) -> List[List[float]]:
+        """Generate embeddings for several inputs in one request
+        Args:
+            model (str): Embedding model name
+            inputs (List[str]): Texts to embed
+            options (dict, optional): Model options
+            truncate (bool, optional): Truncate inputs that exceed the context length
+        Returns:
+            List[List[float]]: One embedding per input, in input order
+        """
+        try:
+            if not model:
+                raise OllamaValidationError("Model name is required")
+            if not inputs:
+                raise OllamaValidationError("Input is required")
 
-            async def response_generator():
-                async for chunk in response:
-                    yield EmbeddingResponse(**chunk)
-            return response_generator()
+            data: Dict[str, Any] = {"model": validate_model_name(model), "input": list(inputs)}
+            if options:
+                data["options"] = options
+            if truncate is not None:
+                data["truncate"] = truncate
+            response = await self._make_request("POST", Config.EMBED_ENDPOINT, data=data)
 
+            embeddings = response.get("embeddings") or []
+            if len(embeddings) != len(inputs):
+                raise OllamaResponseError(
+                    f"Expected {len(inputs)} embeddings, got {len(embeddings)}"
+                )
+            return embeddings
         except Exception as e:
-            logger.error(f"Embeddings request failed: {str(e)}")
+            logger.error(f"Embed request failed: {str(e)}")
             raise
 
-    async def show_model(self, model_name: str) -> Dict[str, Any]:
-        """Show details for a specific model asynchronously"""
+    async def embeddings(self, request: EmbeddingRequest) -> EmbeddingResponse:
+        """Alias of create_embedding kept for backwards compatibility"""
+        return await self.create_embedding(request)
+
+    async def show_model(self, model_name: str, verbose: Optional[bool] = None) -> Dict[str, Any]:
+        """Show details for a specific model asynchronously
+        Args:
+            model_name (str): Name of the model
+            verbose (bool, optional): Include full tensor and tokenizer details
+        Returns:
+            Dict[str, Any]: Model information
+        """
         try:
+            if not model_name:
+                raise OllamaValidationError("Model name is required")
+
+            # Validate model name format
             model_name = validate_model_name(model_name)
-            return await self._make_request("GET", f"{Config.SHOW_MODEL_ENDPOINT}/{model_name}")
+
+            data: Dict[str, Any] = {"name": model_name}
+            if verbose is not None:
+                data["verbose"] = verbose
+            return await self._make_request("POST", Config.SHOW_MODEL_ENDPOINT, data=data)
         except Exception as e:
             logger.error(f"Show model request failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def copy_model(self, source: str, destination: str) -> ModelResponse:
+        """Copy a model asynchronously"""
+        try:
+            if not source or not destination:
+                raise OllamaValidationError("Source and destination model names are required")
+
+            # Validate model names format
+            source = validate_model_name(source)
+            destination = validate_model_name(destination)
+
+            response = await self._make_request(
+                "POST",
+                Config.COPY_MODEL_ENDPOINT,
+                data={"source": source, "destination": destination}
+            )
+            return ModelResponse(**response)
+        except Exception as e:
+            logger.error(f"Copy model request failed: {str(e)}")
+            raise
+
+    async def delete_model(self, model_name: str) -> ModelResponse:
+        """Delete a model asynchronously"""
+        try:
+            if not model_name:
+                raise OllamaValidationError("Model name is required")
+
+            # Validate model name format
+            model_name = validate_model_name(model_name)
+
+            response = await self._make_request(
+                "DELETE",
+                Config.DELETE_MODEL_ENDPOINT,
+                data={"name": model_name}
+            )
+            return ModelResponse(**response)
+        except Exception as e:
+            logger.error(f"Delete model request failed: {str(e)}")
+            raise
+
+    async def push_model(
+        self,
+        model_name: str,
+        stream: bool = True,
+        insecure: Optional[bool] = None
+    ) -> Union[ModelResponse, AsyncGenerator[ModelResponse, None]]:
+        """Push a model asynchronously
+        Args:
+            model_name (str): Name of the model to push
+            stream (bool): Stream per-layer progress updates
+            insecure (bool, optional): Allow insecure connections to the registry
+        Returns:
+            Union[ModelResponse, AsyncGenerator[ModelResponse, None]]: Push status
+        """
+        try:
+            if not model_name:
+                raise OllamaValidationError("Model name is required")
+
+            # Validate model name format
+            model_name = validate_model_name(model_name)
+
+            data = {"name": model_name, "stream": stream}
+            if insecure is not None:
+                data["insecure"] = insecure
+            response = await self._make_request(
+                "POST",
+                Config.PUSH_MODEL_ENDPOINT,
+                data=data,
+                stream=stream,
+                timeout=Config.PULL_READ_TIMEOUT
+            )
+
+            if not stream:
+                return ModelResponse(**response)
+            return self._stream_models(response, ModelResponse)
+
+        except Exception as e:
+            logger.error(f"Push model request failed: {str(e)}")
+            raise
+
+    async def blob_exists(self, digest: str) -> bool:
+        """Check whether a blob is already present on the Ollama server
+        Args:
+            digest (str): Blob digest in ``sha256:<hex>`` form
+        Returns:
+            bool: True if the server already has the blob
+        """
+        digest = validate_blob_digest(digest)
+        try:
+            await self._make_request(
+                "HEAD",
+                f"{Config.BLOBS_ENDPOINT}/{digest}",
+                rate_limit_key=Config.BLOBS_ENDPOINT
+            )
+            return True
+        except OllamaRequestError as e:
+            if e.status_code == 404:
+                return False
+            logger.error(f"Blob existence check failed: {str(e)}")
+            raise
+
+    async def upload_blob(
+        self,
+        digest: str,
+        content: Union[bytes, AsyncIterable[bytes]],
+        timeout: int = Config.BLOB_UPLOAD_TIMEOUT
+    ) -> Dict[str, Any]:
+        """Upload a model blob to the Ollama server
+        Args:
+            digest (str): Blob digest in ``sha256:<hex>`` form
+            content: Blob bytes or an async iterable of byte chunks. Iterables
+                are streamed with chunked transfer encoding.
+            timeout (int): Per-read timeout in seconds
+        Returns:
+            Dict[str, Any]: Upload status
+        """
+        try:
+            digest = validate_blob_digest(digest)
+            return await self._make_request(
+                "POST",
+                f"{Config.BLOBS_ENDPOINT}/{digest}",
+                content=content,
+                timeout=timeout,
+                rate_limit_key=Config.BLOBS_ENDPOINT
+            )
+        except Exception as e:
+            logger.error(f"Blob upload failed: {str(e)}")
+            raise
@@ -0,0 +1,92 @@
+"""Background event loop for driving the async client from synchronous code"""
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Generator, Optional, TypeVar
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """Run an asyncio event loop in a daemon thread
+
+    Long-lived async resources (pooled aiohttp sessions, background tasks) are
+    bound to the loop they were created on, so WSGI request threads submit
+    their coroutines here instead of spinning up a loop per request.
+    """
+
+    def __init__(self, name: str = "ollama-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, starting the thread on first use"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name=self.name,
+                    daemon=True
+                )
+                self._thread.start()
+                logger.debug(f"Started background event loop {self.name}")
+            return self._loop
+
+    def submit(self, coro: Awaitable[T]) -> "asyncio.Future[T]":
+        """Schedule a coroutine on the loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and block until it completes
+        Args:
+            coro (Awaitable): Coroutine to run
+            timeout (float, optional): Seconds to wait before cancelling it
+        Returns:
+            The coroutine's result
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator[T]) -> Generator[T, None, None]:
+        """Iterate an async generator from synchronous code
+
+        Closing the returned generator (for example when a WSGI server drops a
+        disconnected client) closes the async generator on the loop as well, so
+        upstream HTTP responses are released immediately.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(agen, "aclose", None)
+            if aclose is not None and not self.loop.is_closed():
+                try:
+                    self.run(aclose(), timeout=5)
+                except Exception as e:
+                    logger.debug(f"Error closing async stream: {str(e)}")
+
+    def stop(self) -> None:
+        """Stop the loop and wait for the thread to exit"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
@@ -0,0 +1,339 @@
+"""Bulk generation job runner with bounded concurrency and checkpointing"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from .async_client import AsyncOllamaClient
+from .config import Config
+from .exceptions import OllamaValidationError
+from .logger import setup_logger
+from .models import GenerateRequest, GenerateResponse
+
+logger = setup_logger(__name__)
+
+BatchItem = Union[str, Dict[str, Any], GenerateRequest]
+
+
+class BatchCheckpoint:
+    """Compact record of which input records have completed
+
+    Completed indices are stored as a low watermark (every index below it is
+    done) plus the sparse set of finished indices above it, together with the
+    byte offset of the output file at save time. On resume, output lines
+    written after that offset are replayed so no finished work is repeated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark = 0
+        self.done: Set[int] = set()
+        self.offset = 0
+        self.completed = 0
+        self.failed = 0
+
+    def load(self) -> bool:
+        """Load checkpoint state from disk
+        Returns:
+            bool: True if a checkpoint existed
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.watermark = state.get("watermark", 0)
+        self.done = set(state.get("done", []))
+        self.offset = state.get("offset", 0)
+        self.completed = state.get("completed", 0)
+        self.failed = state.get("failed", 0)
+        return True
+
+    def save(self) -> None:
+        """Atomically write checkpoint state to disk"""
+        state = {
+            "watermark": self.watermark,
+            "done": sorted(self.done),
+            "offset": self.offset,
+            "completed": self.completed,
+            "failed": self.failed,
+            "updated_at": time.time(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark_done(self, index: int) -> None:
+        if self.is_done(index):
+            return
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.discard(self.watermark)
+            self.watermark += 1
+
+
+class BatchRunner:
+    """Run generate requests from a JSONL file or iterator through AsyncOllamaClient
+
+    Results are appended to an output JSONL file as they complete (in completion
+    order, each tagged with its input ``index``). Progress is checkpointed so an
+    interrupted job resumes where it stopped. Failed records, including
+    malformed input lines, are written with an ``error`` field and retried on
+    the next run, which first drops their error lines from the output.
+
+    File I/O (the checkpoint, output writes and fsyncs, and reading a source
+    file) runs in worker threads, so the event loop stays free for other
+    requests while a job runs.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOllamaClient,
+        output_path: str,
+        checkpoint_path: Optional[str] = None,
+        concurrency: int = Config.BATCH_CONCURRENCY,
+        checkpoint_every: int = 50,
+        defaults: Optional[Dict[str, Any]] = None,
+        on_response: Optional[Callable[[GenerateResponse], None]] = None
+    ):
+        """Initialize batch runner
+        Args:
+            client (AsyncOllamaClient): Client used to run the requests
+            output_path (str): JSONL file results are appended to
+            checkpoint_path (str, optional): Checkpoint file. Defaults to output_path + ".ckpt"
+            concurrency (int): Maximum number of in-flight requests
+            checkpoint_every (int): Save the checkpoint after this many completions
+            defaults (dict, optional): Fields merged into every record (e.g. model, options)
+            on_response (Callable, optional): Called with every record's response,
+                e.g. to account its usage
+        """
+        if concurrency < 1:
+            raise OllamaValidationError("Batch concurrency must be at least 1")
+        self.client = client
+        self.output_path = output_path
+        self.checkpoint = BatchCheckpoint(checkpoint_path or f"{output_path}.ckpt")
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.defaults = defaults or {}
+        self.on_response = on_response
+        self.state = "pending"
+        self.submitted = 0
+        self.skipped = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._since_checkpoint = 0
+        self._output = None
+        # Orders output writes and checkpoint saves made from worker threads
+        self._io_lock = threading.RLock()
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Current job progress"""
+        return {
+            "state": self.state,
+            "output_path": self.output_path,
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "completed": self.checkpoint.completed,
+            "failed": self.checkpoint.failed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    async def run(self, source: Union[str, Iterable[BatchItem]]) -> Dict[str, Any]:
+        """Run every record of the source that has not completed yet
+        Args:
+            source (str | Iterable): Path to a JSONL file, or an iterable of prompts,
+                dicts of GenerateRequest fields, or GenerateRequest objects
+        Returns:
+            Dict[str, Any]: Final job status
+        """
+        self.state = "running"
+        self.started_at = time.time()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = []
+        try:
+            await asyncio.to_thread(self._resume)
+            self._output = await asyncio.to_thread(open, self.output_path, "a", encoding="utf-8")
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+            async for index, item in self._read_source(source):
+                if self.checkpoint.is_done(index):
+                    self.skipped += 1
+                    continue
+                await queue.put((index, item))
+                self.submitted += 1
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            self.state = "completed"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Batch job failed: {str(e)}")
+            self.state = "failed"
+            self.error = str(e)
+            raise
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await asyncio.to_thread(self._close_output)
+            self.finished_at = time.time()
+        return self.status
+
+    def _resume(self) -> None:
+        """Restore progress from the checkpoint and any output written after it"""
+        if self.checkpoint.load():
+            logger.info(
+                f"Resuming batch job from checkpoint: {self.checkpoint.completed} completed"
+            )
+        if not os.path.exists(self.output_path):
+            self.checkpoint.offset = 0
+            return
+
+        with open(self.output_path, "rb+") as f:
+            f.seek(self.checkpoint.offset)
+            valid_end = self.checkpoint.offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crash; truncated below
+                valid_end += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" in record:
+                    self.checkpoint.failed += 1
+                else:
+                    self.checkpoint.mark_done(record["index"])
+                    self.checkpoint.completed += 1
+            f.truncate(valid_end)
+        self.checkpoint.offset = valid_end
+        if self.checkpoint.failed:
+            self._drop_failures()
+
+    def _drop_failures(self) -> None:
+        """Rewrite the output without error lines; their records are retried"""
+        tmp_path = f"{self.output_path}.tmp"
+        with open(self.output_path, "rb") as src, open(tmp_path, "wb") as dst:
+            for line in src:
+                try:
+                    if "error" in json.loads(line):
+                        continue
+                except json.JSONDecodeError:
+                    continue
+                dst.write(line)
+            dst.flush()
+            os.fsync(dst.fileno())
+            self.checkpoint.offset = dst.tell()
+        os.replace(tmp_path, self.output_path)
+        logger.info(f"Retrying {self.checkpoint.failed} failed batch records")
+        self.checkpoint.failed = 0
+        self.checkpoint.save()
+
+    async def _read_source(self, source: Union[str, Iterable[BatchItem]]) -> AsyncIterator[Tuple[int, BatchItem]]:
+        """Yield source records, reading a source file in blocks off the event loop"""
+        records = self._iter_source(source)
+        if not isinstance(source, str):
+            for record in records:
+                yield record
+            return
+        try:
+            while True:
+                block = await asyncio.to_thread(list, itertools.islice(records, 256))
+                if not block:
+                    return
+                for record in block:
+                    yield record
+        finally:
+            await asyncio.to_thread(records.close)
+
+    def _iter_source(self, source: Union[str, Iterable[BatchItem]]) -> Iterator[Tuple[int, BatchItem]]:
+        if isinstance(source, str):
+            with open(source, "r", encoding="utf-8") as f:
+                index = 0
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        # Recorded as a failure of this record, not of the job
+                        item = OllamaValidationError(f"Malformed JSON on input line {line_number}: {str(e)}")
+                    yield index, item
+                    index += 1
+        else:
+            yield from enumerate(source)
+
+    def _build_request(self, item: BatchItem) -> Tuple[Optional[Any], GenerateRequest]:
+        if isinstance(item, OllamaValidationError):
+            raise item
+        if isinstance(item, GenerateRequest):
+            return None, item.model_copy(update={"stream": False})
+        if isinstance(item, str):
+            item = {"prompt": item}
+        fields = {**self.defaults, **item}
+        record_id = fields.pop("id", None)
+        fields["stream"] = False
+        return record_id, GenerateRequest(**fields)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            index, item = job
+            record: Dict[str, Any] = {"index": index}
+            try:
+                record_id, request = self._build_request(item)
+                if record_id is not None:
+                    record["id"] = record_id
+                response = await self.client.generate(request)
+                if self.on_response is not None:
+                    self.on_response(response)
+                record.update(response.model_dump(exclude_none=True))
+            except Exception as e:
+                logger.error(f"Batch record {index} failed: {str(e)}")
+                record["error"] = str(e)
+            await asyncio.to_thread(self._write_result, index, json.dumps(record) + "\n", "error" not in record)
+
+    def _write_result(self, index: int, line: str, succeeded: bool) -> None:
+        with self._io_lock:
+            self._output.write(line)
+            if succeeded:
+                self.checkpoint.mark_done(index)
+                self.checkpoint.completed += 1
+            else:
+                self.checkpoint.failed += 1
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._save_checkpoint()
+
+    def _save_checkpoint(self) -> None:
+        # Output must hit disk before the checkpoint that references it
+        with self._io_lock:
+            if self._output is None or self._output.closed:
+                return
+            self._output.flush()
+            os.fsync(self._output.fileno())
+            self.checkpoint.offset = self._output.tell()
+            self.checkpoint.save()
+            self._since_checkpoint = 0
+
+    def _close_output(self) -> None:
+        with self._io_lock:
+            if self._output is None:
+                return
+            self._save_checkpoint()
+            self._output.close()
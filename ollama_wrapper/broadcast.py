@@ -0,0 +1,208 @@
+"""Stream broadcasting for Ollama API
+
+A Broadcast reads one upstream response stream in a background task and
+hands its chunks to any number of subscribers. A subscriber that attaches
+late first receives the chunks already produced, replayed from a ring
+buffer of ``buffer_size`` chunks, and then follows live. However many
+clients watch, the generation runs once upstream.
+
+The owner subscription, the one returned to the client that started the
+request, never loses chunks: the upstream is not read further while the
+owner is ``buffer_size`` chunks behind. Other subscribers that fall out of
+the buffer receive a ``{"stream_id", "skipped"}`` marker in place of the
+chunks they missed.
+
+Broadcasts belong to the tenant that started them and are only listed
+and returned to that tenant.
+
+The upstream stream is cancelled when its last subscriber leaves, or if no
+subscriber attaches within ``unwatched_timeout`` seconds. Finished
+broadcasts stay available for replay for ``retention`` seconds.
+
+All coroutines must run on the same event loop.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Tuple
+
+from .config import Config
+from .exceptions import OllamaResponseError
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class Broadcast:
+    """One upstream stream fanned out to subscribers"""
+
+    def __init__(self, stream_id: str, upstream: AsyncGenerator, buffer_size: int, tenant: str = ""):
+        self.stream_id = stream_id
+        self.tenant = tenant
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self.error: Optional[BaseException] = None
+        self._upstream = upstream
+        # (sequence number, chunk); the oldest chunks are dropped when full
+        self._buffer: Deque[Tuple[int, Any]] = deque(maxlen=buffer_size)
+        self._next_seq = 0
+        self._updated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watched = False
+        # Next chunk the owner reads; None once the owner has left
+        self._owner_seq: Optional[int] = 0
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest chunk still available for replay"""
+        return self._buffer[0][0] if self._buffer else self._next_seq
+
+    def start(self, unwatched_timeout: float) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._pump())
+        asyncio.get_running_loop().call_later(unwatched_timeout, self._cancel_if_unwatched)
+
+    async def subscribe(self, owner: bool = False) -> AsyncGenerator[Any, None]:
+        """Replay the buffered chunks, then follow the stream until it ends
+
+        Only the client that started the stream subscribes with ``owner``.
+        """
+        self.subscribers += 1
+        self._watched = True
+        seq = 0
+        try:
+            while True:
+                if seq < self.first_seq:
+                    # Only followers fall behind the buffer; the owner holds the pump back
+                    yield {"stream_id": self.stream_id, "skipped": self.first_seq - seq}
+                    seq = self.first_seq
+                if seq < self._next_seq:
+                    chunk = self._buffer[seq - self.first_seq][1]
+                    seq += 1
+                    if owner:
+                        self._owner_seq = seq
+                        self._notify()
+                    yield chunk
+                    continue
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._updated.wait()
+        finally:
+            self.subscribers -= 1
+            if owner:
+                # Followers alone do not hold the upstream back
+                self._owner_seq = None
+                self._notify()
+            if self.subscribers == 0 and not self.done:
+                logger.info(f"Last subscriber of stream {self.stream_id} left, cancelling upstream")
+                self.cancel()
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "stream_id": self.stream_id,
+            "subscribers": self.subscribers,
+            "chunks": self._next_seq,
+            "replayable_from": self.first_seq,
+            "done": self.done,
+            "created_at": self.created_at,
+        }
+
+    def _notify(self) -> None:
+        # Waiters hold the old event, which stays set; later waits use the new one
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def _cancel_if_unwatched(self) -> None:
+        if not self._watched and not self.done:
+            logger.info(f"Nobody attached to stream {self.stream_id}, cancelling upstream")
+            self.cancel()
+
+    async def _pump(self) -> None:
+        try:
+            async for chunk in self._upstream:
+                while self._owner_seq is not None and self._next_seq - self._owner_seq >= self._buffer.maxlen:
+                    await self._updated.wait()
+                self._buffer.append((self._next_seq, chunk))
+                self._next_seq += 1
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = OllamaResponseError(f"Stream {self.stream_id} was cancelled")
+        except Exception as e:
+            self.error = e
+        finally:
+            await self._upstream.aclose()
+            self.finished_at = time.time()
+            self._notify()
+
+
+class BroadcastHub:
+    """Registry of broadcasts by stream ID"""
+
+    def __init__(
+        self,
+        buffer_size: int = Config.BROADCAST_BUFFER_CHUNKS,
+        retention: float = Config.BROADCAST_RETENTION,
+        unwatched_timeout: float = Config.BROADCAST_UNWATCHED_TIMEOUT
+    ):
+        """Initialize broadcast hub
+        Args:
+            buffer_size (int): Chunks kept per stream for late subscribers
+            retention (float): Seconds a finished stream stays available for replay
+            unwatched_timeout (float): Seconds a new stream waits for its first subscriber
+        """
+        self.buffer_size = buffer_size
+        self.retention = retention
+        self.unwatched_timeout = unwatched_timeout
+        self._broadcasts: Dict[str, Broadcast] = {}
+        # get() and list() are called from request threads
+        self._lock = threading.Lock()
+
+    async def publish(self, upstream: AsyncGenerator, tenant: str = "") -> Broadcast:
+        """Start broadcasting an upstream stream of a tenant under a new stream ID
+
+        The caller reads the stream through ``subscribe(owner=True)``.
+        """
+        broadcast = Broadcast(uuid.uuid4().hex, upstream, self.buffer_size, tenant)
+        broadcast.start(self.unwatched_timeout)
+        with self._lock:
+            self._prune()
+            self._broadcasts[broadcast.stream_id] = broadcast
+        return broadcast
+
+    def get(self, stream_id: str, tenant: str = "") -> Optional[Broadcast]:
+        """Return a tenant's broadcast; other tenants' streams are not found"""
+        with self._lock:
+            self._prune()
+            broadcast = self._broadcasts.get(stream_id)
+        if broadcast is None or broadcast.tenant != tenant:
+            return None
+        return broadcast
+
+    def list(self, tenant: str = "") -> List[Dict[str, Any]]:
+        """Info on a tenant's broadcasts"""
+        with self._lock:
+            self._prune()
+            return [
+                broadcast.info() for broadcast in self._broadcasts.values()
+                if broadcast.tenant == tenant
+            ]
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for stream_id in [
+            stream_id for stream_id, broadcast in self._broadcasts.items()
+            if broadcast.done and broadcast.finished_at < cutoff
+        ]:
+            del self._broadcasts[stream_id]
@@ -0,0 +1,136 @@
+"""Cached model catalog for Ollama API"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .async_client import AsyncOllamaClient
+from .config import Config
+from .logger import setup_logger
+from .utils import validate_model_name
+
+logger = setup_logger(__name__)
+
+
+class ModelCatalog:
+    """In-memory cache of ``/api/tags`` and ``/api/show`` results
+
+    The model list is refreshed by a background task, so reads are served
+    from memory and do not wait on an Ollama server that is busy generating.
+    Model details are fetched once per model and kept until the model's
+    digest changes or it is invalidated. Operations that change the model
+    set (create, copy, delete, pull) call ``invalidate`` so the next read
+    fetches a fresh list. If a refresh fails, the last good list is served.
+
+    All coroutines must run on the same event loop; ``invalidate`` may be
+    called from any thread.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOllamaClient,
+        refresh_interval: float = Config.CATALOG_REFRESH_INTERVAL
+    ):
+        """Initialize model catalog
+        Args:
+            client (AsyncOllamaClient): Client used to fetch models
+            refresh_interval (float): Seconds between background refreshes
+        """
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self._models: List[Dict[str, Any]] = []
+        self._digests: Dict[str, Optional[str]] = {}
+        self._details: Dict[Tuple[str, bool], Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale = True
+        self._refreshing: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the model list was last refreshed"""
+        return time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+
+    async def list_models(self) -> Dict[str, Any]:
+        """Return the cached model list, refreshing it first if invalidated"""
+        self._ensure_refresher()
+        if self._stale:
+            try:
+                await self.refresh()
+            except Exception as e:
+                if self._loaded_at is None:
+                    raise
+                logger.warning(f"Model list refresh failed, serving cached list: {str(e)}")
+        return {"models": self._models}
+
+    async def show_model(self, model_name: str, verbose: bool = False) -> Dict[str, Any]:
+        """Return cached model details, fetching them on first use"""
+        key = (validate_model_name(model_name), bool(verbose))
+        details = self._details.get(key)
+        if details is None:
+            details = await self.client.show_model(key[0], verbose=verbose or None)
+            self._details[key] = details
+        return details
+
+    def invalidate(self, model_name: Optional[str] = None) -> None:
+        """Mark the model list stale and drop cached details
+        Args:
+            model_name (str, optional): Model whose details to drop. Defaults to all models.
+        """
+        self._stale = True
+        if model_name is None:
+            self._details.clear()
+            return
+        model_name = validate_model_name(model_name)
+        for key in [key for key in self._details if key[0] == model_name]:
+            self._details.pop(key, None)
+
+    async def refresh(self) -> None:
+        """Fetch the model list now; concurrent callers share one request"""
+        if self._refreshing is not None:
+            return await asyncio.shield(self._refreshing)
+        self._refreshing = asyncio.ensure_future(self._fetch())
+        try:
+            await asyncio.shield(self._refreshing)
+        finally:
+            self._refreshing = None
+
+    async def _fetch(self) -> None:
+        # Cleared before the request so an invalidation during it is not lost
+        self._stale = False
+        try:
+            response = await self.client.list_models()
+        except Exception:
+            self._stale = True
+            raise
+        models = response.get("models", [])
+        digests = {model.get("model") or model.get("name"): model.get("digest") for model in models}
+        # Details are only valid for the exact model version they were fetched for
+        for key in list(self._details):
+            name = key[0]
+            if name not in digests or digests[name] != self._digests.get(name, digests[name]):
+                self._details.pop(key, None)
+        self._models = models
+        self._digests = digests
+        self._loaded_at = time.monotonic()
+
+    def _ensure_refresher(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Background model list refresh failed: {str(e)}")
+
+    async def close(self) -> None:
+        """Stop the background refresh task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
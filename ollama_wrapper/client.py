@@ -1,11 +1,13 @@
 import requests
-from typing import Generator, Dict, Any, Optional, Union, List
+from typing import BinaryIO, Callable, Generator, Dict, Any, Iterable, Optional, Tuple, Union, List
 import os
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import Retry
+from urllib3.exceptions import EmptyPoolError
 from .config import Config
+from .cost import CostModel
 from .models import (
     GenerateRequest, GenerateResponse,
-    ChatRequest, ChatResponse,
+    ChatRequest, ChatResponse, Message,
     CreateModelRequest, ModelResponse,
     EmbeddingRequest, EmbeddingResponse
 )
@@ -15,12 +17,17 @@ from .exceptions import (
     OllamaTimeoutError,
     OllamaValidationError
 )
-from .logger import setup_logger
+from .logger import LazyJSON, setup_logger
 logger = setup_logger(__name__)
-from .utils import validate_model_name
-from .mock_server import MockOllamaServer
+from .utils import parse_base_url, validate_blob_digest, validate_model_name
 from .sync_rate_limiter import SyncRateLimiter
+from .pool import PooledHTTPAdapter
+from .rate_limit_store import RateLimitStore, shared_store
+from .replay import TraceReplayer, shared_recorder
+from .semantic_cache import SemanticCache
+from .tools import Tool, ToolExecutor, run_tool_loop
 import json
+import time
 
 
 class OllamaClient:
@@ -34,11 +41,20 @@ class OllamaClient:
         rate_limit_capacity: int = 10,
         pool_connections: int = 100,
         pool_maxsize: int = 100,
-        pool_keepalive: int = 30
+        pool_keepalive: int = 30,
+        pool_block: bool = Config.POOL_BLOCK,
+        pool_timeout: Optional[float] = Config.POOL_TIMEOUT,
+        record_path: Optional[str] = Config.TRACE_RECORD_PATH,
+        replay_path: Optional[str] = Config.TRACE_REPLAY_PATH,
+        replay_speed: float = Config.TRACE_REPLAY_SPEED,
+        semantic_cache: Optional[SemanticCache] = None,
+        rate_limit_store: Optional[RateLimitStore] = None,
+        cost_model: Optional[CostModel] = None
     ):
         """Initialize Ollama API client
         Args:
-            base_url (str, optional): Base URL for Ollama API. Defaults to Config.OLLAMA_API_URL.
+            base_url (str, optional): Base URL for Ollama API, or unix:///path/to/socket.
+                Defaults to Config.OLLAMA_API_URL.
             use_mock (bool, optional): Force use of mock server. Defaults to None (uses env var).
             max_retries (int): Maximum number of retry attempts
             retry_delay (float): Initial delay between retries
@@ -46,13 +62,44 @@ class OllamaClient:
             rate_limit_capacity (int): Maximum burst capacity
             pool_connections (int): Number of urllib3 connection pools to cache
             pool_maxsize (int): Maximum number of connections to save in the pool
-            pool_keepalive (int): Keep-alive timeout for pooled connections
+            pool_keepalive (int): Seconds an idle pooled connection is kept before it is closed
+            pool_block (bool): Never open more than pool_maxsize connections per host;
+                requests wait for a free connection instead
+            pool_timeout (float, optional): Seconds to wait for a free connection when
+                pool_block is set before failing with OllamaTimeoutError
+            record_path (str, optional): Append every exchange to this trace file
+            replay_path (str, optional): Serve requests from this trace file instead of Ollama
+            replay_speed (float): Replay speed factor; 0 replays without delays
+            semantic_cache (SemanticCache, optional): Answer similar generate/chat
+                prompts from earlier responses
+            rate_limit_store (RateLimitStore, optional): Share rate limit buckets with other
+                clients and workers. Defaults to the table at Config.RATE_LIMIT_SHARED_PATH, if set.
+            cost_model (CostModel, optional): Charge generate/chat requests by estimated work
+                instead of 1 each. Defaults to CostModel() if Config.RATE_LIMIT_COST_WEIGHTED.
         """
         self.base_url = base_url or Config.OLLAMA_API_URL
+        # unix:// base URLs are served over a Unix domain socket
+        self.api_url, self.socket_path = parse_base_url(self.base_url)
+        self.pool_timeout = pool_timeout
+        self.adapter: Optional[PooledHTTPAdapter] = None
         self.use_mock = use_mock if use_mock is not None else os.getenv('USE_MOCK_OLLAMA', '').lower() == 'true'
-
-        if self.use_mock:
+        self.recorder = shared_recorder(record_path) if record_path else None
+        self.replayer = TraceReplayer(replay_path, replay_speed) if replay_path else None
+        self.tool_executor = ToolExecutor()
+        self.semantic_cache = semantic_cache
+        if cost_model is None and Config.RATE_LIMIT_COST_WEIGHTED:
+            cost_model = CostModel()
+        self.cost_model = cost_model
+        if rate_limit_store is None and Config.RATE_LIMIT_SHARED_PATH:
+            rate_limit_store = shared_store(Config.RATE_LIMIT_SHARED_PATH)
+
+        if self.replayer is not None:
+            logger.info(f"Replaying recorded Ollama traffic at {replay_speed}x")
+            self.session = None
+        elif self.use_mock:
             logger.info("Using mock Ollama server for development/testing")
+            # Imported on demand; production clients never load the mock
+            from .mock_server import MockOllamaServer
             self.mock_server = MockOllamaServer()
             self.mock_server.list_models()
         else:
@@ -60,22 +107,29 @@ class OllamaClient:
             self.session = requests.Session()
 
             # Configure connection pooling
-            adapter = HTTPAdapter(
+            pool_options = dict(
                 pool_connections=pool_connections,
                 pool_maxsize=pool_maxsize,
-                pool_block=False,
+                pool_block=pool_block,
+                keepalive=pool_keepalive,
+                acquire_timeout=pool_timeout,
                 max_retries=Retry(
                     total=max_retries,
                     backoff_factor=retry_delay,
                     status_forcelist=[500, 502, 503, 504]
                 )
             )
-            self.session.mount('http://', adapter)
-            self.session.mount('https://', adapter)
+            if self.socket_path:
+                from .transport import UnixSocketAdapter
+                self.adapter = UnixSocketAdapter(self.socket_path, **pool_options)
+            else:
+                self.adapter = PooledHTTPAdapter(**pool_options)
+                self.session.mount('https://', self.adapter)
+            self.session.mount('http://', self.adapter)
             self.session.headers.update(Config.DEFAULT_HEADERS)
 
             # Initialize rate limiter
-            self.rate_limiter = SyncRateLimiter()
+            self.rate_limiter = SyncRateLimiter(rate_limit_store, namespace=self.base_url)
             self._configure_rate_limiters(rate_limit_requests, rate_limit_capacity)
 
         logger.info(f"Initialized Ollama client with base URL: {self.base_url}")
@@ -93,13 +147,32 @@ class OllamaClient:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit with proper cleanup"""
-        if not self.use_mock and self.session:
-            self.session.close()
+        self.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool metrics
+        Returns:
+            Dict[str, Any]: in_use and idle connections, counters of connections
+                created, discarded (returned to a full pool), reaped (idle past the
+                keep-alive), acquisitions and acquisition timeouts, and the average
+                and maximum wait for a connection in milliseconds
+        """
+        if self.adapter is None:
+            return {}
+        return self.adapter.stats()
+
+    def reap_idle_connections(self) -> int:
+        """Close pooled connections idle for longer than the keep-alive now"""
+        return self.adapter.reap_idle() if self.adapter is not None else 0
 
     def close(self):
         """Explicitly close the client and cleanup resources"""
         if not self.use_mock and self.session:
             self.session.close()
+        self.tool_executor.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def _make_request(
         self,
@@ -107,25 +180,62 @@ class OllamaClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         stream: bool = False,
-        timeout: int = Config.DEFAULT_TIMEOUT
+        timeout: int = Config.DEFAULT_TIMEOUT,
+        content: Optional[Any] = None,
+        rate_limit_key: Optional[str] = None
     ) -> Union[Dict[str, Any], Generator[Dict[str, Any], None, None]]:
-        """Make HTTP request to Ollama API with proper error handling"""
+        """Make a request, recording it or answering it from a trace when configured"""
+        if self.replayer is not None:
+            return self.replayer.replay(method, endpoint, data, stream)
+        if self.recorder is None:
+            return self._send_request(method, endpoint, data, stream, timeout, content, rate_limit_key)
+
+        started = time.monotonic()
+        try:
+            response = self._send_request(method, endpoint, data, stream, timeout, content, rate_limit_key)
+        except OllamaRequestError as e:
+            self.recorder.record(method, endpoint, data, started, error=e)
+            raise
+        if stream:
+            return self.recorder.wrap_stream(method, endpoint, data, started, response)
+        self.recorder.record(method, endpoint, data, started, response=response)
+        return response
+
+    def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        timeout: int = Config.DEFAULT_TIMEOUT,
+        content: Optional[Any] = None,
+        rate_limit_key: Optional[str] = None
+    ) -> Union[Dict[str, Any], Generator[Dict[str, Any], None, None]]:
+        """Make HTTP request to Ollama API with proper error handling
+        Args:
+            content: Raw request body (bytes, file object or iterable of byte
+                chunks) sent instead of a JSON payload; iterables are sent chunked
+            rate_limit_key (str, optional): Rate limiter key. Defaults to the endpoint
+        """
         if self.use_mock:
-            return self._handle_mock_request(method, endpoint, data, stream)
+            return self._handle_mock_request(method, endpoint, data, stream, content)
 
-        url = f"{self.base_url}{endpoint}"
+        url = f"{self.api_url}{endpoint}"
         response = None
 
         try:
-            self.rate_limiter.wait(endpoint)  
-            logger.debug(f"Making {method} request to {url}")
+            rate_limit_key = rate_limit_key or endpoint
+            charged = self._charge(rate_limit_key, endpoint, data)
+            logger.debug("Making %s request to %s", method, url)
             if data:
-                logger.debug(f"Request data: {json.dumps(data, indent=2)}")
+                logger.debug("Request data: %s", LazyJSON(data))
 
             response = self.session.request(
                 method=method,
                 url=url,
                 json=data,
+                data=content,
+                headers={"Content-Type": "application/octet-stream"} if content is not None else None,
                 stream=stream,
                 timeout=timeout
             )
@@ -133,14 +243,25 @@ class OllamaClient:
             response.raise_for_status()
 
             if stream:
-                return self._stream_response(response)
+                return self._settle_stream(rate_limit_key, charged, self._stream_response(response))
+
+            if not response.content:
+                return {"status": "success"}
 
             try:
-                return response.json()
+                result = response.json()
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse response JSON: {str(e)}")
                 raise OllamaResponseError(f"Failed to parse response JSON: {str(e)}")
+            self._settle(rate_limit_key, charged, result)
+            return result
 
+        except EmptyPoolError:
+            logger.error(f"No pooled connection became free within {self.pool_timeout} seconds")
+            raise OllamaTimeoutError(
+                f"Timed out after {self.pool_timeout} seconds waiting for a connection to {self.base_url}; "
+                "all pooled connections are in use."
+            )
         except requests.Timeout:
             logger.error(f"Request timed out after {timeout} seconds")
             raise OllamaTimeoutError(
@@ -156,10 +277,11 @@ class OllamaClient:
                 status_code=503
             )
         except requests.HTTPError as e:
-            status_code = response.status_code if response else None
+            # Response.__bool__ is False for error statuses, so compare to None
+            status_code = response.status_code if response is not None else None
             error_msg = f"HTTP {status_code} error occurred"
             try:
-                error_data = response.json() if response else None
+                error_data = response.json() if response is not None else None
                 if error_data and "error" in error_data:
                     error_msg = error_data["error"]
             except (json.JSONDecodeError, AttributeError):
@@ -170,26 +292,64 @@ class OllamaClient:
             logger.error(f"Unexpected error: {str(e)}")
             raise OllamaRequestError(f"Unexpected error: {str(e)}")
 
+    def _charge(self, key: str, endpoint: str, data: Optional[Dict[str, Any]]) -> float:
+        """Wait for the rate limiter, charging the request's estimated cost
+
+        The upfront charge is capped at the bucket capacity so that a large
+        request does not wait on an idle bucket; the rest is settled later.
+        """
+        cost = 1.0
+        if self.cost_model is not None:
+            cost = min(self.cost_model.estimate(endpoint, data), self.rate_limiter.get_bucket(key).capacity)
+        self.rate_limiter.wait(key, cost)
+        return cost
+
+    def _settle(self, key: str, charged: float, response: Dict[str, Any]) -> None:
+        """Settle a charge to the cost Ollama reported for the request"""
+        if self.cost_model is None:
+            return
+        actual = self.cost_model.actual(response)
+        if actual is not None:
+            self.rate_limiter.settle(key, actual - charged)
+
+    def _settle_stream(
+        self,
+        key: str,
+        charged: float,
+        response: Generator[Dict[str, Any], None, None]
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Settle the charge of a streamed request from its final chunk"""
+        try:
+            for chunk in response:
+                if chunk.get("done"):
+                    self._settle(key, charged, chunk)
+                yield chunk
+        finally:
+            response.close()
+
     def _handle_mock_request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        stream: bool = False
+        stream: bool = False,
+        content: Optional[Any] = None
     ) -> Union[Dict[str, Any], Generator[Dict[str, Any], None, None]]:
         """Handle requests in mock mode"""
         if endpoint == Config.GENERATE_ENDPOINT:
-            return self.mock_server.generate_response(
+            mock_response = self.mock_server.generate_response(
                 data['model'],
                 data['prompt'],
-                stream=data.get('stream', True)
+                stream=stream
             )
+            return mock_response if stream else next(mock_response)
         elif endpoint == Config.CHAT_ENDPOINT:
-            return self.mock_server.chat_response(
+            mock_response = self.mock_server.chat_response(
                 data['model'],
                 data['messages'],
-                stream=data.get('stream', True)
+                stream=stream
             )
+            return mock_response if stream else next(mock_response)
         elif endpoint == Config.CREATE_MODEL_ENDPOINT:
             return self.mock_server.create_model(data['model'], **data)
         elif endpoint == Config.LIST_MODELS_ENDPOINT:
@@ -200,22 +360,75 @@ class OllamaClient:
             return self.mock_server.create_embedding(data['model'], data['prompt'])
         elif endpoint == Config.VERSION_ENDPOINT:
             return self.mock_server.get_version()
+        elif endpoint.startswith(f"{Config.BLOBS_ENDPOINT}/"):
+            digest = endpoint[len(Config.BLOBS_ENDPOINT) + 1:]
+            if method == "HEAD":
+                if not self.mock_server.blob_exists(digest):
+                    raise OllamaRequestError(f"Blob {digest} not found", status_code=404)
+                return {"status": "success"}
+            return self.mock_server.create_blob(digest, content)
         else:
             raise OllamaRequestError(f"Mock server does not support endpoint: {endpoint}")
 
     def _stream_response(self, response: requests.Response) -> Generator[Dict[str, Any], None, None]:
-        """Stream response from Ollama API with error handling"""
-        for line in response.iter_lines():
-            if line:
-                try:
-                    json_response = json.loads(line.decode('utf-8'))
-                    yield json_response
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON response: {str(e)}")
-                    raise OllamaResponseError(f"Failed to parse JSON response: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Error streaming response: {str(e)}")
-                    raise OllamaResponseError(f"Error streaming response: {str(e)}")
+        """Stream response from Ollama API with error handling
+
+        The upstream connection is closed as soon as the generator is closed or
+        garbage collected, which makes Ollama abandon the generation.
+        """
+        try:
+            for line in response.iter_lines():
+                if line:
+                    try:
+                        json_response = json.loads(line.decode('utf-8'))
+                        yield json_response
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Failed to parse JSON response: {str(e)}")
+                        raise OllamaResponseError(f"Failed to parse JSON response: {str(e)}")
+                    except Exception as e:
+                        logger.error(f"Error streaming response: {str(e)}")
+                        raise OllamaResponseError(f"Error streaming response: {str(e)}")
+        finally:
+            response.close()
+
+    def _completion_request(
+        self,
+        endpoint: str,
+        data: Dict[str, Any],
+        stream: bool
+    ) -> Union[Dict[str, Any], Generator[Dict[str, Any], None, None]]:
+        """POST a generate/chat request, answering it from the semantic cache if possible"""
+        cache = self.semantic_cache
+        key = cache.key(endpoint, data) if cache is not None else None
+        if key is None:
+            return self._make_request("POST", endpoint, data=data, stream=stream)
+
+        namespace, text = key
+        try:
+            embedding = (self.create_embedding(
+                EmbeddingRequest(model=cache.embedding_model, prompt=text)
+            )).embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache bypassed, embedding failed: {str(e)}")
+            return self._make_request("POST", endpoint, data=data, stream=stream)
+
+        cached = cache.lookup(namespace, embedding)
+        if cached is not None:
+            return cache.as_stream(cached) if stream else cached
+        response = self._make_request("POST", endpoint, data=data, stream=stream)
+        if stream:
+            return cache.wrap_stream(namespace, embedding, response)
+        cache.store(namespace, embedding, response)
+        return response
+
+    @staticmethod
+    def _stream_models(response: Generator[Dict[str, Any], None, None], model_cls) -> Generator[Any, None, None]:
+        """Wrap a raw chunk stream in response models, propagating close() upstream"""
+        try:
+            for chunk in response:
+                yield model_cls(**chunk)
+        finally:
+            response.close()
 
     def generate(
         self, 
@@ -234,17 +447,15 @@ class OllamaClient:
             # Validate model name format
             request.model = validate_model_name(request.model)
 
-            stream = request.options.stream if request.options else True
-            response = self._make_request(
-                "POST",
-                Config.GENERATE_ENDPOINT,
-                data=request.dict(exclude_none=True),
-                stream=stream
-            )
+            # Either the request or its legacy options.stream flag can disable streaming
+            stream = request.stream is not False and not (request.options and request.options.stream is False)
+            data = request.dict(exclude_none=True)
+            data['stream'] = stream
+            response = self._completion_request(Config.GENERATE_ENDPOINT, data, stream)
 
             if not stream:
                 return GenerateResponse(**response)
-            return (GenerateResponse(**chunk) for chunk in response)
+            return self._stream_models(response, GenerateResponse)
 
         except Exception as e:
             logger.error(f"Generate request failed: {str(e)}")
@@ -270,21 +481,35 @@ class OllamaClient:
             request.model = validate_model_name(request.model)
 
             stream = request.stream if request.stream is not None else True
-            response = self._make_request(
-                "POST",
-                Config.CHAT_ENDPOINT,
-                data=request.dict(exclude_none=True),
-                stream=stream
-            )
+            response = self._completion_request(Config.CHAT_ENDPOINT, request.dict(exclude_none=True), stream)
 
             if not stream:
                 return ChatResponse(**response)
-            return (ChatResponse(**chunk) for chunk in response)
+            return self._stream_models(response, ChatResponse)
 
         except Exception as e:
             logger.error(f"Chat request failed: {str(e)}")
             raise
 
+    def run_tools(
+        self,
+        request: ChatRequest,
+        tools: List[Union[Tool, Callable[..., Any]]],
+        max_rounds: int = Config.TOOL_MAX_ROUNDS,
+        on_response: Optional[Callable[[ChatResponse], None]] = None
+    ) -> Tuple[ChatResponse, List[Message]]:
+        """Chat with tools, executing each turn's tool calls concurrently
+        Args:
+            request (ChatRequest): Chat request; streaming is disabled for the loop
+            tools (List[Union[Tool, Callable]]): Tools or plain functions the model may call
+            max_rounds (int): Maximum number of model turns
+            on_response (Callable, optional): Called with every model turn's response,
+                e.g. to account its usage
+        Returns:
+            Tuple[ChatResponse, List[Message]]: Final response and the full transcript
+        """
+        return run_tool_loop(self, request, tools, self.tool_executor, max_rounds, on_response)
+
     def create_model(self, request: CreateModelRequest) -> Union[ModelResponse, Generator[ModelResponse, None, None]]:
         """Create a new model using Ollama API
         Args:
@@ -311,7 +536,7 @@ class OllamaClient:
 
             if not stream:
                 return ModelResponse(**response)
-            return (ModelResponse(**chunk) for chunk in response)
+            return self._stream_models(response, ModelResponse)
 
         except Exception as e:
             logger.error(f"Create model request failed: {str(e)}")
@@ -320,13 +545,8 @@ class OllamaClient:
     def list_models(self) -> Dict[str, Any]:
         """List available models"""
         try:
-            response = requests.get(f"{self.base_url}/api/models")
-            if not response.ok:
-                logger.error(f"Failed to fetch models: {response.status_code}")
-                return {"models": []}
-            
-            data = response.json()
-            models = data.get("models", [])
+            response = self._make_request("GET", Config.LIST_MODELS_ENDPOINT)
+            models = response.get("models", [])
             logger.info(f"List models: {len(models)}")
             return {"models": models}
         except Exception as e:
@@ -426,7 +646,7 @@ class OllamaClient:
 
             if not stream:
                 return ModelResponse(**response)
-            return (ModelResponse(**chunk) for chunk in response)
+            return self._stream_models(response, ModelResponse)
 
         except Exception as e:
             logger.error(f"Pull model request failed: {str(e)}")
@@ -450,12 +670,62 @@ class OllamaClient:
 
             if not stream:
                 return ModelResponse(**response)
-            return (ModelResponse(**chunk) for chunk in response)
+            return self._stream_models(response, ModelResponse)
 
         except Exception as e:
             logger.error(f"Push model request failed: {str(e)}")
             raise
 
+    def blob_exists(self, digest: str) -> bool:
+        """Check whether a blob is already present on the Ollama server
+        Args:
+            digest (str): Blob digest in ``sha256:<hex>`` form
+        Returns:
+            bool: True if the server already has the blob
+        """
+        digest = validate_blob_digest(digest)
+        try:
+            self._make_request(
+                "HEAD",
+                f"{Config.BLOBS_ENDPOINT}/{digest}",
+                rate_limit_key=Config.BLOBS_ENDPOINT
+            )
+            return True
+        except OllamaRequestError as e:
+            if e.status_code == 404:
+                return False
+            logger.error(f"Blob existence check failed: {str(e)}")
+            raise
+
+    def upload_blob(
+        self,
+        digest: str,
+        content: Union[bytes, BinaryIO, Iterable[bytes]],
+        timeout: int = Config.BLOB_UPLOAD_TIMEOUT
+    ) -> Dict[str, Any]:
+        """Upload a model blob to the Ollama server
+        Args:
+            digest (str): Blob digest in ``sha256:<hex>`` form
+            content: Blob bytes, a file object, or an iterable of byte chunks.
+                Iterables are streamed with chunked transfer encoding, so the
+                blob never has to be held in memory.
+            timeout (int): Per-read timeout in seconds
+        Returns:
+            Dict[str, Any]: Upload status
+        """
+        try:
+            digest = validate_blob_digest(digest)
+            return self._make_request(
+                "POST",
+                f"{Config.BLOBS_ENDPOINT}/{digest}",
+                content=content,
+                timeout=timeout,
+                rate_limit_key=Config.BLOBS_ENDPOINT
+            )
+        except Exception as e:
+            logger.error(f"Blob upload failed: {str(e)}")
+            raise
+
     def create_embedding(self, request: EmbeddingRequest) -> EmbeddingResponse:
         """Generate embeddings using Ollama API
         Args:
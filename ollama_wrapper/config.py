@@ -1,10 +1,27 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _find_dotenv() -> str:
+    """Return the nearest .env at or above this package, or '' if there is none"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return ""
+        directory = parent
+
+
+# Only import python-dotenv when there is a .env file to load
+_dotenv_path = _find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 class Config:
-    # Base URL for Ollama API
+    # Base URL for Ollama API; unix:///path/to/ollama.sock connects over a Unix socket
     OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434")
 
     # API endpoints
@@ -18,16 +35,155 @@ class Config:
     PULL_MODEL_ENDPOINT = "/api/pull"
     PUSH_MODEL_ENDPOINT = "/api/push"
     EMBEDDINGS_ENDPOINT = "/api/embeddings"
+    EMBED_ENDPOINT = "/api/embed"
     RUNNING_MODELS_ENDPOINT = "/api/running"
+    BLOBS_ENDPOINT = "/api/blobs"
     VERSION_ENDPOINT = "/api/version"
 
+    # Sync client connection pool: with POOL_BLOCK, requests wait up to
+    # POOL_TIMEOUT seconds for a free connection instead of opening extra ones
+    POOL_BLOCK = os.getenv("POOL_BLOCK", "false").lower() == "true"
+    POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", "30"))
+
+    # Rate limits shared by all workers on the host: path of the mmap'd
+    # bucket table (e.g. /dev/shm/ollama-rate-limits); unset keeps limits
+    # per process. Each worker takes RATE_LIMIT_LEASE_FRACTION of a bucket's
+    # capacity at a time and serves requests locally until it is used up.
+    RATE_LIMIT_SHARED_PATH = os.getenv("RATE_LIMIT_SHARED_PATH")
+    RATE_LIMIT_LEASE_FRACTION = float(os.getenv("RATE_LIMIT_LEASE_FRACTION", "0.1"))
+    # Rate limit keys tracked per limiter beyond the configured endpoints;
+    # the least recently used idle buckets are dropped past this
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "1024"))
+    # Cost-weighted rate limiting: generate/chat requests are charged
+    # 1 + tokens / COST_UNIT_TOKENS units instead of 1 (see cost.py). Opt-in
+    RATE_LIMIT_COST_WEIGHTED = os.getenv("RATE_LIMIT_COST_WEIGHTED", "false").lower() == "true"
+    COST_UNIT_TOKENS = int(os.getenv("COST_UNIT_TOKENS", "1000"))
+    COST_CHARS_PER_TOKEN = float(os.getenv("COST_CHARS_PER_TOKEN", "4"))
+    COST_IMAGE_TOKENS = int(os.getenv("COST_IMAGE_TOKENS", "768"))
+    COST_DEFAULT_NUM_CTX = int(os.getenv("COST_DEFAULT_NUM_CTX", "4096"))
+    COST_DEFAULT_NUM_PREDICT = int(os.getenv("COST_DEFAULT_NUM_PREDICT", "256"))
+
+    # Additional Ollama backends (comma separated) for multi-node operations
+    OLLAMA_BACKENDS = [
+        url.strip() for url in os.getenv("OLLAMA_BACKENDS", "").split(",") if url.strip()
+    ]
+
     # Request defaults
     DEFAULT_TIMEOUT = 60
+    PULL_READ_TIMEOUT = 600
     DEFAULT_HEADERS = {
         "Content-Type": "application/json",
         "Accept": "application/json"
     }
 
+    # Blob uploads
+    BLOB_UPLOAD_TIMEOUT = 300
+    BLOB_CHUNK_SIZE = 1024 * 1024
+    MAX_BLOB_SIZE = int(os.getenv("MAX_BLOB_SIZE", str(64 * 1024 ** 3)))
+
+    # Generations attempted for a buffered structured output request before
+    # invalid output is reported
+    STRUCTURED_MAX_ATTEMPTS = int(os.getenv("STRUCTURED_MAX_ATTEMPTS", "3"))
+
+    # Tool-call loops: per-call timeout, thread pool size for blocking tools
+    # and the maximum number of model turns
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    TOOL_MAX_ROUNDS = int(os.getenv("TOOL_MAX_ROUNDS", "8"))
+
+    # Opt-in embedding micro-batching for /api/embeddings: concurrent requests
+    # for a model are sent together to /api/embed once EMBED_BATCH_SIZE arrive
+    # or EMBED_BATCH_WAIT_MS elapses. /api/embed returns L2-normalized vectors
+    EMBED_BATCHING = os.getenv("EMBED_BATCHING", "false").lower() == "true"
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+    EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+    # Image ingestion: longest side in pixels images are downsized to before
+    # being sent to vision models, and how many prepared images are cached
+    IMAGE_MAX_SIZE = int(os.getenv("IMAGE_MAX_SIZE", "1120"))
+    IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+    MAX_IMAGE_UPLOAD_SIZE = int(os.getenv("MAX_IMAGE_UPLOAD_SIZE", str(32 * 1024 * 1024)))
+
+    # Streaming: coalesce NDJSON lines into one HTTP chunk for up to
+    # STREAM_FLUSH_MS or STREAM_FLUSH_LINES lines (0 ms flushes every line)
+    STREAM_FLUSH_MS = float(os.getenv("STREAM_FLUSH_MS", "0"))
+    STREAM_FLUSH_LINES = int(os.getenv("STREAM_FLUSH_LINES", "64"))
+
+    # Traffic capture/replay: record upstream exchanges to a trace file, or
+    # serve a recorded trace instead of Ollama (speed 0 = as fast as possible)
+    TRACE_RECORD_PATH = os.getenv("OLLAMA_TRACE_RECORD")
+    TRACE_REPLAY_PATH = os.getenv("OLLAMA_TRACE_REPLAY")
+    TRACE_REPLAY_SPEED = float(os.getenv("OLLAMA_TRACE_REPLAY_SPEED", "1.0"))
+
+    # Response compression
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_LEVEL = 6
+
+    # Seconds between background refreshes of the cached model list
+    CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "30"))
+
+    # Semantic response cache (opt-in): prompts embedded with
+    # SEMANTIC_CACHE_MODEL are answered from a cached response when their
+    # cosine similarity reaches SEMANTIC_CACHE_THRESHOLD
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "nomic-embed-text")
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+
+    # Usage accounting: per tenant/model/hour counters, appended to
+    # USAGE_LOG_PATH (JSON Lines) every USAGE_FLUSH_INTERVAL seconds when set.
+    # With TENANT_TOKENS ("tenant:token,..."), the tenant is the one whose
+    # token the request presents as "Authorization: Bearer <token>", and
+    # /api/usage requires one. Without it, the tenant is read from the
+    # TENANT_HEADER request header, which any client can set: that is only
+    # safe behind a trusted proxy that sets or strips the header, and scopes
+    # accounting, not access. USAGE_ADMIN_TOKEN reads every tenant's usage
+    USAGE_LOG_PATH = os.getenv("USAGE_LOG_PATH")
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "60"))
+    USAGE_RETENTION_HOURS = int(os.getenv("USAGE_RETENTION_HOURS", "744"))
+    TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant-ID")
+    DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+    USAGE_ADMIN_TOKEN = os.getenv("USAGE_ADMIN_TOKEN")
+    # Token -> tenant
+    TENANT_TOKENS = {
+        token.strip(): tenant.strip()
+        for tenant, _, token in (pair.partition(":") for pair in os.getenv("TENANT_TOKENS", "").split(","))
+        if tenant.strip() and token.strip()
+    }
+
+    # Stored conversations for delta chat: conversations kept in memory,
+    # optional directory persisting them, and messages forwarded per turn
+    # besides system messages (0 forwards the whole history)
+    CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "1000"))
+    CONVERSATION_DIR = os.getenv("CONVERSATION_DIR")
+    CONVERSATION_WINDOW_MESSAGES = int(os.getenv("CONVERSATION_WINDOW_MESSAGES", "50"))
+
+    # Opt-in stream broadcasting: generate/chat streams get an ID that clients
+    # of the same tenant can attach to. Late subscribers replay up to
+    # BROADCAST_BUFFER_CHUNKS chunks; finished streams stay replayable for
+    # BROADCAST_RETENTION seconds, and a stream nobody attaches to within
+    # BROADCAST_UNWATCHED_TIMEOUT is cancelled
+    STREAM_BROADCAST = os.getenv("STREAM_BROADCAST", "false").lower() == "true"
+    BROADCAST_BUFFER_CHUNKS = int(os.getenv("BROADCAST_BUFFER_CHUNKS", "4096"))
+    BROADCAST_RETENTION = float(os.getenv("BROADCAST_RETENTION", "60"))
+    BROADCAST_UNWATCHED_TIMEOUT = float(os.getenv("BROADCAST_UNWATCHED_TIMEOUT", "10"))
+
+    # Batch job defaults
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+    BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "batch_jobs")
+    # Directory input_path files of /api/batch are read from
+    BATCH_INPUT_DIR = os.getenv("BATCH_INPUT_DIR", "batch_inputs")
+
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
\ No newline at end of file
+    LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    # "text" uses LOG_FORMAT; "kv" writes key=value pairs including extra fields
+    LOG_STYLE = os.getenv("LOG_STYLE", "text").lower()
+    # Records buffered for the log writer thread; more are dropped, not waited on
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # At most LOG_RATE_LIMIT records per call site per LOG_RATE_WINDOW seconds (0 = no limit)
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))
+    LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "10"))
+    # Fraction of DEBUG records kept
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
\ No newline at end of file
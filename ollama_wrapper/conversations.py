@@ -0,0 +1,262 @@
+"""Server-side conversation storage for Ollama API
+
+With a stored conversation, chat clients send only the new messages of a
+turn instead of the whole history. The store keeps each conversation's
+validated Message objects, so earlier turns are neither uploaded nor
+re-validated again; ``window`` picks the messages forwarded to the model.
+
+Conversations are held in an LRU of ``max_conversations``. With a
+``directory``, every committed turn is also appended to a per-conversation
+JSON Lines file, so conversations survive eviction and restarts.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional
+
+from .config import Config
+from .exceptions import OllamaRequestError, OllamaValidationError
+from .logger import setup_logger
+from .models import ChatResponse, Message
+
+logger = setup_logger(__name__)
+
+_CONVERSATION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Conversation:
+    """Model and message history of one conversation"""
+
+    __slots__ = ("conversation_id", "model", "messages", "updated_at")
+
+    def __init__(self, conversation_id: str, model: str, messages: Optional[List[Message]] = None):
+        self.conversation_id = conversation_id
+        self.model = model
+        self.messages: List[Message] = messages or []
+        self.updated_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "conversation_id": self.conversation_id,
+            "model": self.model,
+            "messages": [message.model_dump(exclude_none=True) for message in self.messages],
+            "updated_at": self.updated_at,
+        }
+
+
+class ConversationStore:
+    """LRU of conversations with optional append-only persistence
+
+    Turns are committed with ``append`` once the model has answered, so a
+    failed or abandoned request leaves the conversation unchanged. A turn
+    passes the history length it was built on; if another turn was committed
+    meanwhile, its commit is rejected rather than interleaved with it.
+    Commits to one conversation are serialized by a per-conversation lock
+    held across both the in-memory update and the file append, so the file
+    replays turns in the order clients saw them.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = Config.CONVERSATION_CACHE_SIZE,
+        directory: Optional[str] = Config.CONVERSATION_DIR,
+        window_messages: int = Config.CONVERSATION_WINDOW_MESSAGES
+    ):
+        """Initialize conversation store
+        Args:
+            max_conversations (int): Conversations kept in memory
+            directory (str, optional): Directory for conversation files; None keeps them in memory only
+            window_messages (int): Most recent messages forwarded per turn, besides system messages
+        """
+        self.max_conversations = max_conversations
+        self.directory = directory
+        self.window_messages = window_messages
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped by conversation ID, so the table stays bounded
+        self._turn_locks = [threading.Lock() for _ in range(64)]
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def validate_id(conversation_id: str) -> str:
+        if not isinstance(conversation_id, str) or not _CONVERSATION_ID_RE.match(conversation_id):
+            raise OllamaValidationError(
+                "Conversation IDs must be 1-64 letters, digits, underscores or hyphens"
+            )
+        return conversation_id
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        """Return a conversation from memory, or from disk if it was evicted"""
+        conversation_id = self.validate_id(conversation_id)
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None:
+                self._conversations.move_to_end(conversation_id)
+                return conversation
+        conversation = self._load(conversation_id)
+        if conversation is not None:
+            with self._lock:
+                # Another request may have loaded it meanwhile
+                conversation = self._conversations.setdefault(conversation_id, conversation)
+                self._evict()
+        return conversation
+
+    def append(
+        self,
+        conversation_id: str,
+        model: str,
+        messages: Iterable[Message],
+        expected_length: Optional[int] = None
+    ) -> Conversation:
+        """Commit a turn, creating the conversation if needed
+        Args:
+            conversation_id (str): Conversation ID
+            model (str): Model that answered the turn
+            messages (Iterable[Message]): The turn's messages, including the reply
+            expected_length (int, optional): Messages the conversation held when the
+                turn started; the commit fails with a 409 if it changed since
+        """
+        conversation_id = self.validate_id(conversation_id)
+        messages = list(messages)
+        with self._turn_lock(conversation_id):
+            conversation = self.get(conversation_id)
+            with self._lock:
+                length = len(conversation.messages) if conversation is not None else 0
+                if expected_length is not None and length != expected_length:
+                    raise OllamaRequestError(
+                        f"Conversation {conversation_id} changed while this turn was running; "
+                        f"send the turn again",
+                        status_code=409
+                    )
+                if conversation is None:
+                    conversation = self._conversations.setdefault(
+                        conversation_id, Conversation(conversation_id, model)
+                    )
+                conversation.model = model
+                conversation.messages.extend(messages)
+                conversation.updated_at = time.time()
+                self._conversations[conversation_id] = conversation
+                self._conversations.move_to_end(conversation_id)
+                self._evict()
+            if self.directory:
+                self._persist(conversation_id, model, messages)
+        return conversation
+
+    def commit(
+        self,
+        conversation_id: str,
+        model: str,
+        messages: List[Message],
+        response: ChatResponse,
+        expected_length: Optional[int] = None
+    ) -> None:
+        """Commit a turn's new messages together with the model's reply"""
+        self.append(conversation_id, model, messages + [response.message], expected_length)
+
+    async def wrap_async_stream(
+        self,
+        conversation_id: str,
+        model: str,
+        messages: List[Message],
+        stream: AsyncGenerator[ChatResponse, None],
+        expected_length: Optional[int] = None
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """Pass a chat stream through, committing the turn if it completes"""
+        parts: List[str] = []
+        tool_calls: List[Dict[str, Any]] = []
+        try:
+            async for chunk in stream:
+                parts.append(chunk.message.content)
+                tool_calls.extend(chunk.message.tool_calls or [])
+                if chunk.done:
+                    reply = Message(role="assistant", content="".join(parts), tool_calls=tool_calls or None)
+                    self.append(conversation_id, model, messages + [reply], expected_length)
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    def delete(self, conversation_id: str) -> bool:
+        """Forget a conversation; returns whether it existed"""
+        conversation_id = self.validate_id(conversation_id)
+        with self._turn_lock(conversation_id):
+            with self._lock:
+                existed = self._conversations.pop(conversation_id, None) is not None
+            if self.directory:
+                try:
+                    os.remove(self._path(conversation_id))
+                    existed = True
+                except FileNotFoundError:
+                    pass
+        return existed
+
+    def window(self, messages: List[Message]) -> List[Message]:
+        """Messages to forward: system messages plus the most recent others
+
+        The window starts at a user message, so the model never sees an
+        answer or tool result without the message that prompted it.
+        """
+        if self.window_messages <= 0 or len(messages) <= self.window_messages:
+            return list(messages)
+        system = [message for message in messages if message.role == "system"]
+        recent = [message for message in messages if message.role != "system"][-self.window_messages:]
+        while len(recent) > 1 and recent[0].role != "user":
+            recent.pop(0)
+        return system + recent
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._conversations)
+
+    def _turn_lock(self, conversation_id: str) -> threading.Lock:
+        return self._turn_locks[hash(conversation_id) % len(self._turn_locks)]
+
+    def _evict(self) -> None:
+        # Evicted conversations can be reloaded from disk when persisted
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+
+    def _path(self, conversation_id: str) -> str:
+        return os.path.join(self.directory, f"{conversation_id}.jsonl")
+
+    def _persist(self, conversation_id: str, model: str, messages: List[Message]) -> None:
+        line = json.dumps({
+            "model": model,
+            "messages": [message.model_dump(exclude_none=True) for message in messages],
+        })
+        try:
+            with open(self._path(conversation_id), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.error(f"Failed to persist conversation {conversation_id}: {str(e)}")
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(conversation_id), encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None
+        conversation = None
+        for line_number, line in enumerate(lines, 1):
+            try:
+                turn = json.loads(line)
+                messages = [Message(**message) for message in turn["messages"]]
+            except (ValueError, KeyError, TypeError):
+                # A turn cut short by a crash while it was written
+                logger.warning(f"Skipping malformed turn {line_number} of conversation {conversation_id}")
+                continue
+            if conversation is None:
+                conversation = Conversation(conversation_id, turn.get("model", ""))
+            conversation.model = turn.get("model", conversation.model)
+            conversation.messages.extend(messages)
+        return conversation
@@ -0,0 +1,94 @@
+"""Request cost model for Ollama API rate limiting
+
+Rate limit buckets count cost units instead of requests. A request costs
+one unit plus one per ``unit_tokens`` tokens of work, so a short prompt
+costs about 1 and a 32k-token prompt with 4k tokens to generate about 37.
+
+The cost of a generate/chat request is estimated from its payload before it
+is sent: prompt text, prior ``context`` tokens and images, bounded by
+``num_ctx``, plus ``num_predict`` tokens to generate. When Ollama reports
+``prompt_eval_count`` and ``eval_count``, the charge is settled to the
+actual cost (see OllamaClient._settle).
+"""
+import json
+from typing import Any, Dict, Optional
+
+from .config import Config
+
+# num_predict values meaning "until the context is full"
+_UNBOUNDED_PREDICT = (-1, -2)
+
+
+class CostModel:
+    """Estimate and measure the cost of Ollama requests in rate limit units"""
+
+    def __init__(
+        self,
+        unit_tokens: int = Config.COST_UNIT_TOKENS,
+        chars_per_token: float = Config.COST_CHARS_PER_TOKEN,
+        image_tokens: int = Config.COST_IMAGE_TOKENS,
+        default_num_ctx: int = Config.COST_DEFAULT_NUM_CTX,
+        default_num_predict: int = Config.COST_DEFAULT_NUM_PREDICT
+    ):
+        """Initialize cost model
+        Args:
+            unit_tokens (int): Tokens of work per cost unit beyond the first
+            chars_per_token (float): Characters per token when estimating prompt size
+            image_tokens (int): Prompt tokens assumed per image
+            default_num_ctx (int): Context size of requests that do not set num_ctx
+            default_num_predict (int): Tokens assumed generated when num_predict is unset
+        """
+        self.unit_tokens = unit_tokens
+        self.chars_per_token = chars_per_token
+        self.image_tokens = image_tokens
+        self.default_num_ctx = default_num_ctx
+        self.default_num_predict = default_num_predict
+
+    def cost(self, tokens: float) -> float:
+        """Cost of a request doing ``tokens`` tokens of work"""
+        return 1.0 + tokens / self.unit_tokens
+
+    def prompt_tokens(self, endpoint: str, data: Dict[str, Any]) -> float:
+        """Estimate the prompt tokens of a generate/chat payload, before truncation"""
+        chars = 0
+        images = 0
+        tokens = 0
+        if endpoint == Config.GENERATE_ENDPOINT:
+            for field in ("prompt", "system", "suffix"):
+                chars += len(data.get(field) or "")
+            images = len(data.get("images") or [])
+            tokens = len(data.get("context") or [])
+        elif endpoint == Config.CHAT_ENDPOINT:
+            for message in data.get("messages") or []:
+                chars += len(message.get("content") or "")
+                images += len(message.get("images") or [])
+            if data.get("tools"):
+                chars += len(json.dumps(data["tools"]))
+        return tokens + chars / self.chars_per_token + images * self.image_tokens
+
+    def estimate(self, endpoint: str, data: Optional[Dict[str, Any]]) -> float:
+        """Estimated cost of a request; 1 for endpoints other than generate/chat
+        Args:
+            endpoint (str): API endpoint
+            data (dict, optional): JSON payload, e.g. GenerateRequest.dict()
+        Returns:
+            float: Cost in rate limit units
+        """
+        if not data or endpoint not in (Config.GENERATE_ENDPOINT, Config.CHAT_ENDPOINT):
+            return 1.0
+        options = data.get("options") or {}
+        num_ctx = options.get("num_ctx") or self.default_num_ctx
+        # Ollama truncates prompts to the context window
+        prompt = min(self.prompt_tokens(endpoint, data), num_ctx)
+        num_predict = options.get("num_predict")
+        if num_predict is None:
+            num_predict = self.default_num_predict
+        elif num_predict in _UNBOUNDED_PREDICT:
+            num_predict = num_ctx - prompt
+        return self.cost(prompt + min(num_predict, num_ctx - prompt))
+
+    def actual(self, response: Dict[str, Any]) -> Optional[float]:
+        """Actual cost from a final response, or None if Ollama did not report counts"""
+        if not isinstance(response, dict) or "eval_count" not in response:
+            return None
+        return self.cost((response.get("prompt_eval_count") or 0) + (response.get("eval_count") or 0))
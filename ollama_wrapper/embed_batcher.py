@@ -0,0 +1,130 @@
+"""Embedding request micro-batching for Ollama API"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .async_client import AsyncOllamaClient
+from .config import Config
+from .exceptions import OllamaValidationError
+from .logger import setup_logger
+from .models import EmbeddingRequest, EmbeddingResponse
+from .utils import validate_model_name
+
+logger = setup_logger(__name__)
+
+BatchKey = Tuple[str, str]
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embedding requests into batched calls
+
+    Requests for the same model and options are queued. The queue is sent
+    as one ``/api/embed`` call once ``max_batch_size`` texts are waiting or
+    ``max_wait_ms`` has passed since the first one arrived. Each caller then
+    gets its own vector back. Identical texts in a batch are embedded once.
+    If a batched call fails, its texts are retried one by one, so an input
+    the model rejects only fails its own request.
+
+    ``/api/embed`` returns L2-normalized vectors, unlike the legacy
+    ``/api/embeddings`` endpoint.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOllamaClient,
+        max_batch_size: int = Config.EMBED_BATCH_SIZE,
+        max_wait_ms: float = Config.EMBED_BATCH_WAIT_MS
+    ):
+        """Initialize embedding batcher
+        Args:
+            client (AsyncOllamaClient): Client used for batched embed calls
+            max_batch_size (int): Maximum texts per upstream call
+            max_wait_ms (float): Longest a request waits for others to join its batch
+        """
+        if max_batch_size < 1:
+            raise OllamaValidationError("Embedding batch size must be at least 1")
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[BatchKey, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+
+    async def embed(self, request: EmbeddingRequest) -> EmbeddingResponse:
+        """Embed one text, batched with concurrent requests for the same model
+        Args:
+            request (EmbeddingRequest): Embedding generation parameters
+        Returns:
+            EmbeddingResponse: Embedding for request.prompt
+        """
+        if not request.model:
+            raise OllamaValidationError("Model name is required")
+        if not request.prompt:
+            raise OllamaValidationError("Prompt is required")
+
+        options = request.options.model_dump(exclude_none=True) if request.options else {}
+        key = (validate_model_name(request.model), json.dumps(options, sort_keys=True))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((request.prompt, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return EmbeddingResponse(embedding=await future)
+
+    def _flush(self, key: BatchKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(key, batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: BatchKey, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        model, options = key
+        # Callers that gave up while queued do not need an embedding
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        logger.debug(f"Embedding batch of {len(batch)} requests ({len(texts)} unique) for {model}")
+        options = json.loads(options) or None
+        try:
+            by_text: Dict[str, Any] = dict(zip(texts, await self.client.embed(model, texts, options=options)))
+        except Exception as e:
+            if len(texts) == 1:
+                by_text = {texts[0]: e}
+            else:
+                logger.warning(f"Embedding batch for {model} failed, retrying its inputs one by one: {str(e)}")
+                results = await asyncio.gather(
+                    *(self.client.embed(model, [text], options=options) for text in texts),
+                    return_exceptions=True
+                )
+                by_text = {
+                    text: result if isinstance(result, BaseException) else result[0]
+                    for text, result in zip(texts, results)
+                }
+        for text, future in batch:
+            if future.done():
+                continue
+            if isinstance(by_text[text], BaseException):
+                future.set_exception(by_text[text])
+            else:
+                future.set_result(by_text[text])
+
+    async def close(self) -> None:
+        """Send any queued requests and wait for in-flight batches"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -14,6 +14,13 @@ class OllamaResponseError(OllamaError):
         self.response_data = response_data
         super().__init__(message)
 
+class OllamaStructuredOutputError(OllamaResponseError):
+    """Exception raised when generated output does not match the requested schema"""
+    def __init__(self, message: str, path: str = "$", position: int = None):
+        self.path = path
+        self.position = position
+        super().__init__(message)
+
 class OllamaValidationError(OllamaError):
     """Exception raised for validation errors"""
     pass
@@ -0,0 +1,90 @@
+"""Generic cell rate algorithm (GCRA) for Ollama API rate limiting
+
+A GCRA bucket stores a single number, the theoretical arrival time (TAT):
+the moment the bucket would be full again if nothing else arrived. Each
+request reserves the next ``tokens / rate`` seconds after the TAT and is
+told when its reservation starts. Reservations are handed out in the order
+requests arrive, so callers that sleep until their start time proceed in
+FIFO order. A burst of waiters can never wake up together and overshoot
+the capacity, as the previous check-then-sleep token bucket allowed.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+
+class GCRA:
+    """GCRA state for one key; not thread-safe, callers hold their own lock"""
+
+    __slots__ = ("rate", "capacity", "tat", "_gaps")
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a full bucket
+        Args:
+            rate (float): Tokens replenished per second
+            capacity (float): Burst size in tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tat = 0.0
+        # Cancelled reservations that were not the latest: end -> start
+        self._gaps: Dict[float, float] = {}
+
+    def reserve(self, tokens: float, now: float) -> Tuple[float, Tuple[float, float]]:
+        """Reserve tokens; returns (seconds to wait, reservation)
+
+        The reservation, a (start, end) pair, identifies it for ``cancel``.
+        """
+        if self._gaps and self.tat <= now:
+            self._gaps.clear()
+        start = max(self.tat, now)
+        self.tat = start + tokens / self.rate
+        return max(0.0, self.tat - self.capacity / self.rate - now), (start, self.tat)
+
+    def cancel(self, reservation: Tuple[float, float]) -> bool:
+        """Give back a reservation whose caller will not proceed
+
+        Tokens are refunded once every later reservation has been cancelled
+        too; until then the reservation stays a gap in the schedule. Returns
+        whether the TAT moved back.
+        """
+        start, end = reservation
+        if self.tat != end:
+            self._gaps[end] = start
+            return False
+        self.tat = start
+        # Reservations cancelled earlier that are now the latest
+        while self.tat in self._gaps:
+            self.tat = self._gaps.pop(self.tat)
+        return True
+
+    def adjust(self, tokens: float, now: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact
+
+        A charge pushes back later reservations; nobody waits for it. A
+        refund never makes the bucket fuller than full.
+        """
+        if tokens >= 0:
+            self.tat = max(self.tat, now) + tokens / self.rate
+        else:
+            self.tat = max(self.tat + tokens / self.rate, now)
+
+    def idle(self, now: float) -> bool:
+        """Whether the bucket is full, i.e. forgetting it changes nothing"""
+        return self.tat <= now
+
+
+def evict_idle(buckets: "OrderedDict[str, Any]", max_keys: int, now: float) -> int:
+    """Drop full, unpinned buckets until at most ``max_keys`` remain
+
+    ``buckets`` is kept in least recently used order; its values provide
+    ``pinned`` and ``idle(now)``. Buckets with outstanding reservations are
+    kept, so eviction never lets a key exceed its limit. Returns the number
+    of buckets dropped.
+    """
+    excess = len(buckets) - max_keys
+    if excess <= 0:
+        return 0
+    evicted = [key for key, bucket in buckets.items() if not bucket.pinned and bucket.idle(now)][:excess]
+    for key in evicted:
+        del buckets[key]
+    return len(evicted)
@@ -0,0 +1,163 @@
+"""Image ingestion pipeline for Ollama API"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+from .exceptions import OllamaValidationError
+from .logger import setup_logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional; without Pillow images are passed through unresized
+    Image = None
+
+logger = setup_logger(__name__)
+
+# Base64 never contains ':', so handles cannot be mistaken for inline images
+_HANDLE_RE = re.compile(r"^sha256:[0-9a-f]{64}$")
+
+
+def _prepare_image(data: bytes, max_size: int, quality: int) -> str:
+    """Downsize an image to fit max_size and return it base64 encoded
+
+    Runs in a worker process. Images already within bounds are re-encoded
+    only if that makes them smaller.
+    """
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img = ImageOps.exif_transpose(img)
+                if max(img.size) > max_size:
+                    img.thumbnail((max_size, max_size), Image.LANCZOS)
+                has_alpha = img.mode in ("RGBA", "LA") or "transparency" in img.info
+                if not has_alpha and img.mode != "RGB":
+                    img = img.convert("RGB")
+                out = io.BytesIO()
+                if has_alpha:
+                    img.save(out, format="PNG", optimize=True)
+                else:
+                    img.save(out, format="JPEG", quality=quality, optimize=True)
+                if out.tell() < len(data):
+                    data = out.getvalue()
+        except Exception as e:
+            raise ValueError(f"Invalid image: {str(e)}")
+    return base64.b64encode(data).decode("ascii")
+
+
+class ImagePipeline:
+    """Decode, downsize and cache images for multimodal requests
+
+    Uploaded images are resized to the vision input size in a process pool
+    and cached by the SHA-256 of the original bytes. The returned handle
+    (``sha256:<hex>``) can be used in place of base64 data in
+    ``images`` fields, so clients upload each image once and reference it
+    on later turns. Inline base64 images go through the same cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int = Config.IMAGE_MAX_SIZE,
+        cache_size: int = Config.IMAGE_CACHE_SIZE,
+        quality: int = 90,
+        max_workers: Optional[int] = None
+    ):
+        """Initialize image pipeline
+        Args:
+            max_size (int): Longest side in pixels images are downsized to
+            cache_size (int): Number of encoded images kept in memory
+            quality (int): JPEG quality for re-encoded images
+            max_workers (int, optional): Worker processes. Defaults to the CPU count.
+        """
+        self.max_size = max_size
+        self.cache_size = cache_size
+        self.quality = quality
+        self.max_workers = max_workers
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if Image is None:
+            logger.warning("Pillow is not installed; images will not be resized")
+
+    async def ingest(self, data: bytes) -> str:
+        """Add an image to the cache
+        Args:
+            data (bytes): Raw image file contents
+        Returns:
+            str: Handle referencing the prepared image
+        """
+        handle, _ = await self._ingest(data)
+        return handle
+
+    async def _ingest(self, data: bytes) -> Tuple[str, str]:
+        """Add an image to the cache; returns its handle and prepared base64 data
+
+        Callers use the returned data, since a concurrent ingest may already
+        have evicted it from the cache.
+        """
+        if not data:
+            raise OllamaValidationError("Empty image")
+        handle = f"sha256:{hashlib.sha256(data).hexdigest()}"
+        encoded = self._cache.get(handle)
+        if encoded is not None:
+            self._cache.move_to_end(handle)
+            return handle, encoded
+        pending = self._pending.get(handle)
+        if pending is None:
+            pending = asyncio.ensure_future(self._prepare(data))
+            self._pending[handle] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(handle, None))
+        encoded = await asyncio.shield(pending)
+        self._store(handle, encoded)
+        return handle, encoded
+
+    async def expand(self, images: Optional[List[str]]) -> Optional[List[str]]:
+        """Replace handles and inline base64 images with prepared base64 data"""
+        if not images:
+            return images
+        return [await self._resolve(image) for image in images]
+
+    async def _resolve(self, image: str) -> str:
+        if _HANDLE_RE.match(image):
+            encoded = self._cache.get(image)
+            if encoded is None:
+                raise OllamaValidationError(f"Unknown or expired image handle: {image}")
+            self._cache.move_to_end(image)
+            return encoded
+        try:
+            data = base64.b64decode(image, validate=True)
+        except (binascii.Error, ValueError):
+            raise OllamaValidationError("Images must be base64 data or an image handle")
+        _, encoded = await self._ingest(data)
+        return encoded
+
+    async def _prepare(self, data: bytes) -> str:
+        if Image is None:
+            return base64.b64encode(data).decode("ascii")
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, _prepare_image, data, self.max_size, self.quality
+            )
+        except ValueError as e:
+            raise OllamaValidationError(str(e))
+
+    def _store(self, handle: str, encoded: str) -> None:
+        self._cache[handle] = encoded
+        self._cache.move_to_end(handle)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
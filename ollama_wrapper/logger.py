@@ -1,14 +1,185 @@
+"""Logging setup for Ollama API
+
+All loggers created by setup_logger share one QueueHandler. Callers only
+enqueue the record; a single listener thread formats it and does the I/O,
+so slow log output never blocks request threads. When the queue is full,
+records are dropped and counted instead of waiting.
+
+Records pass a per-call-site rate limit before they are queued. A record
+can also be sampled by passing ``extra={"sample_rate": 0.1}``. With
+``LOG_STYLE=kv``, lines are written as ``key=value`` pairs, including any
+``extra`` fields.
+"""
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
 from .config import Config
 
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class LazyJSON:
+    """Defer ``json.dumps`` of a log argument until the record is formatted
+
+    Formatting happens on the listener thread, and only if the record is
+    emitted at all.
+    """
+
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value: Any, indent: Optional[int] = 2):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, indent=self.indent, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """LOG_FORMAT lines, noting records suppressed or dropped before this one"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        notes = []
+        if getattr(record, "suppressed", 0):
+            notes.append(f"{record.suppressed} similar records suppressed")
+        if getattr(record, "dropped", 0):
+            notes.append(f"{record.dropped} records dropped, log queue full")
+        if notes:
+            line += f" [{'; '.join(notes)}]"
+        return line
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Format records as ``ts=... level=... logger=... msg="..." key=value``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key != "sample_rate":
+                fields[key] = value
+        line = " ".join(f"{key}={self._value(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += " exc=" + self._value(self.formatException(record.exc_info))
+        return line
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        text = str(value)
+        if not text or any(c in text for c in ' ="\n'):
+            return json.dumps(text)
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit each call site to ``limit`` records per ``window`` seconds
+
+    Suppressed records are counted. The next record let through from that
+    call site carries the count as its ``suppressed`` field. Records with a
+    ``sample_rate`` are kept with that probability; DEBUG records default
+    to Config.LOG_DEBUG_SAMPLE_RATE.
+    """
+
+    def __init__(self, limit: int = Config.LOG_RATE_LIMIT, window: float = Config.LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        # call site -> [window start, records in window, suppressed]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is None and record.levelno <= logging.DEBUG:
+            sample_rate = Config.LOG_DEBUG_SAMPLE_RATE
+        if sample_rate is not None and sample_rate < 1 and random.random() >= sample_rate:
+            return False
+        if self.limit <= 0:
+            return True
+
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state is not None else 0
+                self._sites[site] = [now, 1, 0]
+            elif state[1] < self.limit:
+                state[1] += 1
+                suppressed = 0
+            else:
+                state[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record is passed as-is
+        # and message formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+            self.dropped = 0
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler_lock = threading.Lock()
+
+
+def _shared_handler() -> _NonBlockingQueueHandler:
+    """Create the process-wide queue handler and start its listener once"""
+    global _handler, _listener
+    with _handler_lock:
+        if _handler is None:
+            log_queue: queue.Queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+            output = logging.StreamHandler()
+            output.setFormatter(
+                KeyValueFormatter() if Config.LOG_STYLE == "kv" else TextFormatter(Config.LOG_FORMAT)
+            )
+            _handler = _NonBlockingQueueHandler(log_queue)
+            _handler.addFilter(RateLimitFilter())
+            _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+            _listener.start()
+            # Flush queued records on interpreter exit
+            atexit.register(_listener.stop)
+        return _handler
+
+
 def setup_logger(name: str) -> logging.Logger:
     """Setup and return a logger instance"""
     logger = logging.getLogger(name)
     logger.setLevel(Config.LOG_LEVEL)
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(Config.LOG_FORMAT))
-        logger.addHandler(handler)
-    
+        logger.addHandler(_shared_handler())
+
     return logger
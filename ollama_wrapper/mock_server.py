@@ -1,12 +1,8 @@
 """Mock server for Ollama API testing"""
 import time
-import requests
-from typing import Dict, Any, Generator, Optional
+from typing import Dict, Any, Generator, List, Optional
 
-import requests
-# from flask import Flask, request, jsonify
-# from ollama_wrapper import logger
-from ollama_wrapper.config import Config
+from .config import Config
 from .logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -17,6 +13,7 @@ class MockOllamaServer:
 
     def __init__(self):
         self.models = {}
+        self.blobs = {}
 
     def generate_response(
             self,
@@ -34,15 +31,17 @@ class MockOllamaServer:
             "done": True
         }
 
+        words = response["response"].split()
+        stats = self._eval_stats(len(prompt.split()), len(words))
         if stream:
             # Simulate streaming response
-            words = response["response"].split()
             for word in words:
                 time.sleep(0.1)  # Simulate delay
                 yield {**response, "response": word + " ", "done": False}
-            yield {**response, "done": True}
+            # Like Ollama, the final chunk carries no new text but the stats
+            yield {**response, "response": "", "done": True, **stats}
         else:
-            yield response
+            yield {**response, **stats}
 
     def chat_response(
             self,
@@ -63,8 +62,10 @@ class MockOllamaServer:
             "done": True
         }
 
+        words = response["message"]["content"].split()
+        prompt_words = sum(len((m.get("content") or "").split()) for m in messages)
+        stats = self._eval_stats(prompt_words, len(words))
         if stream:
-            words = response["message"]["content"].split()
             for word in words:
                 time.sleep(0.1)
                 yield {
@@ -74,9 +75,19 @@ class MockOllamaServer:
                     },
                     "done": False
                 }
-            yield {**response, "done": True}
+            yield {**response, "message": {"role": "assistant", "content": ""}, "done": True, **stats}
         else:
-            yield response
+            yield {**response, **stats}
+
+    @staticmethod
+    def _eval_stats(prompt_tokens: int, eval_tokens: int) -> Dict[str, int]:
+        """Token counts and durations as Ollama reports them on the final response"""
+        return {
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": prompt_tokens * 1_000_000,
+            "eval_count": eval_tokens,
+            "eval_duration": eval_tokens * 100_000_000,
+        }
 
     def create_model(self, model_name: str,
                      **kwargs) -> Generator[Dict[str, Any], None, None]:
@@ -157,11 +168,16 @@ class MockOllamaServer:
         return {"status": "success"}
 
     def pull_model(self, name: str, stream: bool = True) -> Generator:
-        """Mock pull model response"""
-        steps = ["downloading", "verifying", "extracting", "completed"]
-        for step in steps:
-            time.sleep(0.5)
-            yield {"status": f"{step} model {name}"}
+        """Mock pull model response with per-layer progress"""
+        yield {"status": "pulling manifest"}
+        layers = {"sha256:mocklayer1": 4000, "sha256:mocklayer2": 1000}
+        for digest, total in layers.items():
+            for completed in range(0, total + 1, total // 4):
+                time.sleep(0.05)
+                yield {"status": f"pulling {digest[7:19]}", "digest": digest,
+                       "total": total, "completed": completed}
+        for step in ["verifying sha256 digest", "writing manifest", "success"]:
+            yield {"status": step}
 
     def push_model(self, name: str, stream: bool = True) -> Generator:
         """Mock push model response"""
@@ -170,12 +186,36 @@ class MockOllamaServer:
             time.sleep(0.5)
             yield {"status": f"{step} model {name}"}
 
+    def blob_exists(self, digest: str) -> bool:
+        """Mock blob existence check"""
+        return digest in self.blobs
+
+    def create_blob(self, digest: str, content: Any) -> Dict[str, Any]:
+        """Mock blob upload response, consuming streamed content"""
+        if isinstance(content, (bytes, bytearray)):
+            size = len(content)
+        elif hasattr(content, "read"):
+            size = len(content.read())
+        else:
+            size = sum(len(chunk) for chunk in content or [])
+        self.blobs[digest] = size
+        return {"status": "success"}
+
     def create_embedding(self, model: str, prompt: str) -> Dict[str, Any]:
         """Mock embedding response"""
         if not model or not prompt:
             raise ValueError("Model and prompt are required")
         return {"embedding": [0.1, 0.2, 0.3, 0.4, 0.5]}  # Mock 5D embedding
 
+    def embed(self, model: str, inputs: List[str]) -> Dict[str, Any]:
+        """Mock batched embedding response"""
+        if not model or not inputs:
+            raise ValueError("Model and input are required")
+        return {
+            "model": model,
+            "embeddings": [[0.1, 0.2, 0.3, 0.4, 0.5] for _ in inputs]
+        }
+
     def get_version(self) -> Dict[str, Any]:
         """Mock version response"""
         return {"version": "0.1.0-mock"}
@@ -6,6 +6,7 @@ class Message(BaseModel):
     content: str
     images: Optional[List[str]] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
+    tool_name: Optional[str] = None
 
 class ModelOptions(BaseModel):
     temperature: Optional[float] = None
@@ -77,7 +78,9 @@ class GenerateResponse(BaseModel):
     context: Optional[List[int]] = None
     total_duration: Optional[int] = None
     load_duration: Optional[int] = None
+    prompt_eval_count: Optional[int] = None
     prompt_eval_duration: Optional[int] = None
+    eval_count: Optional[int] = None
     eval_duration: Optional[int] = None
 
 class ChatResponse(BaseModel):
@@ -87,7 +90,9 @@ class ChatResponse(BaseModel):
     done: bool
     total_duration: Optional[int] = None
     load_duration: Optional[int] = None
+    prompt_eval_count: Optional[int] = None
     prompt_eval_duration: Optional[int] = None
+    eval_count: Optional[int] = None
     eval_duration: Optional[int] = None
 
 class ModelInfo(BaseModel):
@@ -109,8 +114,11 @@ class ModelListResponse(BaseModel):
     models: List[ModelDetails]
 
 class ModelResponse(BaseModel):
-    status: str
+    status: str = ""
     error: Optional[str] = None
+    digest: Optional[str] = None
+    total: Optional[int] = None
+    completed: Optional[int] = None
 
 class ModelCopyRequest(BaseModel):
     source: str
@@ -0,0 +1,208 @@
+"""Instrumented connection pooling for the Ollama API sync client
+
+PooledHTTPAdapter is a requests HTTPAdapter whose urllib3 pools record
+connection churn in a shared PoolStats. The pools also:
+
+- bound how long a request waits for a connection in blocking mode
+  (urllib3 otherwise waits forever), raising EmptyPoolError on timeout;
+- close connections that have been idle longer than the keep-alive, so a
+  request never picks up a socket the server has already dropped.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from urllib3.poolmanager import PoolManager
+
+
+class PoolStats:
+    """Connection counters shared by the pools of one adapter"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.created = 0
+        self.discarded = 0
+        self.reaped = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record(self, waited: Optional[float] = None, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            if waited is not None:
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_use": self.in_use,
+                "created": self.created,
+                "discarded": self.discarded,
+                "reaped": self.reaped,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "wait_time_avg_ms": round(self.wait_time_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Stats, acquisition timeout and idle reaping for a urllib3 connection pool
+
+    ``configure`` must be called before the pool is used.
+    """
+
+    pool_stats: PoolStats
+    keepalive: Optional[float] = None
+    acquire_timeout: Optional[float] = None
+    _last_reap = 0.0
+
+    def configure(self, pool_stats: PoolStats, keepalive: Optional[float], acquire_timeout: Optional[float]) -> None:
+        self.pool_stats = pool_stats
+        self.keepalive = keepalive
+        self.acquire_timeout = acquire_timeout
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        self.pool_stats.record(created=1)
+        return conn
+
+    def _get_conn(self, timeout: Optional[float] = None):
+        started = time.monotonic()
+        try:
+            conn = super()._get_conn(timeout=self.acquire_timeout if timeout is None else timeout)
+        except EmptyPoolError:
+            self.pool_stats.record(waited=time.monotonic() - started, timeouts=1)
+            raise
+        now = time.monotonic()
+        released_at = getattr(conn, "released_at", None)
+        if self.keepalive and released_at is not None and now - released_at > self.keepalive and conn.sock is not None:
+            # Reconnects on use instead of reusing a socket the server may have closed
+            conn.close()
+            self.pool_stats.record(reaped=1)
+        self.pool_stats.record(waited=now - started, acquired=1, in_use=1)
+        return conn
+
+    def _put_conn(self, conn) -> None:
+        if conn is not None:
+            conn.released_at = time.monotonic()
+        # A non-blocking pool discards connections returned while it is full
+        full = self.pool is not None and self.pool.full()
+        super()._put_conn(conn)
+        self.pool_stats.record(in_use=-1, discarded=1 if full and conn is not None else 0)
+        self.reap_idle()
+
+    def idle_connections(self) -> int:
+        """Number of pooled connections holding an open socket"""
+        pool = self.pool
+        if pool is None:
+            return 0
+        with pool.mutex:
+            return sum(1 for conn in pool.queue if conn is not None and conn.sock is not None)
+
+    def reap_idle(self, force: bool = False) -> int:
+        """Close pooled connections idle for longer than the keep-alive
+
+        Runs at most every half keep-alive unless forced. Returns the number
+        of connections closed.
+        """
+        pool = self.pool
+        now = time.monotonic()
+        if not self.keepalive or pool is None or (not force and now - self._last_reap < self.keepalive / 2):
+            return 0
+        self._last_reap = now
+        stale = []
+        with pool.mutex:
+            for index, conn in enumerate(pool.queue):
+                if conn is not None and conn.sock is not None and now - getattr(conn, "released_at", now) > self.keepalive:
+                    # The empty slot makes the pool open a fresh connection when needed
+                    pool.queue[index] = None
+                    stale.append(conn)
+        for conn in stale:
+            conn.close()
+        if stale:
+            self.pool_stats.record(reaped=len(stale))
+        return len(stale)
+
+
+class InstrumentedHTTPConnectionPool(InstrumentedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class InstrumentedHTTPSConnectionPool(InstrumentedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _InstrumentedPoolManager(PoolManager):
+    def __init__(self, *args: Any, pool_stats: PoolStats, keepalive: Optional[float],
+                 acquire_timeout: Optional[float], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = pool_stats
+        self.keepalive = keepalive
+        self.acquire_timeout = acquire_timeout
+        self.pool_classes_by_scheme = {
+            "http": InstrumentedHTTPConnectionPool,
+            "https": InstrumentedHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.configure(self.pool_stats, self.keepalive, self.acquire_timeout)
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with connection pool metrics, acquisition timeout and idle reaping
+
+    With ``pool_block=True`` at most ``pool_maxsize`` connections per host
+    exist. A request waits up to ``acquire_timeout`` seconds for one and
+    then fails with EmptyPoolError. Without blocking, requests beyond
+    ``pool_maxsize`` open extra connections that are discarded afterwards,
+    and the ``discarded`` counter shows how often that happens.
+    """
+
+    def __init__(self, keepalive: Optional[float] = None, acquire_timeout: Optional[float] = None, **kwargs: Any):
+        # Set before HTTPAdapter.__init__, which builds the pool manager
+        self.keepalive = keepalive
+        self.acquire_timeout = acquire_timeout
+        self.pool_stats = PoolStats()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _InstrumentedPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            pool_stats=self.pool_stats,
+            keepalive=self.keepalive,
+            acquire_timeout=self.acquire_timeout,
+            **pool_kwargs
+        )
+
+    def connection_pools(self) -> List[InstrumentedPoolMixin]:
+        pools = self.poolmanager.pools
+        with pools.lock:
+            return list(pools._container.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the current number of idle connections"""
+        stats = self.pool_stats.snapshot()
+        stats["idle"] = sum(pool.idle_connections() for pool in self.connection_pools())
+        stats["maxsize"] = self._pool_maxsize
+        stats["block"] = self._pool_block
+        return stats
+
+    def reap_idle(self) -> int:
+        """Close every pooled connection idle for longer than the keep-alive"""
+        return sum(pool.reap_idle(force=True) for pool in self.connection_pools())
@@ -0,0 +1,225 @@
+"""Concurrent model pull orchestration for Ollama API"""
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, Set, Tuple
+
+from .async_client import AsyncOllamaClient
+from .exceptions import OllamaError, OllamaRequestError, OllamaResponseError, OllamaTimeoutError
+from .logger import setup_logger
+from .utils import validate_model_name
+
+logger = setup_logger(__name__)
+
+
+class PullProgress:
+    """Aggregated progress of one model pull on one backend
+
+    Ollama reports progress per layer digest; this folds those into a single
+    completed/total byte count for the whole model.
+    """
+
+    def __init__(self, model: str, backend: str):
+        self.model = model
+        self.backend = backend
+        self.status = "queued"
+        self.attempt = 0
+        self.error: Optional[str] = None
+        self.done = False
+        self._layers: Dict[str, Tuple[int, int]] = {}
+
+    def update(self, chunk: Dict[str, Any]) -> None:
+        """Fold one raw /api/pull progress chunk into the aggregate"""
+        status = chunk.get("status")
+        if status:
+            # "pulling <digest>" statuses are summarized by the byte counts
+            self.status = "downloading" if chunk.get("digest") else status
+        digest = chunk.get("digest")
+        if digest and chunk.get("total"):
+            self._layers[digest] = (chunk.get("completed", 0), chunk["total"])
+
+    @property
+    def completed(self) -> int:
+        return sum(done for done, _ in self._layers.values())
+
+    @property
+    def total(self) -> int:
+        return sum(total for _, total in self._layers.values())
+
+    @property
+    def percent(self) -> float:
+        total = self.total
+        return round(100.0 * self.completed / total, 1) if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        event = {
+            "model": self.model,
+            "backend": self.backend,
+            "status": self.status,
+            "completed": self.completed,
+            "total": self.total,
+            "percent": self.percent,
+            "attempt": self.attempt,
+            "done": self.done,
+        }
+        if self.error:
+            event["error"] = self.error
+        return event
+
+
+class _PullTask:
+    """A single in-flight pull shared by every caller that asked for it"""
+
+    def __init__(self, progress: PullProgress):
+        self.progress = progress
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self._last_percent = -1.0
+        self._last_status: Optional[str] = None
+        self._last_emit = 0.0
+
+    def publish(self, min_interval: float, force: bool = False) -> None:
+        """Send a snapshot to subscribers if it differs enough from the last one"""
+        progress = self.progress
+        now = time.monotonic()
+        changed = (
+            force
+            or progress.status != self._last_status
+            or progress.percent - self._last_percent >= 1.0
+            or (progress.percent != self._last_percent and now - self._last_emit >= min_interval)
+        )
+        if not changed:
+            return
+        self._last_percent = progress.percent
+        self._last_status = progress.status
+        self._last_emit = now
+        snapshot = progress.snapshot()
+        for queue in self.subscribers:
+            queue.put_nowait(snapshot)
+
+
+class PullOrchestrator:
+    """Pull several models across several Ollama backends concurrently
+
+    Concurrent requests for the same model on the same backend share one
+    upstream pull. Progress from every pull is merged into one stream of
+    compact per-model events. A pull whose connection drops is re-issued with
+    exponential backoff; Ollama resumes partially downloaded layers, so no
+    completed bytes are fetched again.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[AsyncOllamaClient],
+        max_concurrency: int = 2,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        progress_interval: float = 0.5
+    ):
+        """Initialize pull orchestrator
+        Args:
+            clients (Sequence[AsyncOllamaClient]): One client per backend
+            max_concurrency (int): Maximum simultaneous pulls per backend
+            max_retries (int): Reconnect attempts after a dropped pull
+            retry_delay (float): Initial delay between reconnects (doubles each time)
+            progress_interval (float): Minimum seconds between small progress updates
+        """
+        if not clients:
+            raise ValueError("At least one client is required")
+        self.clients = {client.base_url: client for client in clients}
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.progress_interval = progress_interval
+        self._inflight: Dict[Tuple[str, str], _PullTask] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def backends(self) -> List[str]:
+        return list(self.clients)
+
+    async def pull(
+        self,
+        models: Sequence[str],
+        backends: Optional[Sequence[str]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Pull models on backends, yielding merged progress events
+        Args:
+            models (Sequence[str]): Model names to pull
+            backends (Sequence[str], optional): Backend base URLs. Defaults to all backends.
+        Yields:
+            Dict[str, Any]: Compact progress events; each pull ends with ``done: True``
+        """
+        backends = list(backends or self.backends)
+        unknown = [backend for backend in backends if backend not in self.clients]
+        if unknown:
+            raise ValueError(f"Unknown backends: {', '.join(unknown)}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        joined: List[_PullTask] = []
+        for backend in backends:
+            for model in dict.fromkeys(validate_model_name(m) for m in models):
+                pull_task = self._join(backend, model)
+                pull_task.subscribers.add(queue)
+                queue.put_nowait(pull_task.progress.snapshot())
+                joined.append(pull_task)
+
+        try:
+            # Every joined pull publishes a final done event, so drain until all have
+            while not queue.empty() or any(not t.progress.done for t in joined):
+                yield await queue.get()
+        finally:
+            for pull_task in joined:
+                pull_task.subscribers.discard(queue)
+
+    def _join(self, backend: str, model: str) -> _PullTask:
+        """Return the in-flight pull for (backend, model), starting one if needed"""
+        key = (backend, model)
+        pull_task = self._inflight.get(key)
+        if pull_task is None:
+            pull_task = _PullTask(PullProgress(model, backend))
+            self._inflight[key] = pull_task
+            pull_task.task = asyncio.create_task(self._run(key, pull_task))
+        return pull_task
+
+    async def _run(self, key: Tuple[str, str], pull_task: _PullTask) -> None:
+        backend, model = key
+        client = self.clients[backend]
+        progress = pull_task.progress
+        semaphore = self._semaphores.setdefault(backend, asyncio.Semaphore(self.max_concurrency))
+        try:
+            async with semaphore:
+                while True:
+                    progress.attempt += 1
+                    try:
+                        await self._pull_once(client, model, pull_task)
+                        progress.status = "success"
+                        break
+                    except (OllamaResponseError, OllamaTimeoutError, OllamaRequestError) as e:
+                        retryable = not isinstance(e, OllamaRequestError) or not e.status_code or e.status_code >= 500
+                        if not retryable or progress.attempt > self.max_retries:
+                            raise
+                        delay = self.retry_delay * (2 ** (progress.attempt - 1))
+                        logger.warning(f"Pull of {model} on {backend} dropped ({str(e)}), resuming in {delay:.1f}s")
+                        progress.status = "reconnecting"
+                        pull_task.publish(self.progress_interval)
+                        await asyncio.sleep(delay)
+        except Exception as e:
+            logger.error(f"Pull of {model} on {backend} failed: {str(e)}")
+            progress.status = "error"
+            progress.error = str(e)
+        finally:
+            progress.done = True
+            pull_task.publish(self.progress_interval, force=True)
+            self._inflight.pop(key, None)
+
+    async def _pull_once(self, client: AsyncOllamaClient, model: str, pull_task: _PullTask) -> None:
+        stream = await client.pull_model(model, stream=True)
+        try:
+            async for chunk in stream:
+                if chunk.error:
+                    # Errors reported in-band (unknown model, auth) are not transient
+                    raise OllamaError(chunk.error)
+                pull_task.progress.update(chunk.model_dump(exclude_none=True))
+                pull_task.publish(self.progress_interval)
+        finally:
+            await stream.aclose()
@@ -0,0 +1,238 @@
+"""Cross-process rate limit storage for Ollama API
+
+Token buckets in RateLimiter and SyncRateLimiter live in one process, so N
+workers together allow N times the configured rate. A RateLimitStore holds
+the authoritative buckets where every worker can see them:
+
+- LocalRateLimitStore keeps them in this process. Use it in tests, or to
+  share one budget between several clients in one process.
+- SharedMemoryRateLimitStore keeps them in an mmap'd file (for example under
+  /dev/shm) shared by every process on the host. Each bucket is updated
+  under a byte-range lock on its own slot.
+
+Limiters only consult the store when their local lease of tokens runs out
+(see RateLimiter), so most acquisitions never leave the process.
+"""
+import abc
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; only LocalRateLimitStore works there
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+_HEADER = struct.Struct("<8sI")
+_MAGIC = b"OLRLIM02"
+# Key hash, available tokens, last refill and time the bucket is full again
+# (time.monotonic, which is CLOCK_MONOTONIC and therefore shared by all
+# processes on a Linux host)
+_SLOT = struct.Struct("<Qddd")
+
+
+class RateLimitStore(abc.ABC):
+    """Atomic token bucket operations keyed by string"""
+
+    @abc.abstractmethod
+    def take(self, key: str, rate: float, capacity: float, tokens: float, lease: float) -> Tuple[float, float]:
+        """Take tokens from a bucket, refilling it first
+
+        If at least ``tokens`` are available, up to ``lease`` (but never
+        fewer than ``tokens``) are granted immediately. Otherwise exactly
+        ``tokens`` are reserved, leaving the bucket in debt, and the caller
+        must wait until the debt is repaid before proceeding.
+        Args:
+            key (str): Bucket key
+            rate (float): Tokens added per second
+            capacity (float): Maximum tokens held
+            tokens (float): Tokens needed now
+            lease (float): Tokens to take at once when available
+        Returns:
+            Tuple[float, float]: (tokens granted, seconds to wait)
+        """
+
+    @staticmethod
+    def _take(available: float, last: float, now: float, rate: float, capacity: float,
+              tokens: float, lease: float) -> Tuple[float, float, float]:
+        """Pure bucket update; returns (new available, granted, wait)"""
+        # A table that outlived a reboot holds stamps from the old clock
+        available = min(capacity, available + max(0.0, now - last) * rate)
+        if available >= tokens:
+            granted = min(available, max(tokens, lease))
+            return available - granted, granted, 0.0
+        return available - tokens, tokens, (tokens - available) / rate
+
+
+class LocalRateLimitStore(RateLimitStore):
+    """In-process store; the stand-in for a shared store in tests"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float, tokens: float, lease: float) -> Tuple[float, float]:
+        with self._lock:
+            now = time.monotonic()
+            available, last = self._buckets.get(key, (capacity, now))
+            available, granted, wait = self._take(available, last, now, rate, capacity, tokens, lease)
+            self._buckets[key] = (available, now)
+        return granted, wait
+
+
+class SharedMemoryRateLimitStore(RateLimitStore):
+    """Buckets in a memory-mapped file shared by all processes on the host
+
+    The file holds a fixed table of ``slots`` buckets addressed by key hash
+    with linear probing. POSIX record locks exclude other processes but not
+    other threads, so a thread lock is held as well. A new key may take over
+    the slot of a bucket that has refilled completely, since a full bucket
+    is the same as a new one. Only if every slot is in use do keys fall back
+    to a bucket private to this process, which is logged as an error.
+    """
+
+    def __init__(self, path: str, slots: int = 1024):
+        """Open or create the shared table
+        Args:
+            path (str): File backing the table, e.g. /dev/shm/ollama-rate-limits
+            slots (int): Number of buckets when creating the file
+        """
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryRateLimitStore requires fcntl (POSIX)")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()
+        self._overflow = LocalRateLimitStore()
+
+        # Initialize the header once, under a whole-file lock
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size and header.startswith(_MAGIC):
+                _, slots = _HEADER.unpack(header)
+            else:
+                os.ftruncate(self._fd, _HEADER.size + slots * _SLOT.size)
+                os.pwrite(self._fd, bytes(slots * _SLOT.size), _HEADER.size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, slots), 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self.slots = slots
+        self._map = mmap.mmap(self._fd, _HEADER.size + slots * _SLOT.size)
+        # Slot index by key, so probing happens once per key per process
+        self._slot_cache: Dict[str, int] = {}
+        self._overflow_keys: set = set()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _lock_slot(self, index: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT.size, self._offset(index))
+
+    def _unlock_slot(self, index: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT.size, self._offset(index))
+
+    def take(self, key: str, rate: float, capacity: float, tokens: float, lease: float) -> Tuple[float, float]:
+        key_hash = self._hash(key)
+        with self._thread_lock:
+            index = self._slot_cache.get(key)
+            if index is not None:
+                result = self._take_slot(index, key_hash, rate, capacity, tokens, lease)
+                if result is not None:
+                    return result
+                # The slot was taken over by another key while this one was idle
+                del self._slot_cache[key]
+
+            reclaimable = None
+            home = key_hash % self.slots
+            for probe in range(home, home + self.slots):
+                index = probe % self.slots
+                result = self._take_slot(index, key_hash, rate, capacity, tokens, lease, claim_empty=True)
+                if result is not None:
+                    self._slot_cache[key] = index
+                    return result
+                if reclaimable is None and self._reclaimable(index):
+                    reclaimable = index
+            if reclaimable is not None:
+                result = self._take_slot(reclaimable, key_hash, rate, capacity, tokens, lease, reclaim=True)
+                if result is not None:
+                    self._slot_cache[key] = reclaimable
+                    return result
+
+        if key not in self._overflow_keys:
+            self._overflow_keys.add(key)
+            logger.error(
+                f"Rate limit table {self.path} is full; {key!r} is limited per process, "
+                f"not across processes. Use a larger table."
+            )
+        return self._overflow.take(key, rate, capacity, tokens, lease)
+
+    def _take_slot(
+        self,
+        index: int,
+        key_hash: int,
+        rate: float,
+        capacity: float,
+        tokens: float,
+        lease: float,
+        claim_empty: bool = False,
+        reclaim: bool = False
+    ) -> Optional[Tuple[float, float]]:
+        """Take tokens from the bucket in a slot if it holds the key (or may be claimed)
+
+        Returns None, leaving the slot untouched, if it belongs to another key.
+        """
+        offset = self._offset(index)
+        self._lock_slot(index)
+        try:
+            slot_hash, available, last, full_at = _SLOT.unpack_from(self._map, offset)
+            now = time.monotonic()
+            if slot_hash != key_hash:
+                claimable = (slot_hash == 0 and claim_empty) or (reclaim and self._idle(last, full_at, now))
+                if not claimable:
+                    return None
+                available, last = capacity, now
+            available, granted, wait = self._take(available, last, now, rate, capacity, tokens, lease)
+            full_at = now + max(0.0, capacity - available) / rate
+            _SLOT.pack_into(self._map, offset, key_hash, available, now, full_at)
+            return granted, wait
+        finally:
+            self._unlock_slot(index)
+
+    def _reclaimable(self, index: int) -> bool:
+        _, _, last, full_at = _SLOT.unpack_from(self._map, self._offset(index))
+        return self._idle(last, full_at, time.monotonic())
+
+    @staticmethod
+    def _idle(last: float, full_at: float, now: float) -> bool:
+        # Refilled completely, or stamped before a reboot reset the clock
+        return now >= full_at or last > now
+
+    def close(self) -> None:
+        with self._thread_lock:
+            self._map.close()
+            os.close(self._fd)
+
+
+_shared_stores: Dict[str, SharedMemoryRateLimitStore] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def shared_store(path: str) -> SharedMemoryRateLimitStore:
+    """Return this process's store for a shared table, opening it once"""
+    with _shared_stores_lock:
+        if path not in _shared_stores:
+            _shared_stores[path] = SharedMemoryRateLimitStore(path)
+        return _shared_stores[path]
@@ -0,0 +1,298 @@
+"""Traffic capture and replay for Ollama API"""
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple, Union
+
+from .exceptions import OllamaRequestError
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _open_trace(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _request_key(method: str, endpoint: str, data: Optional[Dict[str, Any]]) -> str:
+    payload = json.dumps(data or {}, sort_keys=True, separators=(",", ":"))
+    return f"{method} {endpoint} {hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class TraceRecorder:
+    """Append request/response exchanges to a JSONL trace file
+
+    Each line holds the method, endpoint and JSON payload of one request
+    plus either the response body (with its latency), the error, or for
+    streams every NDJSON chunk paired with the milliseconds since the
+    previous one (the first since the request was sent). Paths ending in
+    ``.gz`` are gzip compressed. Raw upload bodies are not recorded.
+
+    Entries are queued and written by a writer thread, so recording never
+    blocks a request thread or the event loop on file I/O. Clients share
+    one recorder per path (see shared_recorder); each one that opened it
+    must close it, and the file is closed after the last.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open_trace(path, "a")
+        self._queue: queue.Queue = queue.Queue()
+        self._users = 1
+        self._writer = threading.Thread(target=self._write_entries, name="trace-recorder", daemon=True)
+        self._writer.start()
+        logger.info(f"Recording Ollama traffic to {path}")
+
+    def record(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        started: float,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[OllamaRequestError] = None
+    ) -> None:
+        """Record a buffered exchange or a failed request"""
+        entry = self._entry(method, endpoint, data, stream=False)
+        entry["elapsed_ms"] = _ms(time.monotonic() - started)
+        if error is not None:
+            entry["error"] = str(error)
+            entry["status_code"] = error.status_code
+        else:
+            entry["response"] = response
+        self._write(entry)
+
+    def record_stream(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        started: float,
+        chunks: List[Tuple[float, Dict[str, Any]]],
+        complete: bool
+    ) -> None:
+        """Record a streamed exchange from (arrival time, chunk) pairs"""
+        entry = self._entry(method, endpoint, data, stream=True)
+        timed = []
+        previous = started
+        for arrived, chunk in chunks:
+            timed.append([_ms(arrived - previous), chunk])
+            previous = arrived
+        entry["chunks"] = timed
+        if not complete:
+            entry["truncated"] = True
+        self._write(entry)
+
+    def wrap_stream(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        started: float,
+        stream: Generator[Dict[str, Any], None, None]
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Pass a chunk stream through, recording it once it ends"""
+        chunks: List[Tuple[float, Dict[str, Any]]] = []
+        complete = False
+        try:
+            for chunk in stream:
+                chunks.append((time.monotonic(), chunk))
+                yield chunk
+            complete = True
+        finally:
+            stream.close()
+            self.record_stream(method, endpoint, data, started, chunks, complete)
+
+    async def wrap_async_stream(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        started: float,
+        stream: AsyncGenerator[Dict[str, Any], None]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Async variant of wrap_stream"""
+        chunks: List[Tuple[float, Dict[str, Any]]] = []
+        complete = False
+        try:
+            async for chunk in stream:
+                chunks.append((time.monotonic(), chunk))
+                yield chunk
+            complete = True
+        finally:
+            await stream.aclose()
+            self.record_stream(method, endpoint, data, started, chunks, complete)
+
+    def _entry(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], stream: bool) -> Dict[str, Any]:
+        return {
+            "ts": time.time(),
+            "method": method,
+            "endpoint": endpoint,
+            "request": data,
+            "stream": stream,
+        }
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        # Serialized now, since callers may still mutate the chunks they were given
+        self._queue.put(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _write_entries(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            try:
+                self._file.write(line)
+                # Flush once the backlog is written, not after every line
+                if self._queue.empty():
+                    self._file.flush()
+            except Exception as e:
+                logger.error(f"Error writing trace to {self.path}: {str(e)}")
+        self._file.close()
+
+    def close(self) -> None:
+        """Release this user's hold; the last one flushes and closes the file"""
+        with _recorders_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            if _recorders.get(self.path) is self:
+                del _recorders[self.path]
+        self._queue.put(None)
+        self._writer.join()
+
+
+_recorders: Dict[str, TraceRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def shared_recorder(path: str) -> TraceRecorder:
+    """Return this process's recorder for a trace file, opening it once
+
+    Separate recorders for one file would interleave partial lines.
+    """
+    path = os.path.abspath(path)
+    with _recorders_lock:
+        recorder = _recorders.get(path)
+        if recorder is None:
+            recorder = _recorders[path] = TraceRecorder(path)
+        else:
+            recorder._users += 1
+        return recorder
+
+
+class TraceReplayer:
+    """Serve recorded traces in place of an Ollama server
+
+    A request is answered by a trace with the same method, endpoint and
+    payload. If none exists, the traces recorded for that endpoint are used
+    in turn. Matching traces are cycled through, so repeated requests
+    replay every recorded variant. Latency is reproduced scaled by
+    ``1 / speed``. A speed of 0 or ``math.inf`` replays as fast as possible.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._exact: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_endpoint: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        count = 0
+        with _open_trace(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._exact.setdefault(
+                    _request_key(entry["method"], entry["endpoint"], entry.get("request")), []
+                ).append(entry)
+                self._by_endpoint.setdefault(f"{entry['method']} {entry['endpoint']}", []).append(entry)
+                count += 1
+        logger.info(f"Loaded {count} recorded exchanges from {path}")
+
+    def _scale(self, delay_ms: float) -> float:
+        if self.speed <= 0 or math.isinf(self.speed):
+            return 0.0
+        return delay_ms / 1000 / self.speed
+
+    def _match(self, method: str, endpoint: str, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        key = _request_key(method, endpoint, data)
+        candidates = self._exact.get(key)
+        if not candidates:
+            key = f"{method} {endpoint}"
+            candidates = self._by_endpoint.get(key)
+        if not candidates:
+            raise OllamaRequestError(f"No recorded trace for {method} {endpoint}", status_code=404)
+        with self._lock:
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+        return candidates[index % len(candidates)]
+
+    @staticmethod
+    def _result(entry: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in entry:
+            raise OllamaRequestError(entry["error"], status_code=entry.get("status_code"))
+        if "response" in entry:
+            return entry["response"]
+        # Buffered request answered from a streamed trace: the last chunk
+        # carries the final state
+        chunks = entry.get("chunks") or []
+        return chunks[-1][1] if chunks else {}
+
+    @staticmethod
+    def _chunks(entry: Dict[str, Any]) -> List[List[Any]]:
+        if "chunks" in entry:
+            return entry["chunks"]
+        return [[entry.get("elapsed_ms", 0), TraceReplayer._result(entry)]]
+
+    def replay(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        stream: bool = False
+    ) -> Union[Dict[str, Any], Generator[Dict[str, Any], None, None]]:
+        """Answer a request from the trace, sleeping to reproduce its timing"""
+        entry = self._match(method, endpoint, data)
+        if stream:
+            return self._replay_stream(entry)
+        time.sleep(self._scale(entry.get("elapsed_ms", 0)))
+        return self._result(entry)
+
+    def _replay_stream(self, entry: Dict[str, Any]) -> Generator[Dict[str, Any], None, None]:
+        for delay_ms, chunk in self._chunks(entry):
+            time.sleep(self._scale(delay_ms))
+            yield chunk
+
+    async def areplay(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        stream: bool = False
+    ) -> Union[Dict[str, Any], AsyncGenerator[Dict[str, Any], None]]:
+        """Async variant of replay"""
+        entry = self._match(method, endpoint, data)
+        if stream:
+            return self._areplay_stream(entry)
+        await asyncio.sleep(self._scale(entry.get("elapsed_ms", 0)))
+        return self._result(entry)
+
+    async def _areplay_stream(self, entry: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+        for delay_ms, chunk in self._chunks(entry):
+            await asyncio.sleep(self._scale(delay_ms))
+            yield chunk
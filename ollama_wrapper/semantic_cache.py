@@ -0,0 +1,270 @@
+"""Semantic response cache for Ollama API"""
+import copy
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Sequence, Tuple
+
+from .config import Config
+from .logger import setup_logger
+
+try:
+    import numpy as np
+except ImportError:  # Optional (the semantic-cache extra); similarity search falls back to pure Python
+    np = None
+
+logger = setup_logger(__name__)
+_fallback_logged = False
+
+# Request fields that change the answer for the same prompt; requests that
+# differ in any of them never share cached responses
+_NAMESPACE_FIELDS = ("system", "template", "format", "options", "raw", "suffix")
+# Response fields describing the inference that produced a response
+_INFERENCE_STATS = (
+    "total_duration", "load_duration", "prompt_eval_count",
+    "prompt_eval_duration", "eval_count", "eval_duration",
+)
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+class _Namespace:
+    """Embeddings and responses for one model and parameter set
+
+    Entries live in fixed slots. With numpy the normalized embeddings form
+    one matrix, so a lookup is a single matrix-vector product. When full, the
+    least recently used slot is overwritten.
+    """
+
+    def __init__(self, dimensions: int, max_entries: int):
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.responses: List[Dict[str, Any]] = []
+        self.last_used: List[int] = []
+        self.vectors: Any = np.empty((min(max_entries, 64), dimensions), dtype=np.float32) if np is not None else []
+
+    def nearest(self, vector: Sequence[float]) -> Tuple[int, float]:
+        size = len(self.responses)
+        if np is not None:
+            scores = self.vectors[:size] @ np.asarray(vector, dtype=np.float32)
+            index = int(np.argmax(scores))
+            return index, float(scores[index])
+        global _fallback_logged
+        if not _fallback_logged:
+            _fallback_logged = True
+            logger.warning(
+                "numpy is not installed; semantic cache lookups scan every entry in Python. "
+                "Install the semantic-cache extra for vectorized search."
+            )
+        scores = [sum(a * b for a, b in zip(row, vector)) for row in self.vectors]
+        index = max(range(size), key=scores.__getitem__)
+        return index, scores[index]
+
+    def add(self, vector: Sequence[float], response: Dict[str, Any], tick: int) -> None:
+        size = len(self.responses)
+        if size < self.max_entries:
+            index = size
+            self.responses.append(response)
+            self.last_used.append(tick)
+        else:
+            index = min(range(size), key=self.last_used.__getitem__)
+            self.responses[index] = response
+            self.last_used[index] = tick
+        if np is None:
+            if index == len(self.vectors):
+                self.vectors.append(list(vector))
+            else:
+                self.vectors[index] = list(vector)
+            return
+        if index == len(self.vectors):
+            grown = np.empty((min(self.max_entries, 2 * len(self.vectors)), self.dimensions), dtype=np.float32)
+            grown[:index] = self.vectors
+            self.vectors = grown
+        self.vectors[index] = vector
+
+
+class SemanticCache:
+    """Answer generate and chat requests from earlier responses to similar prompts
+
+    The prompt (for chat, the latest user message) is embedded with
+    ``embedding_model`` and compared by cosine similarity with the prompts
+    already answered in the same namespace. A namespace is one model plus the
+    request fields that change the answer (system prompt, template, format,
+    options) and, for chat, a hash of every message before the latest, so a
+    long shared history cannot make different questions look alike. A match
+    at or above ``threshold`` returns the cached response without a
+    generation. Each namespace keeps at most ``max_entries`` responses,
+    evicting the least recently used, and at most ``max_namespaces``
+    namespaces are kept.
+
+    Requests with images, tools or a context are never cached. Streams are
+    stored once they finish; a cache hit on a streaming request is
+    delivered as a single final chunk.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str = Config.SEMANTIC_CACHE_MODEL,
+        threshold: float = Config.SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = Config.SEMANTIC_CACHE_SIZE,
+        max_namespaces: int = 64
+    ):
+        """Initialize cache
+        Args:
+            embedding_model (str): Model used to embed prompts
+            threshold (float): Minimum cosine similarity for a hit
+            max_entries (int): Responses kept per namespace
+            max_namespaces (int): Namespaces kept; the least recently used is dropped
+        """
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+        self.hits = 0
+        self.misses = 0
+        self._namespaces: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._models: Dict[str, str] = {}
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def key(self, endpoint: str, data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Return (namespace, text to embed) for a request, or None if it is not cacheable"""
+        if endpoint == Config.CHAT_ENDPOINT:
+            messages = data.get("messages") or []
+            if data.get("tools") or any(m.get("images") or m.get("tool_calls") for m in messages):
+                return None
+            if not messages or messages[-1].get("role") != "user":
+                return None
+            text = messages[-1].get("content") or ""
+            history = messages[:-1]
+        elif endpoint == Config.GENERATE_ENDPOINT:
+            if data.get("images") or data.get("context"):
+                return None
+            text = data.get("prompt", "")
+            history = None
+        else:
+            return None
+        if not text.strip():
+            return None
+        params = {field: data.get(field) for field in _NAMESPACE_FIELDS}
+        params["history"] = history
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        return f"{endpoint} {data.get('model')} {digest}", text
+
+    def lookup(self, namespace: str, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response closest to the embedding, if close enough"""
+        vector = _normalize(embedding)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None or not entries.responses or entries.dimensions != len(vector):
+                self.misses += 1
+                return None
+            index, similarity = entries.nearest(vector)
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._tick += 1
+            entries.last_used[index] = self._tick
+            self._namespaces.move_to_end(namespace)
+            self.hits += 1
+            response = copy.deepcopy(entries.responses[index])
+        # A cached answer used no inference, so it reports no timings or counts
+        for field in _INFERENCE_STATS:
+            response.pop(field, None)
+        logger.debug(f"Semantic cache hit in {namespace} (similarity {similarity:.3f})")
+        return response
+
+    def store(self, namespace: str, embedding: Sequence[float], response: Dict[str, Any]) -> None:
+        """Cache a complete response under the prompt's embedding"""
+        vector = _normalize(embedding)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None or entries.dimensions != len(vector):
+                # New namespace, or the embedding model changed dimensions
+                entries = _Namespace(len(vector), self.max_entries)
+                self._namespaces[namespace] = entries
+                while len(self._namespaces) > self.max_namespaces:
+                    self._namespaces.popitem(last=False)
+            self._namespaces.move_to_end(namespace)
+            self._tick += 1
+            entries.add(vector, copy.deepcopy(response), self._tick)
+
+    def clear(self, model: Optional[str] = None) -> None:
+        """Drop every namespace, or only those of one model"""
+        with self._lock:
+            if model is None:
+                self._namespaces.clear()
+                return
+            for namespace in [n for n in self._namespaces if n.split(" ")[1] == model]:
+                del self._namespaces[namespace]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the number of cached responses"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "namespaces": len(self._namespaces),
+                "entries": sum(len(n.responses) for n in self._namespaces.values()),
+            }
+
+    @staticmethod
+    def _final_response(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge streamed chunks into the response a buffered request would return"""
+        final = dict(chunks[-1])
+        if "message" in final:
+            final["message"] = dict(final["message"], content="".join(
+                (c.get("message") or {}).get("content", "") for c in chunks
+            ))
+        else:
+            final["response"] = "".join(c.get("response", "") for c in chunks)
+        return final
+
+    def wrap_stream(
+        self,
+        namespace: str,
+        embedding: Sequence[float],
+        stream: Generator[Dict[str, Any], None, None]
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Pass a chunk stream through, caching it if it runs to completion"""
+        chunks = []
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            stream.close()
+        if chunks and chunks[-1].get("done"):
+            self.store(namespace, embedding, self._final_response(chunks))
+
+    async def wrap_async_stream(
+        self,
+        namespace: str,
+        embedding: Sequence[float],
+        stream: AsyncGenerator[Dict[str, Any], None]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Async variant of wrap_stream"""
+        chunks = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await stream.aclose()
+        if chunks and chunks[-1].get("done"):
+            self.store(namespace, embedding, self._final_response(chunks))
+
+    @staticmethod
+    def as_stream(response: Dict[str, Any]) -> Generator[Dict[str, Any], None, None]:
+        """Deliver a cached response to a streaming caller"""
+        yield response
+
+    @staticmethod
+    async def as_async_stream(response: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+        """Async variant of as_stream"""
+        yield response
@@ -0,0 +1,486 @@
+"""Streaming structured output validation for Ollama API"""
+import json
+import re
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Set, Union
+
+from .config import Config
+from .exceptions import OllamaStructuredOutputError, OllamaValidationError
+from .logger import setup_logger
+from .models import ChatRequest, ChatResponse, GenerateRequest, GenerateResponse
+
+logger = setup_logger(__name__)
+
+_NUMBER_PREFIX_RE = re.compile(r"-?(0|[1-9]\d*)?(\.\d*)?([eE][+-]?\d*)?")
+_NUMBER_RE = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_NUMBER_CHARS = set("0123456789+-.eE")
+_LITERALS = {"true": True, "false": False, "null": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = set(" \t\r\n")
+
+# Parser states between tokens
+_VALUE = "value"
+_ARRAY_FIRST = "array_first"
+_ARRAY_NEXT = "array_next"
+_OBJECT_FIRST = "object_first"
+_OBJECT_KEY = "object_key"
+_OBJECT_COLON = "object_colon"
+_OBJECT_NEXT = "object_next"
+_DONE = "done"
+
+
+def schema_from_format(format: Optional[Union[str, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Return the schema to validate against for a request ``format`` field
+
+    ``"json"`` only requires well-formed JSON, so it maps to the empty schema.
+    Returns None when the request has no structured output format.
+    """
+    if isinstance(format, dict):
+        return format
+    if format == "json":
+        return {}
+    return None
+
+
+def _types(schema: Dict[str, Any]) -> Optional[Set[str]]:
+    declared = schema.get("type")
+    if declared is None:
+        return None
+    types = set(declared) if isinstance(declared, list) else {declared}
+    if "integer" in types:
+        types.add("number")
+    return types
+
+
+class _Frame:
+    """An open object or array"""
+
+    def __init__(self, kind: str, schema: Dict[str, Any], path: str):
+        self.kind = kind
+        self.schema = schema
+        self.path = path
+        self.count = 0
+        self.keys: Set[str] = set()
+
+
+class _Scalar:
+    """A string, number or literal being read"""
+
+    def __init__(self, kind: str, schema: Dict[str, Any], path: str, is_key: bool = False):
+        self.kind = kind
+        self.schema = schema
+        self.path = path
+        self.is_key = is_key
+        self.chars: List[str] = []
+        self.escape = False
+        self.unicode: Optional[str] = None
+
+
+class StreamingJSONValidator:
+    """Incremental JSON parser that checks a document against a schema
+
+    Text is fed as it is generated. ``feed`` raises OllamaStructuredOutputError
+    at the first character after which no continuation could produce a
+    conforming document. For example: a syntax error, a value of the wrong
+    type, a string outside ``enum``, a key rejected by
+    ``additionalProperties: false``, or too many array items. Constraints
+    that can only be judged on a complete value (``required``, ``minItems``,
+    ``minimum``) are checked as soon as that value closes.
+
+    Supported keywords: type, properties, required, additionalProperties,
+    items, enum, const, minLength, maxLength, minItems, maxItems, minimum,
+    maximum. Subschemas using other combinators (anyOf, oneOf, $ref) are
+    only checked for well-formed JSON.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self.schema = schema or {}
+        self._parts: List[str] = []
+        self._length = 0
+        self._state = _VALUE
+        self._value_schema = self.schema
+        self._value_path = "$"
+        self._stack: List[_Frame] = []
+        self._scalar: Optional[_Scalar] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return "".join(self._parts)
+
+    @property
+    def complete(self) -> bool:
+        """Whether a full top-level value has been read"""
+        return self._state == _DONE and self._scalar is None
+
+    def feed(self, text: str) -> None:
+        """Consume the next piece of generated text"""
+        self._parts.append(text)
+        for ch in text:
+            self._length += 1
+            if self._scalar is not None and self._feed_scalar(ch):
+                continue
+            self._feed_structural(ch)
+
+    def finish(self) -> Any:
+        """Check that the document is complete and return the parsed value"""
+        if self._scalar is not None and self._scalar.kind == "number":
+            self._end_scalar()
+        if not self.complete:
+            self._fail("Output ended before the JSON document was complete", self._value_path)
+        return json.loads(self.text)
+
+    def _fail(self, message: str, path: str) -> None:
+        raise OllamaStructuredOutputError(
+            f"{message} at {path} (character {self._length})",
+            path=path,
+            position=self._length
+        )
+
+    # Structure
+
+    def _feed_structural(self, ch: str) -> None:
+        if ch in _WHITESPACE:
+            return
+        state = self._state
+        frame = self._stack[-1] if self._stack else None
+
+        if state == _ARRAY_FIRST and ch == "]":
+            self._close(frame)
+        elif state in (_VALUE, _ARRAY_FIRST):
+            if state == _ARRAY_FIRST and frame.schema.get("maxItems") == 0:
+                self._fail("Array has more than 0 items", frame.path)
+            self._start_value(ch)
+        elif state == _ARRAY_NEXT:
+            if ch == ",":
+                self._expect_item(frame)
+            elif ch == "]":
+                self._close(frame)
+            else:
+                self._fail(f"Expected ',' or ']' but got {ch!r}", frame.path)
+        elif state in (_OBJECT_FIRST, _OBJECT_KEY):
+            if ch == '"':
+                self._scalar = _Scalar("string", frame.schema, frame.path, is_key=True)
+            elif ch == "}" and state == _OBJECT_FIRST:
+                self._close(frame)
+            else:
+                self._fail(f"Expected an object key but got {ch!r}", frame.path)
+        elif state == _OBJECT_COLON:
+            if ch != ":":
+                self._fail(f"Expected ':' but got {ch!r}", frame.path)
+            self._state = _VALUE
+        elif state == _OBJECT_NEXT:
+            if ch == ",":
+                self._state = _OBJECT_KEY
+            elif ch == "}":
+                self._close(frame)
+            else:
+                self._fail(f"Expected ',' or '}}' but got {ch!r}", frame.path)
+        else:
+            self._fail(f"Unexpected {ch!r} after the JSON document", "$")
+
+    def _start_value(self, ch: str) -> None:
+        schema, path = self._value_schema, self._value_path
+        if ch == "{":
+            kind = "object"
+        elif ch == "[":
+            kind = "array"
+        elif ch == '"':
+            kind = "string"
+        elif ch == "-" or ch.isdigit():
+            kind = "number"
+        elif ch in "tf":
+            kind = "boolean"
+        elif ch == "n":
+            kind = "null"
+        else:
+            self._fail(f"Expected a value but got {ch!r}", path)
+
+        allowed = _types(schema)
+        if allowed is not None and kind not in allowed:
+            declared = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            self._fail(f"Expected {' or '.join(declared)} but got {kind}", path)
+
+        if kind == "object":
+            self._stack.append(_Frame("object", schema, path))
+            self._state = _OBJECT_FIRST
+        elif kind == "array":
+            frame = _Frame("array", schema, path)
+            self._stack.append(frame)
+            self._value_schema = schema.get("items") if isinstance(schema.get("items"), dict) else {}
+            self._value_path = f"{path}[0]"
+            self._state = _ARRAY_FIRST
+            frame.count = 1
+        else:
+            self._scalar = _Scalar("literal" if kind in ("boolean", "null") else kind, schema, path)
+            if kind != "string":
+                self._feed_scalar(ch)
+
+    def _expect_item(self, frame: _Frame) -> None:
+        max_items = frame.schema.get("maxItems")
+        if max_items is not None and frame.count >= max_items:
+            self._fail(f"Array has more than {max_items} items", frame.path)
+        self._value_schema = frame.schema.get("items") if isinstance(frame.schema.get("items"), dict) else {}
+        self._value_path = f"{frame.path}[{frame.count}]"
+        frame.count += 1
+        self._state = _VALUE
+
+    def _close(self, frame: _Frame) -> None:
+        schema = frame.schema
+        if frame.kind == "object":
+            missing = [key for key in schema.get("required", []) if key not in frame.keys]
+            if missing:
+                self._fail(f"Missing required properties {missing}", frame.path)
+        else:
+            if self._state == _ARRAY_FIRST:
+                frame.count = 0
+            min_items = schema.get("minItems")
+            if min_items is not None and frame.count < min_items:
+                self._fail(f"Array has fewer than {min_items} items", frame.path)
+        self._stack.pop()
+        self._value_done()
+
+    def _value_done(self) -> None:
+        if not self._stack:
+            self._state = _DONE
+            return
+        parent = self._stack[-1]
+        if parent.kind == "object":
+            self._state = _OBJECT_NEXT
+        else:
+            max_items = parent.schema.get("maxItems")
+            if max_items is not None and parent.count > max_items:
+                self._fail(f"Array has more than {max_items} items", parent.path)
+            self._state = _ARRAY_NEXT
+
+    # Scalars
+
+    def _feed_scalar(self, ch: str) -> bool:
+        """Feed one character to the open scalar; False if it ended before ch"""
+        scalar = self._scalar
+        if scalar.kind == "string":
+            self._feed_string(scalar, ch)
+            return True
+        if scalar.kind == "number":
+            if ch not in _NUMBER_CHARS:
+                self._end_scalar()
+                return False
+            scalar.chars.append(ch)
+            if not _NUMBER_PREFIX_RE.fullmatch("".join(scalar.chars)):
+                self._fail("Malformed number", scalar.path)
+            return True
+        scalar.chars.append(ch)
+        prefix = "".join(scalar.chars)
+        if not any(literal.startswith(prefix) for literal in _LITERALS):
+            self._fail(f"Invalid literal {prefix!r}", scalar.path)
+        if prefix in _LITERALS:
+            self._end_scalar()
+        return True
+
+    def _feed_string(self, scalar: _Scalar, ch: str) -> None:
+        if scalar.unicode is not None:
+            if ch not in "0123456789abcdefABCDEF":
+                self._fail("Invalid unicode escape", scalar.path)
+            scalar.unicode += ch
+            if len(scalar.unicode) == 4:
+                scalar.chars.append(chr(int(scalar.unicode, 16)))
+                scalar.unicode = None
+                self._check_string_prefix(scalar)
+            return
+        if scalar.escape:
+            scalar.escape = False
+            if ch == "u":
+                scalar.unicode = ""
+                return
+            if ch not in _ESCAPES:
+                self._fail(f"Invalid escape \\{ch}", scalar.path)
+            scalar.chars.append(_ESCAPES[ch])
+        elif ch == "\\":
+            scalar.escape = True
+            return
+        elif ch == '"':
+            self._end_scalar()
+            return
+        elif ord(ch) < 0x20:
+            self._fail("Unescaped control character in string", scalar.path)
+        else:
+            scalar.chars.append(ch)
+        self._check_string_prefix(scalar)
+
+    def _check_string_prefix(self, scalar: _Scalar) -> None:
+        value = "".join(scalar.chars)
+        if scalar.is_key:
+            schema = scalar.schema
+            if schema.get("additionalProperties") is False:
+                if not any(name.startswith(value) for name in schema.get("properties", {})):
+                    self._fail(f"Property {value!r} is not allowed", scalar.path)
+            return
+        schema = scalar.schema
+        max_length = schema.get("maxLength")
+        if max_length is not None and len(value) > max_length:
+            self._fail(f"String is longer than {max_length} characters", scalar.path)
+        options = self._string_options(schema)
+        if options is not None and not any(option.startswith(value) for option in options):
+            self._fail(f"{value!r} does not match any allowed value", scalar.path)
+
+    @staticmethod
+    def _string_options(schema: Dict[str, Any]) -> Optional[List[str]]:
+        if "const" in schema:
+            return [schema["const"]] if isinstance(schema["const"], str) else []
+        if "enum" in schema:
+            return [option for option in schema["enum"] if isinstance(option, str)]
+        return None
+
+    def _end_scalar(self) -> None:
+        scalar = self._scalar
+        self._scalar = None
+        raw = "".join(scalar.chars)
+        schema = scalar.schema
+
+        if scalar.is_key:
+            frame = self._stack[-1]
+            frame.keys.add(raw)
+            properties = schema.get("properties", {})
+            additional = schema.get("additionalProperties")
+            if raw in properties:
+                self._value_schema = properties[raw]
+            elif additional is False:
+                self._fail(f"Property {raw!r} is not allowed", frame.path)
+            else:
+                self._value_schema = additional if isinstance(additional, dict) else {}
+            self._value_path = f"{frame.path}.{raw}"
+            self._state = _OBJECT_COLON
+            return
+
+        if scalar.kind == "string":
+            value: Any = raw
+            min_length = schema.get("minLength")
+            if min_length is not None and len(raw) < min_length:
+                self._fail(f"String is shorter than {min_length} characters", scalar.path)
+        elif scalar.kind == "number":
+            if not _NUMBER_RE.fullmatch(raw):
+                self._fail("Malformed number", scalar.path)
+            value = json.loads(raw)
+            declared = schema.get("type")
+            declared = set(declared) if isinstance(declared, list) else {declared}
+            if "integer" in declared and "number" not in declared and not float(value).is_integer():
+                self._fail("Expected integer", scalar.path)
+            if "minimum" in schema and value < schema["minimum"]:
+                self._fail(f"Number is less than {schema['minimum']}", scalar.path)
+            if "maximum" in schema and value > schema["maximum"]:
+                self._fail(f"Number is greater than {schema['maximum']}", scalar.path)
+        else:
+            value = _LITERALS[raw]
+
+        if "const" in schema and value != schema["const"]:
+            self._fail("Value does not match const", scalar.path)
+        if "enum" in schema and value not in schema["enum"]:
+            self._fail("Value is not one of the allowed values", scalar.path)
+        self._value_done()
+
+
+def response_text(chunk: Union[GenerateResponse, ChatResponse]) -> str:
+    """Output text of a generate or chat response"""
+    if isinstance(chunk, ChatResponse):
+        return chunk.message.content or ""
+    return chunk.response or ""
+
+
+def validate_stream(
+    stream: Generator[Any, None, None],
+    schema: Dict[str, Any],
+    text: Callable[[Any], str] = response_text
+) -> Generator[Any, None, None]:
+    """Pass a generate/chat stream through, aborting it on invalid output
+
+    The upstream stream is closed as soon as the output can no longer match
+    the schema, which stops the generation. A stream that ends without a
+    ``done`` chunk must still hold a complete document.
+    """
+    validator = StreamingJSONValidator(schema)
+    finished = False
+    try:
+        for chunk in stream:
+            validator.feed(text(chunk))
+            if chunk.done:
+                validator.finish()
+                finished = True
+            yield chunk
+        if not finished:
+            # Upstream closed without a final chunk; the output may be cut short
+            validator.finish()
+    finally:
+        stream.close()
+
+
+async def avalidate_stream(
+    stream: AsyncGenerator[Any, None],
+    schema: Dict[str, Any],
+    text: Callable[[Any], str] = response_text
+) -> AsyncGenerator[Any, None]:
+    """Async variant of validate_stream"""
+    validator = StreamingJSONValidator(schema)
+    finished = False
+    try:
+        async for chunk in stream:
+            validator.feed(text(chunk))
+            if chunk.done:
+                validator.finish()
+                finished = True
+            yield chunk
+        if not finished:
+            # Upstream closed without a final chunk; the output may be cut short
+            validator.finish()
+    finally:
+        await stream.aclose()
+
+
+async def generate_structured(
+    client: Any,
+    request: Union[GenerateRequest, ChatRequest],
+    max_attempts: int = Config.STRUCTURED_MAX_ATTEMPTS
+) -> Union[GenerateResponse, ChatResponse]:
+    """Run a structured generate or chat request, retrying invalid output
+
+    The request is streamed from upstream so an attempt is aborted at the
+    first invalid token, then retried up to max_attempts times. Retries
+    with a fixed ``seed`` use seed + attempt, since the same seed would
+    reproduce the same output.
+    Args:
+        client (AsyncOllamaClient): Client used to run the request
+        request (GenerateRequest | ChatRequest): Request with a ``format``
+        max_attempts (int): Maximum number of generations
+    Returns:
+        GenerateResponse | ChatResponse: Final response with the full output
+    """
+    if max_attempts < 1:
+        raise OllamaValidationError("max_attempts must be at least 1")
+    schema = schema_from_format(request.format)
+    if schema is None:
+        raise ValueError("Request has no structured output format")
+    is_chat = isinstance(request, ChatRequest)
+    call = client.chat if is_chat else client.generate
+
+    last_error: Optional[OllamaStructuredOutputError] = None
+    for attempt in range(max_attempts):
+        attempt_request = request.model_copy(deep=True, update={"stream": True})
+        if attempt and attempt_request.options and attempt_request.options.seed is not None:
+            attempt_request.options.seed += attempt
+
+        parts: List[str] = []
+        final = None
+        try:
+            async for chunk in avalidate_stream(await call(attempt_request), schema):
+                parts.append(response_text(chunk))
+                final = chunk
+        except OllamaStructuredOutputError as e:
+            last_error = e
+            logger.warning(f"Structured output attempt {attempt + 1}/{max_attempts} rejected: {str(e)}")
+            continue
+
+        content = "".join(parts)
+        if is_chat:
+            final.message.content = content
+        else:
+            final.response = content
+        return final
+    raise last_error
@@ -1,73 +1,162 @@
 """Synchronous rate limiting implementation for Ollama API"""
 import threading
 import time
-from typing import Optional, Dict
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .config import Config
+from .gcra import GCRA, evict_idle
+from .rate_limit_store import RateLimitStore
 
 class SyncTokenBucket:
-    """Synchronous token bucket rate limiter implementation"""
-    def __init__(self, rate: float, capacity: float):
+    """Synchronous token bucket rate limiter implementation
+
+    Backed by GCRA (see gcra.py): every acquisition reserves its tokens, so
+    the returned wait time is a slot of its own rather than a hint to retry.
+    """
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        store: Optional[RateLimitStore] = None,
+        store_key: Optional[str] = None,
+        pinned: bool = False
+    ):
         """Initialize token bucket
         Args:
             rate (float): Rate of token replenishment per second
             capacity (float): Maximum number of tokens that can be stored
+            store (RateLimitStore, optional): Shared store holding the real bucket.
+                leased_tokens is then a local lease taken from it in batches.
+            store_key (str, optional): Bucket key in the store
+            pinned (bool): Never evict this bucket from its SyncRateLimiter
         """
         self.rate = rate
         self.capacity = capacity
-        self.current_tokens = capacity
-        self.last_update = time.monotonic()
+        self.store = store
+        self.store_key = store_key
+        self.pinned = pinned
+        self.lease = max(1.0, capacity * Config.RATE_LIMIT_LEASE_FRACTION)
+        self.leased_tokens = 0.0
+        self._gcra = GCRA(rate, capacity)
         self._lock = threading.Lock()
 
+    def reserve(self, tokens: float = 1.0) -> Tuple[float, Optional[Tuple[float, float]]]:
+        """Reserve tokens from the bucket
+        Args:
+            tokens (float): Number of tokens to acquire
+        Returns:
+            Tuple[float, Optional[Tuple[float, float]]]: Seconds to wait before proceeding, and
+                the reservation to pass to ``cancel`` if the caller gives up
+        """
+        with self._lock:
+            if self.store is not None:
+                return self._acquire_shared(tokens), None
+            return self._gcra.reserve(tokens, time.monotonic())
+
     def acquire(self, tokens: float = 1.0) -> float:
         """Acquire tokens from the bucket
         Args:
             tokens (float): Number of tokens to acquire
         Returns:
-            float: Time to wait before acquiring tokens
+            float: Time to wait before using the acquired tokens
         """
+        wait_time, _ = self.reserve(tokens)
+        return wait_time
+
+    def cancel(self, reservation: Optional[Tuple[float, float]]) -> bool:
+        """Return the tokens of a reservation that will not be used"""
+        if reservation is None:
+            return False
         with self._lock:
-            now = time.monotonic()
-            elapsed = now - self.last_update
-            self.current_tokens = min(
-                self.capacity,
-                self.current_tokens + elapsed * self.rate
-            )
-            self.last_update = now
+            return self._gcra.cancel(reservation)
 
-            wait_time = (tokens - self.current_tokens) / self.rate if tokens > self.current_tokens else 0
-            if wait_time <= 0:
-                self.current_tokens -= tokens
-                return 0
+    def settle(self, tokens: float) -> None:
+        """Charge (positive) or refund (negative) tokens once the real cost is known"""
+        with self._lock:
+            if self.store is None:
+                self._gcra.adjust(tokens, time.monotonic())
+            elif tokens > 0:
+                # Charged to the shared bucket as debt; the wait is not observed
+                self.store.take(self.store_key, self.rate, self.capacity, tokens, tokens)
+            else:
+                self.leased_tokens = min(self.leased_tokens - tokens, self.capacity)
+
+    def idle(self, now: float) -> bool:
+        """Whether dropping the bucket loses no reservations"""
+        return self.store is not None or self._gcra.idle(now)
 
-            return wait_time
+    def _acquire_shared(self, tokens: float) -> float:
+        """Serve from the local lease, topping it up from the shared store"""
+        if self.leased_tokens >= tokens:
+            self.leased_tokens -= tokens
+            return 0
+        granted, wait_time = self.store.take(
+            self.store_key, self.rate, self.capacity, tokens - self.leased_tokens, self.lease
+        )
+        self.leased_tokens += granted - tokens
+        return wait_time
 
 class SyncRateLimiter:
-    """Synchronous rate limiter for Ollama API"""
-    def __init__(self):
-        self._buckets: Dict[str, SyncTokenBucket] = {}
+    """Synchronous rate limiter for Ollama API
+
+    With a ``store``, buckets are shared with every limiter using that store
+    (across processes for SharedMemoryRateLimitStore). Keys are prefixed with
+    ``namespace`` so that clients of different servers do not share budgets.
+
+    Buckets configured with an explicit rate are kept; others are created on
+    demand and the least recently used full ones are dropped once there are
+    more than ``max_keys``.
+    """
+    def __init__(
+        self,
+        store: Optional[RateLimitStore] = None,
+        namespace: str = "",
+        max_keys: int = Config.RATE_LIMIT_MAX_KEYS
+    ):
+        self._buckets: "OrderedDict[str, SyncTokenBucket]" = OrderedDict()
         self._default_rate = 10  # requests per second
         self._default_capacity = 10
         self._lock = threading.Lock()
+        self.store = store
+        self.namespace = namespace
+        self.max_keys = max_keys
 
     def get_bucket(self, key: str, rate: Optional[float] = None, capacity: Optional[float] = None) -> SyncTokenBucket:
         """Get or create a token bucket for the given key"""
         with self._lock:
-            if key not in self._buckets:
-                self._buckets[key] = SyncTokenBucket(
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # Make room first; the new bucket itself must not be evicted
+                evict_idle(self._buckets, self.max_keys - 1, time.monotonic())
+                bucket = self._buckets[key] = SyncTokenBucket(
                     rate or self._default_rate,
-                    capacity or self._default_capacity
+                    capacity or self._default_capacity,
+                    store=self.store,
+                    store_key=f"{self.namespace} {key}",
+                    pinned=rate is not None
                 )
-            return self._buckets[key]
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
 
     def wait(self, key: str, tokens: float = 1.0) -> None:
         """Wait for tokens to become available for the given key
+
+        Waiters are released in the order they arrived. If the wait is
+        interrupted, the reservation is returned when possible.
         Args:
             key (str): Rate limit key (e.g. endpoint name)
             tokens (float): Number of tokens to acquire
         """
         bucket = self.get_bucket(key)
-        wait_time = bucket.acquire(tokens)
+        wait_time, reservation = bucket.reserve(tokens)
         if wait_time > 0:
-            time.sleep(wait_time)
+            try:
+                time.sleep(wait_time)
+            except BaseException:
+                bucket.cancel(reservation)
+                raise
 
     def acquire(self, key: str, tokens: float = 1.0) -> None:
         """Acquire tokens for the given key (alias for wait)
@@ -75,4 +164,13 @@ class SyncRateLimiter:
             key (str): Rate limit key (e.g. endpoint name)
             tokens (float): Number of tokens to acquire
         """
-        self.wait(key, tokens)
\ No newline at end of file
+        self.wait(key, tokens)
+
+    def settle(self, key: str, tokens: float) -> None:
+        """Adjust the charge of a finished request for the given key
+        Args:
+            key (str): Rate limit key (e.g. endpoint name)
+            tokens (float): Actual cost minus the tokens acquired; negative refunds
+        """
+        if tokens:
+            self.get_bucket(key).settle(tokens)
@@ -0,0 +1,292 @@
+"""Tool-call execution for Ollama API chat"""
+import asyncio
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .config import Config
+from .exceptions import OllamaResponseError, OllamaValidationError
+from .logger import setup_logger
+from .models import ChatRequest, ChatResponse, Message
+
+logger = setup_logger(__name__)
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+class Tool:
+    """A function the model may call
+
+    ``pure`` tools return the same result for the same arguments, so their
+    results are cached and repeated calls are not executed again.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        timeout: float = Config.TOOL_TIMEOUT,
+        pure: bool = False
+    ):
+        """Initialize tool
+        Args:
+            func (Callable): Sync or async function taking the call's arguments as keywords
+            name (str, optional): Tool name. Defaults to the function name.
+            description (str, optional): Description. Defaults to the first docstring line.
+            parameters (dict, optional): JSON schema of the arguments. Derived from
+                the signature's annotations if omitted.
+            timeout (float): Seconds a call may take before it is reported as timed out
+            pure (bool): Cache results by arguments
+        """
+        self.func = func
+        self.name = name or func.__name__
+        self.description = description or (inspect.getdoc(func) or "").split("\n")[0]
+        self.parameters = parameters or self._parameters_from_signature(func)
+        self.timeout = timeout
+        self.pure = pure
+        self.is_async = inspect.iscoroutinefunction(func)
+
+    @staticmethod
+    def _parameters_from_signature(func: Callable[..., Any]) -> Dict[str, Any]:
+        properties = {}
+        required = []
+        for param in inspect.signature(func).parameters.values():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            properties[param.name] = {"type": _JSON_TYPES.get(param.annotation, "string")}
+            if param.default is param.empty:
+                required.append(param.name)
+        return {"type": "object", "properties": properties, "required": required}
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        """Tool definition in the format ChatRequest.tools expects"""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        }
+
+
+def tool(
+    func: Optional[Callable[..., Any]] = None,
+    **kwargs: Any
+) -> Union[Tool, Callable[[Callable[..., Any]], Tool]]:
+    """Decorator turning a function into a Tool; accepts Tool's keyword arguments"""
+    if func is None:
+        return lambda f: Tool(f, **kwargs)
+    return Tool(func, **kwargs)
+
+
+def _parse_call(call: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    function = call.get("function", {})
+    arguments = function.get("arguments") or {}
+    if isinstance(arguments, str):
+        # Some models return arguments as a JSON-encoded string
+        arguments = json.loads(arguments) if arguments.strip() else {}
+    return function.get("name", ""), arguments
+
+
+def _format_result(result: Any) -> str:
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(result)
+    except (TypeError, ValueError):
+        return str(result)
+
+
+class ToolExecutor:
+    """Run the tool calls of one assistant turn concurrently
+
+    Async tools run as tasks on the caller's loop. Blocking tools run in a
+    shared thread pool. Each call is bounded by its tool's timeout. A failed
+    or timed-out call is reported to the model as the tool's result rather
+    than raised, so the model can recover. A call still running in a thread
+    after its timeout cannot be stopped and finishes in the background.
+    """
+
+    def __init__(self, max_workers: int = Config.TOOL_MAX_WORKERS, cache_size: int = 1024):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        # Keyed by the tool's function, so same-named tools never share results
+        self._cache: "OrderedDict[Tuple[Callable[..., Any], str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ollama-tool")
+            return self._pool
+
+    def _lookup(self, tools: Dict[str, Tool], call: Dict[str, Any]) -> Tuple[Optional[Tool], str, Dict[str, Any], Optional[str]]:
+        """Resolve a call; returns (tool, name, arguments, cached or error result)"""
+        try:
+            name, arguments = _parse_call(call)
+        except json.JSONDecodeError as e:
+            return None, "", {}, f"Error: invalid tool arguments: {str(e)}"
+        if not isinstance(arguments, dict):
+            # Would fail the ** expansion when the call is submitted
+            return None, name, {}, "Error: tool arguments must be an object"
+        selected = tools.get(name)
+        if selected is None:
+            return None, name, arguments, f"Error: unknown tool {name!r}"
+        if selected.pure:
+            with self._cache_lock:
+                cached = self._cache.get(self._cache_key(selected, arguments))
+            if cached is not None:
+                return selected, name, arguments, cached
+        return selected, name, arguments, None
+
+    @staticmethod
+    def _cache_key(selected: Tool, arguments: Dict[str, Any]) -> Tuple[Callable[..., Any], str]:
+        return selected.func, json.dumps(arguments, sort_keys=True, default=str)
+
+    def _store(self, selected: Tool, arguments: Dict[str, Any], result: str) -> None:
+        if not selected.pure:
+            return
+        with self._cache_lock:
+            self._cache[self._cache_key(selected, arguments)] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _message(name: str, content: str) -> Message:
+        return Message(role="tool", content=content, tool_name=name or None)
+
+    def run(self, tools: Dict[str, Tool], calls: List[Dict[str, Any]]) -> List[Message]:
+        """Execute calls from synchronous code; results are in call order"""
+        pending = []
+        for call in calls:
+            selected, name, arguments, result = self._lookup(tools, call)
+            if result is not None:
+                pending.append((name, None, None, None, result))
+                continue
+            if selected.is_async:
+                future = self.pool.submit(lambda t=selected, a=arguments: asyncio.run(t.func(**a)))
+            else:
+                future = self.pool.submit(selected.func, **arguments)
+            pending.append((name, selected, arguments, future, time.monotonic() + selected.timeout))
+
+        messages = []
+        for name, selected, arguments, future, result in pending:
+            if future is not None:
+                # Calls run concurrently, so each timeout counts from submission
+                deadline, result = result, None
+                try:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    result = _format_result(future.result(timeout=remaining))
+                    self._store(selected, arguments, result)
+                except FutureTimeoutError:
+                    result = f"Error: tool {name!r} timed out after {selected.timeout}s"
+                except Exception as e:
+                    result = f"Error: {str(e)}"
+            messages.append(self._message(name, result))
+        return messages
+
+    async def arun(self, tools: Dict[str, Tool], calls: List[Dict[str, Any]]) -> List[Message]:
+        """Execute calls from async code; results are in call order"""
+        loop = asyncio.get_running_loop()
+
+        async def execute(call: Dict[str, Any]) -> Message:
+            selected, name, arguments, result = self._lookup(tools, call)
+            if result is None:
+                try:
+                    if selected.is_async:
+                        work = selected.func(**arguments)
+                    else:
+                        work = loop.run_in_executor(self.pool, lambda: selected.func(**arguments))
+                    result = _format_result(await asyncio.wait_for(work, selected.timeout))
+                    self._store(selected, arguments, result)
+                except asyncio.TimeoutError:
+                    result = f"Error: tool {name!r} timed out after {selected.timeout}s"
+                except Exception as e:
+                    result = f"Error: {str(e)}"
+            return self._message(name, result)
+
+        return list(await asyncio.gather(*(execute(call) for call in calls)))
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+
+def prepare_tool_request(
+    request: ChatRequest,
+    tools: Sequence[Union[Tool, Callable[..., Any]]]
+) -> Tuple[ChatRequest, Dict[str, Tool]]:
+    """Copy a chat request for a tool loop, advertising the tools it can call"""
+    registry = {}
+    for item in tools:
+        item = item if isinstance(item, Tool) else Tool(item)
+        registry[item.name] = item
+    if not registry:
+        raise OllamaValidationError("At least one tool is required")
+    request = request.model_copy(deep=True, update={"stream": False})
+    if not request.tools:
+        request.tools = [item.schema for item in registry.values()]
+    return request, registry
+
+
+def run_tool_loop(
+    client: Any,
+    request: ChatRequest,
+    tools: Sequence[Union[Tool, Callable[..., Any]]],
+    executor: ToolExecutor,
+    max_rounds: int = Config.TOOL_MAX_ROUNDS,
+    on_response: Optional[Callable[[ChatResponse], None]] = None
+) -> Tuple[ChatResponse, List[Message]]:
+    """Chat with OllamaClient, executing tool calls until the model answers
+    Args:
+        on_response (Callable, optional): Called with every model turn's response,
+            e.g. to account its usage
+    Returns:
+        Tuple[ChatResponse, List[Message]]: Final response and the full transcript
+    """
+    request, registry = prepare_tool_request(request, tools)
+    for round_number in range(1, max_rounds + 1):
+        response = client.chat(request)
+        if on_response is not None:
+            on_response(response)
+        request.messages.append(response.message)
+        if not response.message.tool_calls:
+            return response, request.messages
+        logger.debug(f"Tool round {round_number}: {len(response.message.tool_calls)} calls")
+        request.messages.extend(executor.run(registry, response.message.tool_calls))
+    raise OllamaResponseError(f"Model was still calling tools after {max_rounds} rounds")
+
+
+async def arun_tool_loop(
+    client: Any,
+    request: ChatRequest,
+    tools: Sequence[Union[Tool, Callable[..., Any]]],
+    executor: ToolExecutor,
+    max_rounds: int = Config.TOOL_MAX_ROUNDS,
+    on_response: Optional[Callable[[ChatResponse], None]] = None
+) -> Tuple[ChatResponse, List[Message]]:
+    """Async variant of run_tool_loop for AsyncOllamaClient"""
+    request, registry = prepare_tool_request(request, tools)
+    for round_number in range(1, max_rounds + 1):
+        response = await client.chat(request)
+        if on_response is not None:
+            on_response(response)
+        request.messages.append(response.message)
+        if not response.message.tool_calls:
+            return response, request.messages
+        logger.debug(f"Tool round {round_number}: {len(response.message.tool_calls)} calls")
+        request.messages.extend(await executor.arun(registry, response.message.tool_calls))
+    raise OllamaResponseError(f"Model was still calling tools after {max_rounds} rounds")
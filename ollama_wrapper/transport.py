@@ -0,0 +1,82 @@
+"""Unix domain socket transport for Ollama API
+
+A base URL of the form ``unix:///path/to/ollama.sock`` (see
+utils.parse_base_url) sends requests over that socket instead of TCP.
+Requests still carry plain HTTP/1.1 with a ``localhost`` Host header, so
+pooling, retries and streaming work as they do over TCP.
+"""
+import socket
+import threading
+from typing import Any, List, Optional
+
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from .pool import InstrumentedPoolMixin, PooledHTTPAdapter
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+
+    def __init__(self, *args: Any, socket_path: str, **kwargs: Any):
+        self.socket_path = socket_path
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise NewConnectionError(self, f"Failed to connect to {self.socket_path}: {e}") from e
+        return sock
+
+
+class _UnixHTTPConnectionPool(InstrumentedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+
+class UnixSocketAdapter(PooledHTTPAdapter):
+    """requests transport adapter sending every request to one Unix socket
+
+    Mount it on the ``http://`` prefix of a session used only for that
+    socket. Connections are pooled and instrumented like PooledHTTPAdapter's.
+    """
+
+    def __init__(self, socket_path: str, **kwargs: Any):
+        self.socket_path = socket_path
+        self._unix_pool: Optional[_UnixHTTPConnectionPool] = None
+        self._unix_pool_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _connection_pool(self) -> _UnixHTTPConnectionPool:
+        with self._unix_pool_lock:
+            if self._unix_pool is None:
+                self._unix_pool = _UnixHTTPConnectionPool(
+                    "localhost",
+                    maxsize=self._pool_maxsize,
+                    block=self._pool_block,
+                    socket_path=self.socket_path
+                )
+                self._unix_pool.configure(self.pool_stats, self.keepalive, self.acquire_timeout)
+            return self._unix_pool
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._connection_pool()
+
+    def get_connection(self, url, proxies=None):
+        return self._connection_pool()
+
+    def connection_pools(self) -> List[InstrumentedPoolMixin]:
+        with self._unix_pool_lock:
+            return [self._unix_pool] if self._unix_pool is not None else []
+
+    def close(self) -> None:
+        super().close()
+        with self._unix_pool_lock:
+            if self._unix_pool is not None:
+                self._unix_pool.close()
+                self._unix_pool = None
@@ -0,0 +1,211 @@
+"""Usage accounting for Ollama API
+
+UsageLedger aggregates completed generate/chat responses per tenant, model
+and UTC hour: requests, prompt and generated tokens (``prompt_eval_count``
+and ``eval_count``), and GPU time (``prompt_eval_duration`` and
+``eval_duration``), from which throughput is derived.
+
+Counters live in memory. With a ``path``, a background thread appends the
+increments since the previous flush to a JSON Lines file every
+``flush_interval`` seconds and at exit. The file is never rewritten; it is
+replayed on startup, so totals survive restarts.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .config import Config
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_COUNTERS = ("requests", "prompt_tokens", "completion_tokens", "prompt_eval_ns", "eval_ns")
+
+
+def usage_hour(timestamp: Optional[float] = None) -> str:
+    """UTC hour of a timestamp, e.g. ``2024-02-11T10:00Z``"""
+    return time.strftime("%Y-%m-%dT%H:00Z", time.gmtime(timestamp))
+
+
+def _summary(counters: Dict[str, int]) -> Dict[str, Any]:
+    """Counters plus derived GPU seconds and throughput"""
+    prompt_seconds = counters["prompt_eval_ns"] / 1e9
+    eval_seconds = counters["eval_ns"] / 1e9
+    return {
+        "requests": counters["requests"],
+        "prompt_tokens": counters["prompt_tokens"],
+        "completion_tokens": counters["completion_tokens"],
+        "gpu_seconds": round(prompt_seconds + eval_seconds, 3),
+        "prompt_tokens_per_second": round(counters["prompt_tokens"] / prompt_seconds, 2) if prompt_seconds else None,
+        "tokens_per_second": round(counters["completion_tokens"] / eval_seconds, 2) if eval_seconds else None,
+    }
+
+
+class UsageLedger:
+    """Per tenant, model and hour token and GPU time counters"""
+
+    def __init__(
+        self,
+        path: Optional[str] = Config.USAGE_LOG_PATH,
+        flush_interval: float = Config.USAGE_FLUSH_INTERVAL,
+        retention_hours: int = Config.USAGE_RETENTION_HOURS
+    ):
+        """Initialize usage ledger
+        Args:
+            path (str, optional): Append-only JSON Lines file; None keeps usage in memory only
+            flush_interval (float): Seconds between flushes to ``path``
+            retention_hours (int): Hours of usage kept in memory for queries
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_hours = retention_hours
+        # (tenant, model, hour) -> counters, and the increments not yet flushed
+        self._totals: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self._pending: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if path:
+            self._load()
+            self._thread = threading.Thread(target=self._flush_loop, name="usage-ledger", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, tenant: str, response: Any, timestamp: Optional[float] = None) -> None:
+        """Count a final generate/chat response (dict or response model)"""
+        if isinstance(response, BaseModel):
+            response = response.model_dump()
+        increments = {
+            "requests": 1,
+            "prompt_tokens": response.get("prompt_eval_count") or 0,
+            "completion_tokens": response.get("eval_count") or 0,
+            "prompt_eval_ns": response.get("prompt_eval_duration") or 0,
+            "eval_ns": response.get("eval_duration") or 0,
+        }
+        key = (tenant, response.get("model") or "", usage_hour(timestamp))
+        with self._lock:
+            for counters in (self._totals, self._pending):
+                self._add(counters.setdefault(key, dict.fromkeys(_COUNTERS, 0)), increments)
+
+    async def wrap_async_stream(self, tenant: str, stream: AsyncGenerator) -> AsyncGenerator:
+        """Pass a response stream through, recording its final chunk
+
+        A stream closed before its final chunk is counted with one generated
+        token per chunk received, since Ollama reports no counts for it.
+        """
+        chunks = 0
+        last = None
+        try:
+            async for chunk in stream:
+                data = chunk.model_dump() if isinstance(chunk, BaseModel) else chunk
+                if data.get("done"):
+                    self.record(tenant, data)
+                    last = None
+                else:
+                    chunks += 1
+                    last = data
+                yield chunk
+        finally:
+            await stream.aclose()
+            if last is not None:
+                self.record(tenant, {"model": last.get("model"), "eval_count": chunks})
+
+    def query(
+        self,
+        tenant: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Usage rows matching the filters, oldest first, plus their totals
+        Args:
+            tenant (str, optional): Only this tenant
+            model (str, optional): Only this model
+            since (str, optional): First hour included, e.g. ``2024-02-11T10`` (prefix compare)
+            until (str, optional): Last hour included
+        Returns:
+            Dict[str, Any]: ``{"usage": [...], "totals": {...}}``
+        """
+        totals = dict.fromkeys(_COUNTERS, 0)
+        rows = []
+        with self._lock:
+            items = sorted(self._totals.items(), key=lambda item: (item[0][2], item[0][0], item[0][1]))
+            for (row_tenant, row_model, hour), counters in items:
+                if tenant is not None and row_tenant != tenant:
+                    continue
+                if model is not None and row_model != model:
+                    continue
+                if (since and hour < since) or (until and hour[:len(until)] > until):
+                    continue
+                self._add(totals, counters)
+                rows.append({"tenant": row_tenant, "model": row_model, "hour": hour, **_summary(counters)})
+        return {"usage": rows, "totals": _summary(totals)}
+
+    def flush(self) -> int:
+        """Append unflushed increments to the ledger file; returns the rows written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._prune()
+        if not pending or not self.path:
+            return 0
+        lines = "".join(
+            json.dumps({"tenant": tenant, "model": model, "hour": hour, **counters}) + "\n"
+            for (tenant, model, hour), counters in pending.items()
+        )
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Failed to flush usage ledger to {self.path}: {str(e)}")
+            with self._lock:
+                # Keep the increments for the next attempt
+                for key, counters in pending.items():
+                    self._add(self._pending.setdefault(key, dict.fromkeys(_COUNTERS, 0)), counters)
+            return 0
+        return len(pending)
+
+    def close(self) -> None:
+        """Stop the flush thread and write what is left"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    @staticmethod
+    def _add(counters: Dict[str, int], increments: Dict[str, int]) -> None:
+        for name in _COUNTERS:
+            counters[name] += increments.get(name, 0)
+
+    def _prune(self) -> None:
+        """Forget hours past the retention window; the ledger file keeps them"""
+        oldest = usage_hour(time.time() - self.retention_hours * 3600)
+        for key in [key for key in self._totals if key[2] < oldest]:
+            del self._totals[key]
+
+    def _load(self) -> None:
+        """Replay the ledger file into the in-memory totals"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    row = json.loads(line)
+                    key = (row["tenant"], row["model"], row["hour"])
+                except (ValueError, KeyError):
+                    # A line cut short by a crash during a flush
+                    logger.warning(f"Skipping malformed usage ledger line {line_number} in {self.path}")
+                    continue
+                self._add(self._totals.setdefault(key, dict.fromkeys(_COUNTERS, 0)), row)
+        self._prune()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
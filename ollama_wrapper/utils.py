@@ -1,6 +1,28 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import base64
 import json
+import re
+
+_BLOB_DIGEST_RE = re.compile(r"^sha256[:-]([0-9a-f]{64})$")
+
+UNIX_SCHEME = "unix://"
+# Origin used to build request URLs for socket connections
+UNIX_HTTP_ORIGIN = "http://localhost"
+
+def parse_base_url(base_url: str) -> Tuple[str, Optional[str]]:
+    """Split a configured base URL into (HTTP origin for requests, socket path)
+    Args:
+        base_url (str): ``http(s)://host:port`` or ``unix:///path/to/socket``
+    Returns:
+        Tuple[str, Optional[str]]: URL prefix for requests and the socket path,
+            which is None for TCP URLs
+    """
+    if base_url.startswith(UNIX_SCHEME):
+        socket_path = base_url[len(UNIX_SCHEME):].rstrip("/")
+        if not socket_path.startswith("/"):
+            raise ValueError(f"Unix socket URL needs an absolute path: {base_url}")
+        return UNIX_HTTP_ORIGIN, socket_path
+    return base_url.rstrip("/"), None
 
 def encode_image(image_path: str) -> str:
     """Encode image file to base64 string"""
@@ -35,4 +57,16 @@ def validate_model_name(model_name: str) -> str:
     if ":" not in model_name:
         return f"{model_name}:latest"
 
-    return model_name
\ No newline at end of file
+    return model_name
+
+def validate_blob_digest(digest: str) -> str:
+    """Validate a blob digest and normalize it to ``sha256:<hex>``
+    Args:
+        digest (str): Digest in ``sha256:<hex>`` or ``sha256-<hex>`` form
+    Returns:
+        str: Normalized digest
+    """
+    match = _BLOB_DIGEST_RE.match(digest or "")
+    if not match:
+        raise ValueError(f"Invalid blob digest: {digest}")
+    return f"sha256:{match.group(1)}"
@@ -190,29 +190,42 @@ async function handleStreamingResponse(
   responseArea,
   contentExtractor,
 ) {
-  responseArea.innerHTML = "";
+  responseArea.textContent = "";
   const reader = response.body.getReader();
   const decoder = new TextDecoder();
+  // Holds a trailing partial line until the rest of it arrives
+  let pending = "";
 
-  while (true) {
-    const { done, value } = await reader.read();
-    if (done) break;
-
-    const chunk = decoder.decode(value);
-    const lines = chunk.split("\n").filter((line) => line.trim());
-
+  const render = (lines) => {
+    let text = "";
     for (const line of lines) {
+      if (!line.trim()) continue;
       try {
-        const data = JSON.parse(line);
-        const content = contentExtractor(data);
+        const content = contentExtractor(JSON.parse(line));
         if (content) {
-          responseArea.innerHTML += content;
+          text += content;
         }
       } catch (e) {
         console.error("Error parsing streaming response:", e);
       }
     }
+    // Appending a text node is O(chunk), unlike innerHTML += which
+    // re-parses everything rendered so far
+    if (text) {
+      responseArea.appendChild(document.createTextNode(text));
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    pending += decoder.decode(value, { stream: true });
+    const lines = pending.split("\n");
+    pending = lines.pop();
+    render(lines);
   }
+  render([pending + decoder.decode()]);
 }
 
 // Add this function for model file handling
@@ -293,22 +306,12 @@ document
         data.options = options;
       }
 
-      // Handle images for multimodal models
+      // Make the API request, with images for multimodal models
       const imageFiles = form.images.files;
-      if (imageFiles.length > 0) {
-        const images = [];
-        for (const file of imageFiles) {
-          const base64 = await readFileAsBase64(file);
-          images.push(base64);
+      const response = await postWithImages("/api/generate?flush_ms=50", data, async () => {
+        if (imageFiles.length > 0) {
+          data.images = await uploadImages(imageFiles);
         }
-        data.images = images;
-      }
-
-      // Make the API request
-      const response = await fetch("/api/generate", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(data),
       });
 
       if (!response.ok) {
@@ -357,18 +360,56 @@ document
     }
   });
 
-// Utility function to read file as base64
-function readFileAsBase64(file) {
-  return new Promise((resolve, reject) => {
-    const reader = new FileReader();
-    reader.readAsDataURL(file);
-    reader.onload = () => {
-      // Extract the base64 data from the data URL
-      const base64 = reader.result.split(",")[1];
-      resolve(base64);
-    };
-    reader.onerror = (error) => reject(error);
-  });
+// Image handles by file, so each image is uploaded once and later
+// requests only reference it
+const imageHandles = new Map();
+
+// Upload image files and return their handles
+async function uploadImages(files) {
+  const handles = [];
+  for (const file of files) {
+    const key = `${file.name}:${file.size}:${file.lastModified}`;
+    if (!imageHandles.has(key)) {
+      const formData = new FormData();
+      formData.append("images", file);
+      const response = await fetch("/api/images", {
+        method: "POST",
+        body: formData,
+      });
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.error || "Failed to upload image");
+      }
+      const result = await response.json();
+      imageHandles.set(key, result.images[0].id);
+    }
+    handles.push(imageHandles.get(key));
+  }
+  return handles;
+}
+
+// POST a request whose images are attached by attachImages(). The server
+// may have dropped the handles (evicted, restarted, or another worker), so
+// on that error the cached handles are discarded and the images uploaded
+// and the request sent once more.
+async function postWithImages(url, data, attachImages) {
+  const post = async () => {
+    await attachImages();
+    return fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(data),
+    });
+  };
+  const response = await post();
+  if (response.status === 400 && imageHandles.size > 0) {
+    const error = await response.clone().json();
+    if ((error.error || "").startsWith("Unknown or expired image handle")) {
+      imageHandles.clear();
+      return post();
+    }
+  }
+  return response;
 }
 
 // Chat
@@ -401,26 +442,16 @@ document.getElementById("chatForm").addEventListener("submit", async (e) => {
   try {
     const messageInputs = form.querySelectorAll(".message-input");
     const messages = [];
+    const messageImages = [];
 
-    // Process each message with its images
+    // Process each message, keeping its images for multimodal models
     for (const input of messageInputs) {
       const message = {
         role: input.querySelector('[name="role"]').value,
         content: input.querySelector('[name="content"]').value,
       };
-
-      // Handle images for multimodal models
-      const imageFiles = input.querySelector('[name="images"]').files;
-      if (imageFiles.length > 0) {
-        const images = [];
-        for (const file of imageFiles) {
-          const base64 = await readFileAsBase64(file);
-          images.push(base64);
-        }
-        message.images = images;
-      }
-
       messages.push(message);
+      messageImages.push(input.querySelector('[name="images"]').files);
     }
 
     // Build request data
@@ -465,10 +496,12 @@ document.getElementById("chatForm").addEventListener("submit", async (e) => {
       data.options = options;
     }
 
-    const response = await fetch("/api/chat", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(data),
+    const response = await postWithImages("/api/chat?flush_ms=50", data, async () => {
+      for (const [i, imageFiles] of messageImages.entries()) {
+        if (imageFiles.length > 0) {
+          messages[i].images = await uploadImages(imageFiles);
+        }
+      }
     });
 
     if (!response.ok) {
@@ -594,8 +627,16 @@ document
               .map((b) => b.toString(16).padStart(2, "0"))
               .join("");
 
+            // Skip the upload if the server already has this blob
+            const blobUrl = `/api/blobs/sha256:${hashHex}`;
+            const existsResponse = await fetch(blobUrl, { method: "HEAD" });
+            if (existsResponse.ok) {
+              files[file.name] = `sha256:${hashHex}`;
+              continue;
+            }
+
             // Upload blob first
-            const blobResponse = await fetch(`/api/blobs/sha256:${hashHex}`, {
+            const blobResponse = await fetch(blobUrl, {
               method: "POST",
               body: file,
             });
@@ -765,4 +806,79 @@ document
     } catch (error) {
       showError("embeddingsResponse", error.message);
     }
-  });
\ No newline at end of file
+  });
+// Model comparison: one column per model, filled in as each finishes
+function renderComparison(container, result, label) {
+  const column = document.createElement("div");
+  column.className = "col-md-6 mb-3";
+  const title = document.createElement("h6");
+  title.textContent = label || result.model;
+  const body = document.createElement("pre");
+  body.className = "response-area";
+  if (result.error) {
+    body.textContent = `Error: ${result.error}`;
+  } else {
+    const seconds = result.total_duration
+      ? ` (${(result.total_duration / 1e9).toFixed(2)}s)`
+      : "";
+    title.textContent += seconds;
+    body.textContent = result.response;
+  }
+  column.append(title, body);
+  container.appendChild(column);
+}
+
+document
+  .getElementById("compareForm")
+  .addEventListener("submit", async (e) => {
+    e.preventDefault();
+    const form = e.target;
+    const container = document.getElementById("compareResponse");
+    const models = Array.from(form.model.selectedOptions)
+      .map((option) => option.value)
+      .filter(Boolean);
+    container.innerHTML = "";
+    showSpinner();
+
+    try {
+      const response = await fetch("/api/compare", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          models,
+          prompt: form.prompt.value,
+          policy: form.policy.value,
+        }),
+      });
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.error || "Failed to compare models");
+      }
+
+      if (form.policy.value !== "all") {
+        const result = await response.json();
+        renderComparison(container, result, `Winner: ${result.winner}`);
+        return;
+      }
+
+      // Each NDJSON line is one model's complete response
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let pending = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        pending += done ? decoder.decode() : decoder.decode(value, { stream: true });
+        const lines = pending.split("\n");
+        pending = done ? "" : lines.pop();
+        for (const line of lines) {
+          if (line.trim()) renderComparison(container, JSON.parse(line));
+        }
+        if (done) break;
+      }
+    } catch (error) {
+      showError("compareResponse", error.message);
+    } finally {
+      hideSpinner();
+    }
+  });
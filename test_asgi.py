@@ -0,0 +1,54 @@
+import asyncio
+import itertools
+
+from flask import Flask
+
+from app import handle_streaming_response
+from asgi import WSGIDisconnectAdapter
+
+
+def test_client_disconnect_closes_the_upstream_stream():
+    """http.disconnect stops the response and closes the stream feeding it"""
+    closed = []
+    produced = itertools.count()
+    flask_app = Flask(__name__)
+
+    @flask_app.route("/stream")
+    def stream():
+        def upstream():
+            try:
+                while True:
+                    yield [{"n": next(produced)}]
+            finally:
+                closed.append(True)
+        return handle_streaming_response(upstream())
+
+    async def run():
+        sent = []
+        first_chunk = asyncio.Event()
+        requested = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body"):
+                first_chunk.set()
+                # Give the disconnect a chance to land before the next chunk
+                await asyncio.sleep(0.01)
+
+        scope = {"type": "http", "method": "GET", "path": "/stream", "query_string": b"",
+                 "headers": [], "http_version": "1.1"}
+        await asyncio.wait_for(WSGIDisconnectAdapter(flask_app)(scope, receive, send), 5)
+        return sent
+
+    sent = asyncio.run(run())
+    assert closed == [True]
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 200
+    assert next(produced) < 10
+    assert not any(message.get("more_body") is False for message in sent)
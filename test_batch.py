@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from ollama_wrapper import AsyncOllamaClient
+from ollama_wrapper.batch import BatchRunner
+
+
+def test_batch_resumes_from_checkpoint(tmp_path):
+    """An interrupted batch job only re-runs records that did not complete"""
+    client = AsyncOllamaClient(use_mock=True)
+    output = str(tmp_path / "out.jsonl")
+    prompts = [f"prompt {i}" for i in range(20)]
+
+    async def run_interrupted():
+        runner = BatchRunner(client, output, concurrency=3, checkpoint_every=2, defaults={"model": "llama2"})
+        task = asyncio.create_task(runner.run(prompts))
+        while runner.checkpoint.completed < 8:
+            await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return runner
+
+    first = asyncio.run(run_interrupted())
+    assert first.state == "cancelled"
+
+    second = BatchRunner(client, output, concurrency=3, defaults={"model": "llama2"})
+    status = asyncio.run(second.run(prompts))
+
+    assert status["state"] == "completed"
+    assert status["skipped"] >= 8
+    assert status["submitted"] == len(prompts) - status["skipped"]
+    with open(output) as f:
+        indices = sorted(json.loads(line)["index"] for line in f)
+    assert indices == list(range(len(prompts)))
+
+
+def test_batch_retries_failures_without_duplicate_lines(tmp_path):
+    """Malformed input lines fail alone, and a resumed run supersedes their errors"""
+    client = AsyncOllamaClient(use_mock=True)
+    source = tmp_path / "in.jsonl"
+    output = str(tmp_path / "out.jsonl")
+    source.write_text('{"prompt": "a"}\n{"prompt": \n{"prompt": "c"}\n')
+
+    first = asyncio.run(BatchRunner(client, output, defaults={"model": "llama2"}).run(str(source)))
+    assert first["state"] == "completed"
+    assert (first["completed"], first["failed"]) == (2, 1)
+
+    source.write_text('{"prompt": "a"}\n{"prompt": "b"}\n{"prompt": "c"}\n')
+    second = asyncio.run(BatchRunner(client, output, defaults={"model": "llama2"}).run(str(source)))
+    assert (second["completed"], second["failed"], second["skipped"]) == (3, 0, 2)
+    with open(output) as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(record["index"] for record in records) == [0, 1, 2]
+    assert not any("error" in record for record in records)
+
+
+def test_batch_that_cannot_start_is_marked_failed(tmp_path):
+    """A corrupt checkpoint fails the job instead of leaving it running"""
+    output = tmp_path / "out.jsonl"
+    (tmp_path / "out.jsonl.ckpt").write_text("{not json")
+    runner = BatchRunner(AsyncOllamaClient(use_mock=True), str(output), defaults={"model": "llama2"})
+    with pytest.raises(ValueError):
+        asyncio.run(runner.run(["a"]))
+    assert runner.state == "failed" and runner.error and runner.finished_at is not None
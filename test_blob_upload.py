@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+
+from aiohttp import web
+
+from ollama_wrapper import AsyncOllamaClient
+
+
+async def serve_blobs(received):
+    """Start an Ollama stand-in that stores uploaded blobs; returns (runner, base URL)"""
+    async def upload(request):
+        received[request.match_info["digest"]] = await request.read()
+        return web.Response(status=201)
+
+    async def exists(request):
+        return web.Response(status=200 if request.match_info["digest"] in received else 404)
+
+    app = web.Application()
+    app.router.add_post("/api/blobs/{digest}", upload)
+    app.router.add_route("HEAD", "/api/blobs/{digest}", exists)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_async_upload_timeout_bounds_stalls_not_total_time():
+    """A streamed upload outlasting the timeout succeeds while data keeps flowing"""
+    chunks = [bytes([i]) * 1024 for i in range(6)]
+    digest = "sha256:" + hashlib.sha256(b"".join(chunks)).hexdigest()
+
+    async def trickle():
+        for chunk in chunks:
+            await asyncio.sleep(0.3)
+            yield chunk
+
+    async def run():
+        received = {}
+        runner, base_url = await serve_blobs(received)
+        client = AsyncOllamaClient(base_url=base_url, use_mock=False)
+        try:
+            await client.upload_blob(digest, trickle(), timeout=1)
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return received
+
+    assert asyncio.run(run()) == {digest: b"".join(chunks)}
+
+
+def test_blob_route_streams_the_body_upstream_and_checks_its_digest(monkeypatch):
+    """The route forwards a multi-chunk body and rejects one whose hash is wrong"""
+    import app as app_module
+
+    monkeypatch.setattr(app_module.OllamaConfig, "BLOB_CHUNK_SIZE", 64 * 1024)
+    body = bytes(range(256)) * 1024
+    digest = "sha256:" + hashlib.sha256(body).hexdigest()
+    received = {}
+    runner, base_url = app_module.loop_runner.run(serve_blobs(received))
+    client = AsyncOllamaClient(base_url=base_url, use_mock=False)
+    monkeypatch.setattr(app_module, "get_async_client", lambda: client)
+    try:
+        http = app_module.app.test_client()
+        response = http.post(f"/api/blobs/{digest}", data=body)
+        assert response.status_code == 201 and response.json["size"] == len(body)
+        assert received == {digest: body}
+        # Already present, so the body is not sent again
+        assert http.post(f"/api/blobs/{digest}", data=body).json["status"] == "exists"
+
+        response = http.post("/api/blobs/sha256:" + "0" * 64, data=body)
+        assert response.status_code == 400
+    finally:
+        app_module.loop_runner.run(client.close())
+        app_module.loop_runner.run(runner.cleanup())
@@ -0,0 +1,63 @@
+import asyncio
+
+from ollama_wrapper.broadcast import BroadcastHub
+
+
+def test_late_subscriber_replays_then_follows_and_last_leaver_cancels():
+    async def run():
+        produced = []
+        closed = asyncio.Event()
+
+        async def upstream(n):
+            try:
+                for i in range(n):
+                    await asyncio.sleep(0.01)
+                    produced.append(i)
+                    yield i
+            finally:
+                closed.set()
+
+        hub = BroadcastHub(buffer_size=100, retention=60, unwatched_timeout=5)
+        broadcast = await hub.publish(upstream(10))
+        first = broadcast.subscribe()
+        seen_first = [await first.__anext__() for _ in range(3)]
+        late = [chunk async for chunk in hub.get(broadcast.stream_id).subscribe()]
+        seen_first += [chunk async for chunk in first]
+        assert late == seen_first == produced == list(range(10))
+
+        # A stream whose only subscriber leaves stops generating
+        closed.clear()
+        broadcast = await hub.publish(upstream(1000))
+        subscriber = broadcast.subscribe()
+        await subscriber.__anext__()
+        await subscriber.aclose()
+        await asyncio.wait_for(closed.wait(), 1)
+        assert broadcast.done and len(produced) < 100
+
+    asyncio.run(run())
+
+
+def test_owner_never_loses_chunks_and_followers_see_skips():
+    async def run():
+        async def upstream(n):
+            for i in range(n):
+                yield i
+
+        hub = BroadcastHub(buffer_size=5, retention=60, unwatched_timeout=5)
+        broadcast = await hub.publish(upstream(20), tenant="a")
+        owner = broadcast.subscribe(owner=True)
+        seen = []
+        async for chunk in owner:
+            seen.append(chunk)
+            await asyncio.sleep(0.005)
+        assert seen == list(range(20))
+
+        # The finished stream only replays its last chunks, after a marker
+        late = [chunk async for chunk in hub.get(broadcast.stream_id, "a").subscribe()]
+        assert late == [{"stream_id": broadcast.stream_id, "skipped": 15}] + list(range(15, 20))
+
+        # Other tenants neither list nor find the stream
+        assert hub.get(broadcast.stream_id, "b") is None
+        assert hub.list("b") == [] and len(hub.list("a")) == 1
+
+    asyncio.run(run())
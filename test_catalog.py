@@ -0,0 +1,55 @@
+import asyncio
+
+from ollama_wrapper.catalog import ModelCatalog
+
+
+class CountingClient:
+    """Stand-in client that counts requests and serves a mutable model list"""
+
+    def __init__(self):
+        self.models = [{"name": "llama2:latest", "model": "llama2:latest", "digest": "a"}]
+        self.list_calls = 0
+        self.show_calls = 0
+        self.fail = False
+
+    async def list_models(self):
+        self.list_calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("busy")
+        return {"models": [dict(model) for model in self.models]}
+
+    async def show_model(self, name, verbose=None):
+        self.show_calls += 1
+        return {"details": {"digest": self.models[0]["digest"]}}
+
+
+def test_catalog_serves_reads_from_memory_until_the_models_change():
+    client = CountingClient()
+
+    async def run():
+        catalog = ModelCatalog(client, refresh_interval=3600)
+        try:
+            # Concurrent first reads share one request; later reads are cached
+            await asyncio.gather(catalog.list_models(), catalog.list_models())
+            await catalog.list_models()
+            assert client.list_calls == 1
+
+            await catalog.show_model("llama2")
+            await catalog.show_model("llama2")
+            assert client.show_calls == 1
+
+            # A refresh that finds a new digest drops the details fetched for the old one
+            client.models[0]["digest"] = "b"
+            await catalog.refresh()
+            assert client.list_calls == 2
+            assert (await catalog.show_model("llama2")) == {"details": {"digest": "b"}}
+
+            # A failed refresh serves the last good list
+            client.fail = True
+            catalog.invalidate()
+            assert (await catalog.list_models())["models"][0]["digest"] == "b"
+        finally:
+            await catalog.close()
+
+    asyncio.run(run())
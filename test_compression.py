@@ -0,0 +1,31 @@
+import gzip
+
+from app import OllamaConfig, app
+
+
+def test_get_responses_revalidate_with_etags_and_large_bodies_are_compressed(monkeypatch):
+    client = app.test_client()
+    plain = client.get("/api/models")
+    etag = plain.headers["ETag"]
+    assert etag.startswith("W/") and "Content-Encoding" not in plain.headers
+
+    revalidated = client.get("/api/models", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+
+    monkeypatch.setattr(OllamaConfig, "COMPRESSION_MIN_SIZE", 100)
+    compressed = client.get("/api/models", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.vary
+    assert gzip.decompress(compressed.data) == plain.data
+    # The weak validator covers every encoding of the same body
+    assert compressed.headers["ETag"] == etag
+
+
+def test_streamed_responses_are_not_compressed(monkeypatch):
+    monkeypatch.setattr(OllamaConfig, "COMPRESSION_MIN_SIZE", 1)
+    response = app.test_client().post(
+        "/api/generate", json={"model": "llama2", "prompt": "hi", "stream": True},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200 and "Content-Encoding" not in response.headers
+    assert response.data.count(b"\n") > 1
@@ -0,0 +1,50 @@
+from ollama_wrapper.conversations import ConversationStore
+from ollama_wrapper.models import Message
+
+
+def test_conversations_survive_eviction_and_window_recent_turns(tmp_path):
+    store = ConversationStore(max_conversations=1, directory=str(tmp_path), window_messages=3)
+    store.append("a", "llama2", [Message(role="system", content="be brief"), Message(role="user", content="1")])
+    store.append("a", "llama2", [Message(role="assistant", content="one")])
+    store.append("b", "llama2", [Message(role="user", content="other")])
+    assert len(store) == 1
+
+    # Evicted from memory, reloaded from its file
+    conversation = store.get("a")
+    assert [m.content for m in conversation.messages] == ["be brief", "1", "one"]
+
+    store.append("a", "llama2", [Message(role="user", content="2"), Message(role="assistant", content="two")])
+    window = store.window(store.get("a").messages)
+    # The system message is kept and the window starts at a user message
+    assert [m.content for m in window] == ["be brief", "2", "two"]
+
+    assert store.delete("a") and store.get("a") is None
+
+
+def test_a_turn_built_on_stale_history_is_not_committed():
+    import pytest
+    from ollama_wrapper.exceptions import OllamaRequestError
+
+    store = ConversationStore(directory=None)
+    store.append("c", "llama2", [Message(role="user", content="1"), Message(role="assistant", content="one")])
+    # Two turns start from the same two-message history; the second to finish is rejected
+    store.append("c", "llama2", [Message(role="user", content="2a"), Message(role="assistant", content="a")], 2)
+    with pytest.raises(OllamaRequestError) as error:
+        store.append("c", "llama2", [Message(role="user", content="2b"), Message(role="assistant", content="b")], 2)
+    assert error.value.status_code == 409
+    assert [m.content for m in store.get("c").messages] == ["1", "one", "2a", "a"]
+
+
+def test_reloaded_history_matches_the_order_turns_were_applied(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = ConversationStore(directory=str(tmp_path))
+
+    def turn(i):
+        store.append("d", "llama2", [Message(role="user", content=str(i))])
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(turn, range(200)))
+    in_memory = [m.content for m in store.get("d").messages]
+    reloaded = ConversationStore(directory=str(tmp_path)).get("d")
+    assert [m.content for m in reloaded.messages] == in_memory
@@ -0,0 +1,20 @@
+from ollama_wrapper.config import Config
+from ollama_wrapper.cost import CostModel
+from ollama_wrapper.models import ChatRequest, GenerateRequest, Message, ModelOptions
+
+
+def test_cost_grows_with_prompt_context_and_num_predict():
+    model = CostModel(unit_tokens=1000, chars_per_token=4, image_tokens=500, default_num_ctx=4096, default_num_predict=200)
+    ping = GenerateRequest(model="m", prompt="ping", options=ModelOptions(num_predict=1))
+    assert model.estimate(Config.GENERATE_ENDPOINT, ping.dict(exclude_none=True)) < 1.01
+
+    # The prompt is truncated to num_ctx and generation can only fill the rest
+    huge = GenerateRequest(model="m", prompt="x" * 400_000, options=ModelOptions(num_ctx=32768, num_predict=4096))
+    assert model.estimate(Config.GENERATE_ENDPOINT, huge.dict(exclude_none=True)) == 1 + 32768 / 1000
+
+    chat = ChatRequest(model="m", messages=[Message(role="user", content="y" * 4000, images=["a", "b"])])
+    assert model.estimate(Config.CHAT_ENDPOINT, chat.dict(exclude_none=True)) == 1 + (1000 + 2 * 500 + 200) / 1000
+
+    assert model.estimate(Config.VERSION_ENDPOINT, None) == 1.0
+    assert model.actual({"done": True, "prompt_eval_count": 3000, "eval_count": 500}) == 4.5
+    assert model.actual({"done": True}) is None
@@ -0,0 +1,48 @@
+import asyncio
+
+from ollama_wrapper import AsyncOllamaClient, EmbeddingRequest
+from ollama_wrapper.embed_batcher import EmbeddingBatcher
+
+
+def test_concurrent_embeddings_share_one_call():
+    """Concurrent requests for a model are sent as a single batched call"""
+    client = AsyncOllamaClient(use_mock=True)
+    calls = []
+    embed = client.embed
+
+    async def counting_embed(model, inputs, **kwargs):
+        calls.append(list(inputs))
+        return await embed(model, inputs, **kwargs)
+
+    client.embed = counting_embed
+    batcher = EmbeddingBatcher(client, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        requests = [EmbeddingRequest(model="nomic", prompt=f"text {i % 3}") for i in range(6)]
+        return await asyncio.gather(*(batcher.embed(r) for r in requests))
+
+    responses = asyncio.run(run())
+    assert len(responses) == 6
+    assert all(r.embedding for r in responses)
+    assert calls == [["text 0", "text 1", "text 2"]]
+
+
+def test_a_rejected_input_only_fails_its_own_request():
+    client = AsyncOllamaClient(use_mock=True)
+    embed = client.embed
+
+    async def picky_embed(model, inputs, **kwargs):
+        if "bad" in inputs:
+            raise ValueError("input rejected")
+        return await embed(model, inputs, **kwargs)
+
+    client.embed = picky_embed
+    batcher = EmbeddingBatcher(client, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        requests = [EmbeddingRequest(model="nomic", prompt=text) for text in ("a", "bad", "b")]
+        return await asyncio.gather(*(batcher.embed(r) for r in requests), return_exceptions=True)
+
+    good_a, bad, good_b = asyncio.run(run())
+    assert good_a.embedding and good_b.embedding
+    assert isinstance(bad, ValueError)
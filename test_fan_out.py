@@ -0,0 +1,34 @@
+import asyncio
+
+from ollama_wrapper import AsyncOllamaClient, GenerateRequest, GenerateResponse
+
+
+class DelayedClient(AsyncOllamaClient):
+    """Mock client whose models answer after fixed delays"""
+    delays = {"slow": 0.5, "empty": 0.05, "fast": 0.1}
+
+    def __init__(self):
+        super().__init__(use_mock=True)
+        self.cancelled = []
+
+    async def generate(self, request):
+        try:
+            await asyncio.sleep(self.delays[request.model])
+        except asyncio.CancelledError:
+            self.cancelled.append(request.model)
+            raise
+        text = "" if request.model == "empty" else f"answer from {request.model}"
+        return GenerateResponse(model=request.model, created_at="", response=text, done=True)
+
+
+def test_race_keeps_first_valid_response_and_cancels_the_rest():
+    async def race():
+        client = DelayedClient()
+        requests = [GenerateRequest(model=m, prompt="hi") for m in ("slow", "empty", "fast")]
+        winner = await client.race(requests, policy="first_valid")
+        await client.close()
+        return winner, client.cancelled
+
+    (index, response), cancelled = asyncio.run(race())
+    assert index == 2 and response.response == "answer from fast"
+    assert cancelled == ["slow"]
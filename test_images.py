@@ -0,0 +1,41 @@
+import asyncio
+import base64
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from ollama_wrapper.exceptions import OllamaValidationError
+from ollama_wrapper.images import ImagePipeline
+
+
+def png(size, color):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_images_are_downsized_deduplicated_and_referenced_by_handle():
+    async def run():
+        pipeline = ImagePipeline(max_size=64, cache_size=1, max_workers=1)
+        try:
+            large = png((512, 256), "red")
+            handle = await pipeline.ingest(large)
+            assert handle == await pipeline.ingest(large)
+            [encoded] = await pipeline.expand([handle])
+            with Image.open(io.BytesIO(base64.b64decode(encoded))) as img:
+                assert img.size == (64, 32)
+
+            # Inline images evicting each other from a one-entry cache still resolve
+            inline = [base64.b64encode(png((8, 8), color)).decode() for color in ("red", "green", "blue")]
+            results = await asyncio.gather(*(pipeline.expand([image]) for image in inline))
+            assert all(result and result[0] for result in results)
+
+            # The large image was evicted, so its handle no longer resolves
+            with pytest.raises(OllamaValidationError, match="Unknown or expired image handle"):
+                await pipeline.expand([handle])
+        finally:
+            pipeline.close()
+
+    asyncio.run(run())
@@ -0,0 +1,24 @@
+import logging
+
+from ollama_wrapper.logger import RateLimitFilter
+
+
+def test_rate_limit_counts_suppressed_records_per_call_site():
+    """Each call site gets its own budget; the count of dropped records is reported"""
+    rate_limit = RateLimitFilter(limit=2, window=60)
+    records = [logging.LogRecord("x", logging.ERROR, "a.py", 10, "boom", None, None) for _ in range(5)]
+    assert [rate_limit.filter(r) for r in records] == [True, True, False, False, False]
+    assert rate_limit.filter(logging.LogRecord("x", logging.ERROR, "a.py", 11, "other", None, None))
+
+    rate_limit.window = 0
+    record = logging.LogRecord("x", logging.ERROR, "a.py", 10, "boom", None, None)
+    assert rate_limit.filter(record) and record.suppressed == 3
+
+
+def test_text_format_reports_suppressed_and_dropped_records():
+    from ollama_wrapper.logger import TextFormatter
+
+    record = logging.LogRecord("x", logging.ERROR, "a.py", 10, "boom", None, None)
+    record.suppressed, record.dropped = 3, 2
+    line = TextFormatter("%(levelname)s %(message)s").format(record)
+    assert line == "ERROR boom [3 similar records suppressed; 2 records dropped, log queue full]"
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from ollama_wrapper import OllamaClient
+from ollama_wrapper.background_loop import BackgroundLoop
+from ollama_wrapper.exceptions import OllamaTimeoutError
+
+
+async def serve_tags(delay):
+    """Start an Ollama stand-in whose /api/tags takes ``delay`` seconds; returns (runner, base URL)"""
+    async def tags(request):
+        await asyncio.sleep(delay)
+        return web.json_response({"models": []})
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def server_loop():
+    loop = BackgroundLoop()
+    yield loop
+    loop.stop()
+
+
+def test_blocking_pool_times_out_waiting_for_a_connection(server_loop):
+    runner, base_url = server_loop.run(serve_tags(0.5))
+    client = OllamaClient(base_url=base_url, use_mock=False, pool_maxsize=1, pool_block=True, pool_timeout=0.1)
+    try:
+        holder = threading.Thread(target=client.list_models)
+        holder.start()
+        time.sleep(0.1)
+        with pytest.raises(OllamaTimeoutError):
+            client.list_models()
+        holder.join()
+        stats = client.pool_stats()
+        assert (stats["created"], stats["timeouts"], stats["in_use"]) == (1, 1, 0)
+    finally:
+        client.close()
+        server_loop.run(runner.cleanup())
+
+
+def test_connections_idle_past_the_keepalive_are_reaped(server_loop):
+    runner, base_url = server_loop.run(serve_tags(0))
+    client = OllamaClient(base_url=base_url, use_mock=False, pool_keepalive=0.1)
+    try:
+        client.list_models()
+        assert client.pool_stats()["idle"] == 1
+        assert client.reap_idle_connections() == 0
+
+        time.sleep(0.2)
+        assert client.reap_idle_connections() == 1
+        stats = client.pool_stats()
+        assert (stats["idle"], stats["reaped"]) == (0, 1)
+
+        # The next request opens a fresh connection
+        client.list_models()
+        assert client.pool_stats()["created"] == 2
+    finally:
+        client.close()
+        server_loop.run(runner.cleanup())
@@ -0,0 +1,46 @@
+import asyncio
+
+from ollama_wrapper.exceptions import OllamaResponseError
+from ollama_wrapper.models import ModelResponse
+from ollama_wrapper.pull import PullOrchestrator
+
+
+class DroppingBackend:
+    """Stand-in client whose first pull drops halfway through the layer"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.pulls = []
+
+    async def pull_model(self, model, stream=True):
+        self.pulls.append(model)
+        attempt = len(self.pulls)
+
+        async def chunks():
+            yield ModelResponse(status="pulling manifest")
+            yield ModelResponse(status="pulling abc", digest="sha256:abc", total=100, completed=50)
+            await asyncio.sleep(0.01)
+            if attempt == 1:
+                raise OllamaResponseError("connection reset")
+            yield ModelResponse(status="pulling abc", digest="sha256:abc", total=100, completed=100)
+            yield ModelResponse(status="success")
+        return chunks()
+
+
+def test_concurrent_pulls_share_one_upstream_pull_and_resume_after_a_drop():
+    backend = DroppingBackend("http://gpu-1:11434")
+    orchestrator = PullOrchestrator([backend], retry_delay=0)
+
+    async def run():
+        async def collect():
+            return [event async for event in orchestrator.pull(["llama2"])]
+        return await asyncio.gather(collect(), collect())
+
+    first, second = asyncio.run(run())
+    # One pull, re-issued once after the drop, served both callers
+    assert backend.pulls == ["llama2:latest", "llama2:latest"]
+    for events in (first, second):
+        final = events[-1]
+        assert final["done"] and final["status"] == "success"
+        assert (final["percent"], final["attempt"]) == (100.0, 2)
+        assert any(event["status"] == "reconnecting" for event in events)
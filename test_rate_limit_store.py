@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from ollama_wrapper.rate_limit_store import SharedMemoryRateLimitStore
+from ollama_wrapper.sync_rate_limiter import SyncRateLimiter
+
+
+def test_shared_memory_store_is_one_bucket_across_openers(tmp_path):
+    """Two openers of the same file (as two workers would) draw from one bucket"""
+    path = str(tmp_path / "limits")
+    first, second = SharedMemoryRateLimitStore(path), SharedMemoryRateLimitStore(path, slots=8)
+    assert second.slots == first.slots
+
+    assert first.take("gen", rate=0.001, capacity=5, tokens=1, lease=3) == (3, 0.0)
+    assert second.take("gen", rate=0.001, capacity=5, tokens=1, lease=3)[0] == pytest.approx(2, abs=0.01)
+    granted, wait = second.take("gen", rate=0.001, capacity=5, tokens=1, lease=3)
+    assert granted == 1 and wait > 0
+    # Other keys are unaffected
+    assert first.take("chat", rate=0.001, capacity=5, tokens=1, lease=1) == (1, 0.0)
+    first.close()
+    second.close()
+
+
+def test_limiters_sharing_a_store_split_the_budget(tmp_path):
+    store = SharedMemoryRateLimitStore(str(tmp_path / "limits"))
+    limiters = [SyncRateLimiter(store, namespace="http://ollama") for _ in range(2)]
+    buckets = [limiter.get_bucket("gen", rate=0.001, capacity=10) for limiter in limiters]
+    waits = [buckets[i % 2].acquire() for i in range(14)]
+    assert sum(1 for wait in waits if wait == 0) == 10
+    store.close()
+
+
+def test_full_buckets_give_up_their_slots_to_new_keys(tmp_path):
+    path = str(tmp_path / "limits")
+    first, second = SharedMemoryRateLimitStore(path, slots=2), SharedMemoryRateLimitStore(path)
+    first.take("a", rate=1000, capacity=1, tokens=1, lease=1)
+    first.take("b", rate=0.001, capacity=1, tokens=1, lease=1)
+    time.sleep(0.01)
+
+    # "a" has refilled, so "c" takes over its slot and is shared by both openers
+    assert first.take("c", rate=0.001, capacity=2, tokens=1, lease=1) == (1, 0.0)
+    assert second.take("c", rate=0.001, capacity=2, tokens=1, lease=1) == (1, 0.0)
+    assert second.take("c", rate=0.001, capacity=2, tokens=1, lease=1)[1] > 0
+    # Every slot is in use, so "d" falls back to a per-process bucket
+    assert first.take("d", rate=0.001, capacity=1, tokens=1, lease=1) == (1, 0.0)
+    assert first._overflow_keys == {"d"}
+    first.close()
+    second.close()
+
+
+def test_stamps_from_before_a_reboot_do_not_create_debt():
+    available, granted, wait = SharedMemoryRateLimitStore._take(
+        available=3, last=time.monotonic() + 1e6, now=time.monotonic(), rate=1, capacity=5, tokens=1, lease=1
+    )
+    assert (available, granted, wait) == (2, 1, 0.0)
+
+
+def test_stores_must_implement_take():
+    from ollama_wrapper.rate_limit_store import RateLimitStore
+
+    class Incomplete(RateLimitStore):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
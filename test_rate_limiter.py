@@ -0,0 +1,38 @@
+import asyncio
+
+from ollama_wrapper.gcra import GCRA
+from ollama_wrapper.rate_limiter import RateLimiter
+
+
+def test_gcra_reserves_consecutive_slots_and_refunds_cancelled_tail():
+    gcra = GCRA(rate=2, capacity=2)
+    waits, reservations = zip(*(gcra.reserve(1, now=100.0) for _ in range(5)))
+    # The burst passes immediately, then one waiter every half second
+    assert waits == (0.0, 0.0, 0.5, 1.0, 1.5)
+
+    # A cancelled reservation in the middle is refunded once the later ones are
+    assert not gcra.cancel(reservations[3])
+    assert gcra.cancel(reservations[4])
+    assert gcra.tat == reservations[2][1]
+    assert gcra.reserve(1, now=100.0)[0] == 1.0
+
+
+def test_concurrent_waiters_do_not_oversubscribe():
+    async def run():
+        limiter = RateLimiter()
+        limiter.get_bucket("generate", rate=50, capacity=5)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        finished = []
+
+        async def request(i):
+            await limiter.acquire("generate")
+            finished.append((i, loop.time() - started))
+
+        await asyncio.gather(*(request(i) for i in range(15)))
+        return finished
+
+    finished = asyncio.run(run())
+    assert [i for i, _ in finished] == list(range(15))
+    # 5 burst tokens, then 10 more at 50/s
+    assert finished[-1][1] >= 0.19
@@ -0,0 +1,39 @@
+from ollama_wrapper import OllamaClient, GenerateRequest
+
+
+def test_recorded_stream_replays(tmp_path):
+    """A stream recorded from one client is served back by a replaying client"""
+    trace = str(tmp_path / "trace.jsonl")
+    request = GenerateRequest(model="llama2", prompt="hello world")
+
+    recorder = OllamaClient(use_mock=True, record_path=trace)
+    recorded = [chunk.response for chunk in recorder.generate(request)]
+    recorder.close()
+
+    replayer = OllamaClient(replay_path=trace, replay_speed=0)
+    replayed = [chunk.response for chunk in replayer.generate(request)]
+    assert replayed == recorded
+
+
+def test_clients_recording_to_one_path_share_a_recorder(tmp_path):
+    """Clients writing the same trace share one writer, which outlives all but the last close"""
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    trace = str(tmp_path / "trace.jsonl")
+    first = OllamaClient(use_mock=True, record_path=trace)
+    second = OllamaClient(use_mock=True, record_path=trace)
+    assert first.recorder is second.recorder
+
+    def generate(client):
+        return [chunk.response for chunk in client.generate(GenerateRequest(model="llama2", prompt="hi"))]
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(generate, [first, second] * 10))
+    first.close()
+    generate(second)
+    second.close()
+
+    with open(trace) as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 21 and all(entry["endpoint"] == "/api/generate" for entry in entries)
@@ -0,0 +1,42 @@
+from ollama_wrapper.config import Config
+from ollama_wrapper.semantic_cache import SemanticCache
+
+
+def test_similar_prompts_hit_within_their_namespace_only():
+    """Paraphrases hit, unrelated prompts and other models miss, LRU entries are evicted"""
+    cache = SemanticCache(threshold=0.9, max_entries=2)
+    namespace, text = cache.key(Config.GENERATE_ENDPOINT, {"model": "llama2", "prompt": "reset password"})
+    other, _ = cache.key(Config.GENERATE_ENDPOINT, {"model": "mistral", "prompt": "reset password"})
+    assert text == "reset password" and namespace != other
+    assert cache.key(Config.GENERATE_ENDPOINT, {"model": "llama2", "prompt": "x", "images": ["a"]}) is None
+
+    cache.store(namespace, [1.0, 0.0, 0.0], {"response": "password"})
+    cache.store(namespace, [0.0, 1.0, 0.0], {"response": "refund"})
+    assert cache.lookup(namespace, [0.95, 0.1, 0.0]) == {"response": "password"}
+    assert cache.lookup(namespace, [0.5, 0.5, 0.7]) is None
+    assert cache.lookup(other, [1.0, 0.0, 0.0]) is None
+
+    # "refund" is now least recently used and makes room for a third entry
+    cache.store(namespace, [0.0, 0.0, 1.0], {"response": "shipping"})
+    assert cache.lookup(namespace, [0.0, 1.0, 0.0]) is None
+    assert cache.lookup(namespace, [1.0, 0.0, 0.0]) == {"response": "password"}
+
+
+def test_chat_keys_embed_the_latest_question_under_a_history_namespace():
+    cache = SemanticCache()
+    system = {"role": "system", "content": "You are a support agent. " * 200}
+    first = cache.key(Config.CHAT_ENDPOINT, {"model": "llama2", "messages": [
+        system, {"role": "user", "content": "How do I reset my password?"}
+    ]})
+    second = cache.key(Config.CHAT_ENDPOINT, {"model": "llama2", "messages": [
+        system, {"role": "user", "content": "Where is my refund?"}
+    ]})
+    later = cache.key(Config.CHAT_ENDPOINT, {"model": "llama2", "messages": [
+        system, {"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"},
+        {"role": "user", "content": "Where is my refund?"}
+    ]})
+    assert first[1] == "How do I reset my password?" and second[1] == "Where is my refund?"
+    assert first[0] == second[0] and later[0] != second[0]
+    assert cache.key(Config.CHAT_ENDPOINT, {"model": "llama2", "messages": [
+        {"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}
+    ]}) is None
@@ -0,0 +1,26 @@
+import asyncio
+import time
+
+from app import coalesce_stream
+
+
+def test_coalesced_lines_are_flushed_on_a_timer_while_upstream_stalls():
+    closed = []
+
+    async def upstream():
+        try:
+            yield 1
+            yield 2
+            await asyncio.sleep(0.5)
+            yield 3
+        finally:
+            closed.append(True)
+
+    async def run():
+        started = time.monotonic()
+        return [(batch, time.monotonic() - started) async for batch in coalesce_stream(upstream(), 50, 64)]
+
+    (first, first_at), (second, _) = asyncio.run(run())
+    assert (first, second) == ([1, 2], [3])
+    assert first_at < 0.3
+    assert closed == [True]
@@ -0,0 +1,62 @@
+import pytest
+
+from ollama_wrapper.exceptions import OllamaStructuredOutputError
+from ollama_wrapper.structured import StreamingJSONValidator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string", "enum": ["red", "blue"]}},
+    },
+    "required": ["name"],
+    "additionalProperties": False,
+}
+
+
+def test_valid_output_fed_in_pieces():
+    """Output split at arbitrary token boundaries validates and parses"""
+    validator = StreamingJSONValidator(SCHEMA)
+    for token in ['{"na', 'me": "Al\\u00e9', 'x", "tags": ["re', 'd", "blue"]', "}"]:
+        validator.feed(token)
+    assert validator.finish() == {"name": "Aléx", "tags": ["red", "blue"]}
+
+
+def test_invalid_output_fails_at_first_bad_character():
+    """Validation fails as soon as no continuation could match the schema"""
+    validator = StreamingJSONValidator(SCHEMA)
+    validator.feed('{"name": "x", "tags": ["bl')
+    with pytest.raises(OllamaStructuredOutputError) as excinfo:
+        validator.feed('ack"]}')
+    assert excinfo.value.path == "$.tags[0]"
+    with pytest.raises(OllamaStructuredOutputError):
+        StreamingJSONValidator(SCHEMA).feed('{"name": "x", "color"')
+
+
+def test_stream_ending_without_done_chunk_must_be_complete():
+    import asyncio
+
+    from ollama_wrapper.models import GenerateResponse
+    from ollama_wrapper.structured import avalidate_stream
+
+    async def truncated():
+        for token in ['{"name": ', '"x"']:
+            yield GenerateResponse(model="llama2", created_at="", response=token, done=False)
+
+    async def run():
+        return [chunk async for chunk in avalidate_stream(truncated(), SCHEMA)]
+
+    with pytest.raises(OllamaStructuredOutputError, match="ended before"):
+        asyncio.run(run())
+
+
+def test_structured_generation_needs_at_least_one_attempt():
+    import asyncio
+
+    from ollama_wrapper import AsyncOllamaClient, GenerateRequest
+    from ollama_wrapper.exceptions import OllamaValidationError
+    from ollama_wrapper.structured import generate_structured
+
+    request = GenerateRequest(model="llama2", prompt="hi", format=SCHEMA)
+    with pytest.raises(OllamaValidationError, match="max_attempts"):
+        asyncio.run(generate_structured(AsyncOllamaClient(use_mock=True), request, max_attempts=0))
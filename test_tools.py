@@ -0,0 +1,64 @@
+import time
+
+from ollama_wrapper import ChatRequest, ChatResponse, OllamaClient, tool
+from ollama_wrapper.models import Message
+
+
+def test_tool_calls_run_concurrently_and_pure_results_are_cached():
+    """All calls of one turn run together; pure tools are not re-executed"""
+    executed = []
+
+    @tool(pure=True)
+    def lookup(city: str):
+        executed.append(city)
+        time.sleep(0.2)
+        return {"city": city}
+
+    turns = iter([
+        [{"function": {"name": "lookup", "arguments": {"city": c}}} for c in ("a", "b", "c")],
+        [{"function": {"name": "lookup", "arguments": {"city": "a"}}}],
+        None,
+    ])
+
+    def chat(request):
+        message = Message(role="assistant", content="", tool_calls=next(turns))
+        return ChatResponse(model=request.model, created_at="", message=message, done=True)
+
+    client = OllamaClient(use_mock=True)
+    client.chat = chat
+    request = ChatRequest(model="llama2", messages=[Message(role="user", content="hi")])
+    started = time.monotonic()
+    response, messages = client.run_tools(request, [lookup])
+    client.close()
+
+    assert time.monotonic() - started < 0.5
+    assert sorted(executed) == ["a", "b", "c"]
+    assert [m.content for m in messages if m.role == "tool"][-1] == '{"city": "a"}'
+    assert response.message.tool_calls is None
+
+
+def test_same_named_pure_tools_do_not_share_cached_results():
+    from ollama_wrapper.tools import Tool, ToolExecutor
+
+    weather_a = Tool(lambda city: "sunny", name="weather", pure=True)
+    weather_b = Tool(lambda city: "rainy", name="weather", pure=True)
+    call = [{"function": {"name": "weather", "arguments": {"city": "x"}}}]
+    executor = ToolExecutor()
+    assert executor.run({"weather": weather_a}, call)[0].content == "sunny"
+    assert executor.run({"weather": weather_b}, call)[0].content == "rainy"
+    executor.close()
+
+
+def test_non_object_arguments_are_an_error_result_sync_and_async():
+    import asyncio
+
+    from ollama_wrapper.tools import Tool, ToolExecutor
+
+    tools = {"weather": Tool(lambda city: "sunny", name="weather")}
+    calls = [{"function": {"name": "weather", "arguments": ["x"]}},
+             {"function": {"name": "weather", "arguments": '"x"'}}]
+    executor = ToolExecutor()
+    expected = ["Error: tool arguments must be an object"] * 2
+    assert [m.content for m in executor.run(tools, calls)] == expected
+    assert [m.content for m in asyncio.run(executor.arun(tools, calls))] == expected
+    executor.close()
@@ -0,0 +1,50 @@
+import asyncio
+
+from aiohttp import web
+
+from ollama_wrapper import AsyncOllamaClient, OllamaClient
+from ollama_wrapper.background_loop import BackgroundLoop
+
+MODELS = [{"name": "llama2:latest", "model": "llama2:latest", "digest": "a"}]
+
+
+async def serve_unix(path, requests):
+    """Start an Ollama stand-in listening on a Unix socket"""
+    async def tags(request):
+        requests.append(request.path)
+        return web.json_response({"models": MODELS})
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.UnixSite(runner, path).start()
+    return runner
+
+
+def test_clients_round_trip_over_a_unix_socket(tmp_path):
+    socket_path = str(tmp_path / "ollama.sock")
+    base_url = f"unix://{socket_path}"
+    requests = []
+    server_loop = BackgroundLoop()
+    runner = server_loop.run(serve_unix(socket_path, requests))
+    try:
+        client = OllamaClient(base_url=base_url, use_mock=False)
+        try:
+            assert client.list_models() == {"models": MODELS}
+            assert client.list_models() == {"models": MODELS}
+        finally:
+            client.close()
+
+        async def list_async():
+            async_client = AsyncOllamaClient(base_url=base_url, use_mock=False)
+            try:
+                return await async_client.list_models()
+            finally:
+                await async_client.close()
+
+        assert asyncio.run(list_async()) == {"models": MODELS}
+        assert requests == ["/api/tags"] * 3
+    finally:
+        server_loop.run(runner.cleanup())
+        server_loop.stop()
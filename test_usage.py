@@ -0,0 +1,67 @@
+import json
+
+from ollama_wrapper.usage import UsageLedger, usage_hour
+
+
+def test_usage_ledger_aggregates_flushes_and_replays(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+    ledger = UsageLedger(path=path, flush_interval=3600)
+    final = {"model": "llama2", "done": True, "prompt_eval_count": 100, "prompt_eval_duration": 500_000_000,
+             "eval_count": 40, "eval_duration": 2_000_000_000}
+    ledger.record("acme", final)
+    ledger.record("acme", final)
+    ledger.record("other", {"model": "llama2", "done": True})
+
+    usage = ledger.query(tenant="acme")
+    assert usage["usage"] == [{
+        "tenant": "acme", "model": "llama2", "hour": usage_hour(), "requests": 2,
+        "prompt_tokens": 200, "completion_tokens": 80, "gpu_seconds": 5.0,
+        "prompt_tokens_per_second": 200.0, "tokens_per_second": 20.0,
+    }]
+    assert ledger.query()["totals"]["requests"] == 3
+
+    # Flushes append only the increments since the previous flush
+    assert ledger.flush() == 2
+    ledger.record("acme", final)
+    ledger.close()
+    with open(path) as f:
+        assert [json.loads(line)["requests"] for line in f] == [2, 1, 1]
+
+    replayed = UsageLedger(path=path, flush_interval=3600)
+    assert replayed.query(tenant="acme")["totals"]["completion_tokens"] == 120
+    replayed.close()
+
+
+def test_usage_endpoint_is_scoped_to_the_callers_tenant(monkeypatch):
+    import app
+
+    client = app.app.test_client()
+    for tenant in ("tenant-a", "tenant-b"):
+        response = client.post("/api/compare", headers={"X-Tenant-ID": tenant},
+                               json={"prompt": "hi", "models": ["llama2"], "policy": "first_complete"})
+        assert response.status_code == 200
+
+    usage = client.get("/api/usage", headers={"X-Tenant-ID": "tenant-a"}).get_json()
+    assert {row["tenant"] for row in usage["usage"]} == {"tenant-a"}
+    assert client.get("/api/usage?tenant=tenant-b", headers={"X-Tenant-ID": "tenant-a"}).status_code == 403
+
+    monkeypatch.setattr(app.OllamaConfig, "USAGE_ADMIN_TOKEN", "secret")
+    usage = client.get("/api/usage", headers={"Authorization": "Bearer secret"}).get_json()
+    assert {"tenant-a", "tenant-b"} <= {row["tenant"] for row in usage["usage"]}
+
+
+def test_tenant_tokens_bind_usage_to_a_credential(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app.OllamaConfig, "TENANT_TOKENS", {"token-a": "tenant-a", "token-b": "tenant-b"})
+    client = app.app.test_client()
+    response = client.post("/api/compare", headers={"Authorization": "Bearer token-b"},
+                           json={"prompt": "hi", "models": ["llama2"], "policy": "first_complete"})
+    assert response.status_code == 200
+
+    # The tenant header no longer selects the tenant
+    assert client.get("/api/usage", headers={"X-Tenant-ID": "tenant-b"}).status_code == 401
+    usage = client.get("/api/usage", headers={"Authorization": "Bearer token-a", "X-Tenant-ID": "tenant-b"}).get_json()
+    assert {row["tenant"] for row in usage["usage"]} <= {"tenant-a"}
+    usage = client.get("/api/usage", headers={"Authorization": "Bearer token-b"}).get_json()
+    assert {row["tenant"] for row in usage["usage"]} == {"tenant-b"}